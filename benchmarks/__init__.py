@@ -0,0 +1,49 @@
+"""
+Benchmarks of the collector hot paths. Each module is runnable with
+``python -m benchmarks.<module>`` from the repository root and needs no
+external services.
+"""
+import django
+from django.conf import settings
+
+
+def setup(**options) -> None:
+    """
+    Configures minimal Django environment with in-memory database.
+
+    :param options: additional or overridden settings
+    """
+    if settings.configured:
+        return
+    defaults = {
+        'INSTALLED_APPS': [
+            'django.contrib.contenttypes',
+            'collector.apps.CollectorConfig'
+        ],
+        'DATABASES': {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3'
+            }
+        },
+        'INFLUXDB_HOST': 'localhost',
+        'INFLUXDB_USERNAME': 'user',
+        'INFLUXDB_PASSWORD': 'secret',
+        'CELERY_BROKER_URL': 'memory://localhost/'
+    }
+    defaults.update(options)
+    settings.configure(**defaults)
+    django.setup()
+
+
+def report(title: str, rows: list) -> None:
+    """
+    Prints benchmark results as aligned table.
+
+    :param title: benchmark name
+    :param rows: pairs of label and value
+    """
+    print(title)
+    width = max(len(label) for label, _value in rows)
+    for label, value in rows:
+        print('  {label:<{width}}  {value}'.format(
+            label=label, width=width, value=value))
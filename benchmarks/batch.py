@@ -0,0 +1,81 @@
+"""
+Compares samples of a large host passed through Celery broker as JSON
+list of OID and value pairs against serialized SampleBatch carried by
+msgpack message. Both sides are measured: serializing message by
+worker which polled the host and deserializing it into OID to value
+mapping by worker storing samples.
+"""
+import argparse
+import time
+
+from kombu.serialization import dumps, loads
+
+from . import report
+
+
+def measure(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scalars', type=int, default=16)
+    parser.add_argument('--interfaces', type=int, default=5000)
+    parser.add_argument('--columns', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from collector.batch import SampleBatch, load_samples
+
+    samples = [
+        ('1.3.6.1.2.1.6.{index}.0'.format(index=index), 123456)
+        for index in range(1, args.scalars + 1)
+    ] + [
+        ('1.3.6.1.2.1.2.2.1.{column}.{row}'.format(column=column, row=row),
+         123456789 * row if column % 2 else 0.25 * row)
+        for column in range(10, args.columns + 10)
+        for row in range(1, args.interfaces + 1)
+    ]
+
+    def send_list():
+        return dumps([[samples], {'host': 'core router'}], 'json')
+
+    def send_batch():
+        return dumps([[SampleBatch().extend(samples).dumps()],
+                      {'host': 'core router'}], 'msgpack')
+
+    def receive(message):
+        content_type, encoding, body = message
+        chunks = loads(body, content_type, encoding,
+                       accept={content_type})[0]
+        return {
+            oid: value
+            for chunk in chunks
+            for oid, value in load_samples(chunk)
+        }
+
+    list_message = send_list()
+    batch_message = send_batch()
+    assert receive(list_message) == receive(batch_message) == dict(samples)
+    rows = []
+    for label, send, message in (('JSON list', send_list, list_message),
+                                 ('batch', send_batch, batch_message)):
+        rows.extend([
+            ('{label} size'.format(label=label),
+             '{0} bytes'.format(len(message[2]))),
+            ('{label} send'.format(label=label),
+             '{0:.1f} ms'.format(measure(send, args.repeat) * 1000)),
+            ('{label} receive'.format(label=label),
+             '{0:.1f} ms'.format(
+                 measure(lambda: receive(message), args.repeat) * 1000))
+        ])
+    report('{samples} samples'.format(samples=len(samples)), rows)
+
+
+if __name__ == '__main__':
+    main()
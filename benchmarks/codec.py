@@ -0,0 +1,51 @@
+"""
+Compares packets per second on a single core of pysnmp and built-in
+codec: encoding a GetRequest and decoding its GetResponse.
+"""
+import argparse
+import time
+
+from . import report
+
+
+def measure(encode, decode, response, oids, packets):
+    start = time.process_time()
+    for request_id in range(packets):
+        encode(request_id, 'watcheye', oids)
+        decode(response)
+    return packets / (time.process_time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--packets', type=int, default=2000)
+    parser.add_argument('--oids', type=int, default=32)
+    args = parser.parse_args()
+
+    from pysnmp.proto import rfc1902
+
+    from collector import aiosnmp
+    from collector.tests.test_codec import encode_response
+
+    oids = ['1.3.6.1.2.1.2.2.1.10.{index}'.format(index=index)
+            for index in range(args.oids)]
+    response = encode_response(
+        [(oid, rfc1902.Counter32(123456789)) for oid in oids]
+    )
+    pysnmp = measure(aiosnmp.encode_pysnmp, aiosnmp.decode_pysnmp,
+                     response, oids, args.packets // 10)
+    builtin = measure(aiosnmp.encode_builtin, aiosnmp.decode_builtin,
+                      response, oids, args.packets)
+    report(
+        'GET of {oids} OIDs, request and response per packet'.format(
+            oids=args.oids),
+        [
+            ('pysnmp', '{0:.0f} packets/s'.format(pysnmp)),
+            ('built-in codec', '{0:.0f} packets/s'.format(builtin)),
+            ('speedup', '{0:.1f}x'.format(builtin / pysnmp))
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compares per-chunk cost of snmp_harvester's SNMP GET with objects built
+from scratch for every chunk against objects taken from EnginePool and
+against pooled objects queried with numeric OIDs bypassing MIB
+resolution.
+"""
+import argparse
+import ipaddress
+import time
+
+from . import report, setup
+
+
+def fresh(ip, port, community, oids):
+    from pysnmp.hlapi import (CommunityData, ContextData, ObjectIdentity,
+                              ObjectType, SnmpEngine, Udp6TransportTarget,
+                              UdpTransportTarget, getCmd)
+    if ipaddress.ip_address(ip).version == 4:
+        transport = UdpTransportTarget
+    else:
+        transport = Udp6TransportTarget
+    return next(getCmd(
+        SnmpEngine(),
+        CommunityData(community, mpModel=1),
+        transport((ip, port)),
+        ContextData(),
+        *[ObjectType(ObjectIdentity(oid)) for oid in oids]
+    ))
+
+
+def pooled(pool):
+    from pysnmp.hlapi import ContextData, ObjectIdentity, ObjectType, getCmd
+
+    def query(ip, port, community, oids):
+        with pool.session(ip, port, community) as (engine, auth, target):
+            return next(getCmd(
+                engine, auth, target, ContextData(),
+                *[ObjectType(ObjectIdentity(oid)) for oid in oids]
+            ))
+    return query
+
+
+def numeric(pool):
+    from collector.snmp import get_cmd
+
+    def query(ip, port, community, oids):
+        with pool.session(ip, port, community) as session:
+            return get_cmd(*session, oids)
+    return query
+
+
+def measure(query, port, chunks, oids):
+    start = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(chunks):
+        error_indication, *_ = query('127.0.0.1', port, 'watcheye', oids)
+        assert error_indication is None, error_indication
+    return (
+        (time.perf_counter() - start) / chunks,
+        (time.process_time() - cpu) / chunks
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chunks', type=int, default=50)
+    parser.add_argument('--oids', type=int, default=32)
+    args = parser.parse_args()
+
+    setup()
+    from pyasn1.type.univ import Integer
+
+    from collector.snmp import EnginePool
+    from collector.tests.utils import SnmpResponder
+
+    oids = ['1.3.6.1.2.1.2.2.1.10.{index}'.format(index=index)
+            for index in range(args.oids)]
+    with SnmpResponder(Integer, 1) as responder:
+        before = measure(fresh, responder.port, args.chunks, oids)
+        after = measure(pooled(EnginePool()), responder.port,
+                        args.chunks, oids)
+        raw = measure(numeric(EnginePool()), responder.port,
+                      args.chunks, oids)
+    report(
+        'SNMP GET of {oids} OIDs, {chunks} chunks (wall, CPU)'.format(
+            oids=args.oids, chunks=args.chunks),
+        [
+            (label, '{0:.2f} ms, {1:.2f} ms'.format(wall * 1000, cpu * 1000))
+            for label, (wall, cpu) in (
+                ('new engine per chunk', before),
+                ('EnginePool', after),
+                ('EnginePool, numeric OIDs', raw)
+            )
+        ] + [
+            ('speedup', '{0:.1f}x'.format(before[0] / raw[0]))
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Polls a simulated fleet of SNMP agents end to end: snmp_scheduler
+starts polling tasks which are executed by a real Celery worker and
+samples are written to an InfluxDB stub. Agents and the stub run in
+child processes, so reported CPU time is the one of scheduler and
+worker only. Every cycle ends when all tasks it published, including
+the ones published by other tasks, are finished.
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from . import report, setup
+from .simulator import INTERFACE_TABLE, Agents, InfluxStub, Service
+
+
+def populate(ports, scalars, interfaces, columns):
+    from collector.models import Group, Host, Instance, Parameter
+    tcp = Group.objects.create(name='tcp', type=Group.SCALAR,
+                               oid='1.3.6.1.2.1.6')
+    interface = Group.objects.create(name='interface', type=Group.TABULAR,
+                                     oid=INTERFACE_TABLE)
+    Parameter.objects.bulk_create(
+        [
+            Parameter(group=tcp, type=Parameter.INTEGER,
+                      name='tcp{index}'.format(index=index), oid=index + 1)
+            for index in range(scalars)
+        ] + [
+            Parameter(group=interface, type=Parameter.INTEGER,
+                      name='if{index}'.format(index=index), oid=index + 10)
+            for index in range(columns)
+        ]
+    )
+    Host.objects.bulk_create(
+        (
+            Host(name='host{index}'.format(index=index), ip='127.0.0.1',
+                 port=port, community='watcheye')
+            for index, port in enumerate(ports)
+        ),
+        batch_size=100
+    )
+    instances = []
+    for host in Host.objects.all():
+        if scalars:
+            instances.append(Instance(host=host, group=tcp))
+        instances.extend(
+            Instance(host=host, group=interface, oid=row,
+                     name='eth{row}'.format(row=row))
+            for row in range(1, interfaces + 1)
+        )
+    Instance.objects.bulk_create(instances, batch_size=100)
+
+
+class TaskCounter:
+    """
+    Counts tasks published and finished by this process, the worker
+    being one of its threads.
+    """
+    def __init__(self):
+        from celery import signals
+        self.published = 0
+        self.finished = 0
+        self.condition = threading.Condition()
+        signals.after_task_publish.connect(self.publish, weak=False)
+        signals.task_postrun.connect(self.finish, weak=False)
+
+    def publish(self, **_kwargs):
+        with self.condition:
+            self.published += 1
+
+    def finish(self, **_kwargs):
+        with self.condition:
+            self.finished += 1
+            self.condition.notify_all()
+
+    def wait(self):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.finished >= self.published
+            )
+
+
+def cycle(agents, influx, counter):
+    from collector import tasks
+
+    agents.command('reset')
+    influx.command('reset')
+    start = time.perf_counter()
+    cpu = time.process_time()
+    tasks.snmp_scheduler()
+    counter.wait()
+    tasks.write_buffer.flush()
+    stats = {
+        'elapsed': time.perf_counter() - start,
+        'cpu': time.process_time() - cpu
+    }
+    stats.update(influx.command('stats'))
+    stats.update(agents.command('stats'))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--scalars', type=int, default=16,
+                        help='scalar OIDs of every host')
+    parser.add_argument('--interfaces', type=int, default=8,
+                        help='configured interface rows of every host')
+    parser.add_argument('--spread', type=int, default=2,
+                        help='agents miss up to that many rows')
+    parser.add_argument('--columns', type=int, default=4,
+                        help='polled columns of interface table')
+    parser.add_argument('--latency', type=float, default=2,
+                        help='mean response delay in ms')
+    parser.add_argument('--jitter', type=float, default=1,
+                        help='maximal deviation from latency in ms')
+    parser.add_argument('--loss', type=float, default=0,
+                        help='probability of request being lost')
+    parser.add_argument('--engine', choices=['sync', 'asyncio'],
+                        default='sync')
+    parser.add_argument('--builtin-codec', action='store_true',
+                        help='use built-in codec with asyncio engine')
+    parser.add_argument('--pipeline', choices=['chord', 'direct'],
+                        default='direct')
+    parser.add_argument('--buffer', action='store_true',
+                        help='coalesce writes of many hosts')
+    parser.add_argument('--gzip', type=int, default=0, metavar='LEVEL',
+                        help='compress writes at this level')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='worker threads')
+    parser.add_argument('--timeout', type=float, default=0.5)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    agents = Service(Agents, args.hosts, latency=args.latency / 1000,
+                     jitter=args.jitter / 1000, loss=args.loss,
+                     interfaces=args.interfaces, spread=args.spread,
+                     seed=args.seed)
+    influx = Service(InfluxStub)
+
+    database = tempfile.NamedTemporaryFile(suffix='.sqlite3')
+    setup(
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': database.name
+            }
+        },
+        INFLUXDB_HOST='127.0.0.1',
+        INFLUXDB_PORT=influx.address,
+        CELERY_RESULT_BACKEND='cache+memory://',
+        # worker with in-memory broker fetches more messages only after
+        # a 2 s timeout, so all of them are prefetched at once
+        CELERY_WORKER_PREFETCH_MULTIPLIER=0,
+        CELERY_BROKER_TRANSPORT_OPTIONS={'polling_interval': 0.001},
+        SNMP_ENGINE=args.engine,
+        SNMP_BUILTIN_CODEC=args.builtin_codec,
+        SNMP_PIPELINE=args.pipeline,
+        SNMP_TIMEOUT=args.timeout,
+        SNMP_RETRIES=args.retries,
+        INFLUXDB_BUFFER=args.buffer,
+        INFLUXDB_GZIP=bool(args.gzip),
+        INFLUXDB_GZIP_LEVEL=args.gzip
+    )
+    from celery import Celery
+    from celery.contrib.testing.worker import start_worker
+    from django.core.management import call_command
+
+    app = Celery('benchmark')
+    app.config_from_object('django.conf:settings', namespace='CELERY')
+    app.set_default()
+    app.autodiscover_tasks(['collector'], force=True)
+    call_command('migrate', verbosity=0)
+    populate(agents.address, args.scalars, args.interfaces, args.columns)
+
+    try:
+        with start_worker(app, pool='threads', concurrency=args.concurrency,
+                          perform_ping_check=False):
+            counter = TaskCounter()
+            results = [cycle(agents, influx, counter)
+                       for _ in range(args.cycles)]
+    finally:
+        agents.stop()
+        influx.stop()
+
+    report(
+        '{hosts} hosts, {oids} OIDs each, {engine} engine, {pipeline} '
+        'pipeline, {concurrency} threads, latency {latency} ms, '
+        'loss {loss:.0%}'.format(
+            hosts=args.hosts,
+            oids=args.scalars + args.interfaces * args.columns,
+            engine=args.engine, pipeline=args.pipeline,
+            concurrency=args.concurrency, latency=args.latency,
+            loss=args.loss),
+        [
+            (
+                'cycle {index}'.format(index=index),
+                '{elapsed:.2f} s, {hosts} hosts written, {samples} '
+                'samples, {rate:.0f} samples/s, worker CPU {cpu:.2f} s '
+                '({usage:.0%}), {requests} requests ({dropped} lost), '
+                '{writes} writes of {kib:.0f} KiB'.format(
+                    elapsed=stats['elapsed'], hosts=stats['hosts'],
+                    writes=stats['writes'], kib=stats['bytes'] / 1024,
+                    samples=stats['fields'],
+                    rate=stats['fields'] / max(stats['elapsed'], 1e-9),
+                    cpu=stats['cpu'],
+                    usage=stats['cpu'] / max(stats['elapsed'], 1e-9),
+                    requests=stats['requests'], dropped=stats['dropped'])
+            )
+            for index, stats in enumerate(results, 1)
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Compares serialization of a large host's samples to InfluxDB line
+protocol: dict of every point built by scanning parameters of every
+instance (see collector.tests.utils.reference_points) and serialized by
+InfluxDB client against ResultPacker writing lines directly in a single
+pass over samples indexed by compiled host schema. Schema is compiled
+once per configuration change, its cost is reported apart.
+"""
+import argparse
+import time
+
+from . import report, setup
+
+
+def populate(scalars, interfaces, columns):
+    from collector.models import Group, Host, Instance, Parameter, Tag
+    tcp = Group.objects.create(name='tcp', type=Group.SCALAR,
+                               oid='1.3.6.1.2.1.6')
+    interface = Group.objects.create(name='interface', type=Group.TABULAR,
+                                     oid='1.3.6.1.2.1.2.2.1')
+    Parameter.objects.bulk_create(
+        [
+            Parameter(group=tcp, type=Parameter.INTEGER,
+                      name='tcp{index}'.format(index=index), oid=index + 1)
+            for index in range(scalars)
+        ] + [
+            Parameter(group=interface, type=Parameter.FLOAT,
+                      name='if{index}'.format(index=index), oid=index + 10)
+            for index in range(columns)
+        ] + [
+            Parameter(group=interface, type=Parameter.STRING,
+                      name='ifDescr', oid=2, indexing=True)
+        ]
+    )
+    host = Host.objects.create(name='core router', ip='127.0.0.1')
+    host.tag_values.create(tag=Tag.objects.create(name='site'),
+                           value='rack 1, row 2')
+    Instance.objects.create(host=host, group=tcp)
+    Instance.objects.bulk_create(
+        [
+            Instance(host=host, group=interface, oid=row,
+                     name='eth{row}'.format(row=row))
+            for row in range(1, interfaces + 1)
+        ],
+        batch_size=100
+    )
+    return host.name
+
+
+def measure(serialize, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        serialize()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scalars', type=int, default=16)
+    parser.add_argument('--interfaces', type=int, default=5000)
+    parser.add_argument('--columns', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup(
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:'
+            }
+        }
+    )
+    from django.core.management import call_command
+    from influxdb.line_protocol import make_lines
+
+    from collector import lineprotocol, schema, tasks
+    from collector.tests.utils import reference_points
+
+    call_command('migrate', verbosity=0)
+    host = schema.hosts().get(
+        name=populate(args.scalars, args.interfaces, args.columns)
+    )
+    mapping = {
+        tasks.compose_oid(instance.group, parameter, instance):
+            'Ethernet 1/0' if parameter.indexing else 123456789
+        for instance in host.instances.all()
+        for parameter in instance.group.parameters.all()
+    }
+
+    def dicts():
+        points = reference_points(host, dict(mapping))
+        return make_lines({'points': points}, 'm').encode()
+
+    def lines():
+        buffer = lineprotocol.local_buffer()
+        tasks.ResultPacker(host, dict(mapping)).serialize(buffer, 60, 'm')
+        return buffer.getvalue().encode()
+
+    assert dicts() == lines() + b'\n'
+    old = measure(dicts, args.repeat)
+    new = measure(lines, args.repeat)
+    compilation = measure(lambda: schema.HostSchema(host), args.repeat)
+    report(
+        '{points} points, {samples} samples'.format(
+            points=args.interfaces + 1,
+            samples=args.scalars + args.interfaces * args.columns),
+        [
+            ('dicts and write_points', '{0:.1f} ms'.format(old * 1000)),
+            ('line protocol', '{0:.1f} ms'.format(new * 1000)),
+            ('speedup', '{0:.1f}x'.format(old / new)),
+            ('schema compilation', '{0:.1f} ms'.format(compilation * 1000))
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
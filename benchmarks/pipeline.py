@@ -0,0 +1,151 @@
+"""
+Compares chord of per chunk snmp_harvester tasks followed by add_samples
+against single snmp_pipeline task per host. Hosts are polled by a real
+Celery worker with in-memory broker and result backend, so result
+backend traffic of both designs is counted.
+"""
+import argparse
+import collections
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from . import report, setup
+
+
+class BackendCounter:
+    """
+    Counts calls of result backend's key-value store methods. Backend
+    instances are thread local, so methods are counted on the class.
+    """
+    methods = ('get', 'mget', 'set', 'delete', 'incr', 'expire')
+
+    def __init__(self, backend_class):
+        self.calls = collections.Counter()
+        self.patches = [
+            patch.object(backend_class, name,
+                         self.wrap(name, getattr(backend_class, name)))
+            for name in self.methods
+            if hasattr(backend_class, name)
+        ]
+
+    def wrap(self, name, method):
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def __enter__(self):
+        for method_patch in self.patches:
+            method_patch.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for method_patch in self.patches:
+            method_patch.stop()
+
+
+def populate(hosts, parameters, port):
+    from collector.models import Group, Host, Instance, Parameter
+    group = Group.objects.create(name='tcp', type=Group.SCALAR,
+                                 oid='1.3.6.1.2.1.6')
+    for index in range(parameters):
+        Parameter.objects.create(group=group, type=Parameter.INTEGER,
+                                 name='p{index}'.format(index=index),
+                                 oid=index + 1)
+    for index in range(hosts):
+        host = Host.objects.create(name='host{index}'.format(index=index),
+                                   ip='127.0.0.1', port=port,
+                                   community='watcheye')
+        Instance.objects.create(host=host, group=group)
+
+
+def run(app, hosts, pipeline):
+    from django.test import override_settings
+
+    from collector import tasks
+
+    written = threading.Semaphore(0)
+
+    def write_points(*args, **kwargs):
+        written.release()
+
+    with BackendCounter(type(app.backend)) as counter, \
+            override_settings(SNMP_PIPELINE=pipeline), \
+            patch('influxdb.InfluxDBClient.write_points',
+                  side_effect=write_points):
+        start = time.perf_counter()
+        tasks.snmp_scheduler()
+        for _ in range(hosts):
+            written.acquire()
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(counter.calls.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hosts', type=int, default=50)
+    parser.add_argument('--parameters', type=int, default=64)
+    parser.add_argument('--chunk-size', type=int, default=16)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    database = tempfile.NamedTemporaryFile(suffix='.sqlite3')
+    setup(
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': database.name
+            }
+        },
+        CELERY_RESULT_BACKEND='cache+memory://',
+        SNMP_DEFAULT_CHUNK_SIZE=args.chunk_size,
+        SNMP_MIN_CHUNK_SIZE=args.chunk_size,
+        SNMP_MAX_CHUNK_SIZE=args.chunk_size
+    )
+    from celery import Celery
+    from celery.contrib.testing.worker import start_worker
+    from django.core.management import call_command
+    from pyasn1.type.univ import Integer
+
+    from collector.tests.utils import SnmpResponder
+
+    app = Celery('benchmark')
+    app.config_from_object('django.conf:settings', namespace='CELERY')
+    app.set_default()
+    app.autodiscover_tasks(['collector'], force=True)
+    call_command('migrate', verbosity=0)
+
+    with SnmpResponder(Integer, 1) as responder, \
+            start_worker(app, pool='threads',
+                         concurrency=args.concurrency,
+                         perform_ping_check=False):
+        populate(args.hosts, args.parameters, responder.port)
+        results = [
+            (
+                pipeline,
+                min(run(app, args.hosts, pipeline)
+                    for _ in range(args.rounds))
+            )
+            for pipeline in ('chord', 'direct')
+        ]
+    report(
+        '{hosts} hosts, {parameters} OIDs in chunks of {size}, '
+        'best of {rounds}'.format(
+            hosts=args.hosts, parameters=args.parameters,
+            size=args.chunk_size, rounds=args.rounds),
+        [
+            (
+                pipeline,
+                '{0:.0f} ms, {1} result backend operations'.format(
+                    elapsed * 1000, operations)
+            )
+            for pipeline, (elapsed, operations) in results
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
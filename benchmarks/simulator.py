@@ -0,0 +1,346 @@
+"""
+Stand-ins of external services for benchmarks: a fleet of simulated
+SNMPv2c agents and an InfluxDB HTTP API stub. Both run in child
+processes, so theirs CPU time is not accounted to the measured one, and
+are controlled through a pipe with 'stats', 'reset' and 'stop' commands.
+"""
+import gzip
+import hashlib
+import heapq
+import http.server
+import json
+import multiprocessing
+import random
+import re
+import resource
+import selectors
+import socket
+import socketserver
+import threading
+import time
+
+from collector import codec
+
+INTERFACE_TABLE = '1.3.6.1.2.1.2.2.1'
+HOST_TAG = re.compile(r',host=((?:[^,\\ ]|\\.)+)')
+
+
+class Agents:
+    """
+    Many SNMPv2c agents, each listening on its own localhost port and
+    all served by a single thread. Every GET is answered with integer
+    values after configured latency unless it is lost. Agents have
+    interface tables of different sizes, rows beyond agent's table are
+    answered with noSuchInstance. Only GetRequest PDUs are supported.
+    """
+    def __init__(self, agents: int, latency: float = 0, jitter: float = 0,
+                 loss: float = 0, interfaces: int = 0, spread: int = 0,
+                 seed: int = 0) -> None:
+        """
+        Constructor of new Agents objects.
+
+        :param agents: number of agents
+        :param latency: mean response delay in seconds
+        :param jitter: maximal deviation from latency in seconds
+        :param loss: probability of request being left unanswered
+        :param interfaces: number of rows of the biggest interface table
+        :param spread: agents have from interfaces - spread to
+            interfaces rows
+        :param seed: seed of latency and loss generator
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.dropped = 0
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        self.table_sizes = {}
+        self.responses = []
+        self._sequence = 0
+
+        _soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        for index in range(agents):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('127.0.0.1', 0))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ)
+            self.sockets.append(sock)
+            digest = hashlib.md5(str(index).encode()).digest()
+            self.table_sizes[sock] = interfaces - digest[0] % (spread + 1)
+
+    @property
+    def ports(self) -> list:
+        """
+        :return: port of each agent
+        """
+        return [sock.getsockname()[1] for sock in self.sockets]
+
+    def respond(self, data: bytes, table_size: int) -> bytes:
+        """
+        Builds GetResponse to GetRequest message.
+
+        :param data: received datagram
+        :param table_size: number of rows of agent's interface table
+        :return: response message
+        """
+        start, _end = codec.expect(data, 0, codec.SEQUENCE)
+        _start, offset = codec.expect(data, start, codec.INTEGER)
+        _start, offset = codec.expect(data, offset, codec.OCTET_STRING)
+        # version and community are echoed as they are
+        header = data[start:offset]
+        offset, _end = codec.expect(data, offset, codec.GET_REQUEST)
+        _start, request_id_end = codec.expect(data, offset, codec.INTEGER)
+        request_id = data[offset:request_id_end]
+        _start, offset = codec.expect(data, request_id_end, codec.INTEGER)
+        _start, offset = codec.expect(data, offset, codec.INTEGER)
+        offset, end = codec.expect(data, offset, codec.SEQUENCE)
+
+        var_binds = []
+        while offset < end:
+            start, offset = codec.expect(data, offset, codec.SEQUENCE)
+            name_start, name_end = codec.expect(data, start,
+                                                codec.OBJECT_IDENTIFIER)
+            oid = codec.decode_oid(data[name_start:name_end])
+            if oid.startswith(INTERFACE_TABLE) and \
+                    int(oid.rsplit('.', 1)[1]) > table_size:
+                value = b'\x81\x00'
+            else:
+                counter = self.requests & 0x7fffffff
+                value = codec.encode_tlv(
+                    codec.COUNTER32,
+                    counter.to_bytes(counter.bit_length() // 8 + 1, 'big')
+                )
+            var_binds.append(
+                codec.encode_tlv(codec.SEQUENCE, data[start:name_end] + value)
+            )
+        pdu = codec.encode_tlv(
+            codec.GET_RESPONSE,
+            b''.join([
+                request_id, b'\x02\x01\x00\x02\x01\x00',
+                codec.encode_tlv(codec.SEQUENCE, b''.join(var_binds))
+            ])
+        )
+        return codec.encode_tlv(codec.SEQUENCE, header + pdu)
+
+    def receive(self, sock: socket.socket) -> None:
+        """
+        Reads all pending requests of an agent and schedules responses.
+
+        :param sock: agent's socket
+        """
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except BlockingIOError:
+                return
+            self.requests += 1
+            if self.random.random() < self.loss:
+                self.dropped += 1
+                continue
+            try:
+                response = self.respond(data, self.table_sizes[sock])
+            except codec.DecodeError:
+                self.dropped += 1
+                continue
+            delay = self.latency + self.random.uniform(-self.jitter,
+                                                       self.jitter)
+            self._sequence += 1
+            heapq.heappush(self.responses, (time.monotonic() + delay,
+                                            self._sequence, sock,
+                                            response, addr))
+
+    def send_due(self) -> None:
+        """
+        Sends responses whose latency has passed.
+        """
+        now = time.monotonic()
+        while self.responses and self.responses[0][0] <= now:
+            _due, _sequence, sock, response, addr = \
+                heapq.heappop(self.responses)
+            try:
+                sock.sendto(response, addr)
+            except OSError:
+                self.dropped += 1
+
+    def serve(self, conn) -> None:
+        """
+        Serves requests until stop command arrives through conn.
+
+        :param conn: control pipe end
+        """
+        self.selector.register(conn, selectors.EVENT_READ)
+        while True:
+            timeout = None
+            if self.responses:
+                timeout = max(self.responses[0][0] - time.monotonic(), 0)
+            for key, _events in self.selector.select(timeout):
+                if key.fileobj is not conn:
+                    self.receive(key.fileobj)
+                    continue
+                command = conn.recv()
+                if command == 'stop':
+                    return
+                conn.send({'requests': self.requests,
+                           'dropped': self.dropped})
+                if command == 'reset':
+                    self.requests = self.dropped = 0
+            self.send_due()
+
+
+class InfluxStub(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    InfluxDB HTTP API answering every write with success. Written
+    points, fields and distinct hosts are counted since last reset,
+    bytes are counted as received, i.e. compressed if they were.
+    """
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        """
+        Constructor of new InfluxStub objects listening on random port.
+        """
+        super().__init__(('127.0.0.1', 0), InfluxHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.writes = 0
+            self.bytes = 0
+            self.points = 0
+            self.fields = 0
+            self.hosts = set()
+            self.last_write = None
+
+    def record(self, body: bytes, size: int) -> None:
+        """
+        Counts points of a write request in line protocol.
+
+        :param body: uncompressed request body
+        :param size: size of request body as received
+        """
+        lines = body.decode().splitlines()
+        hosts = set()
+        fields = 0
+        for line in lines:
+            match = HOST_TAG.search(line)
+            if match:
+                hosts.add(match.group(1))
+            fields += line.rsplit(' ', 2)[1].count(',') + 1
+        with self.lock:
+            self.writes += 1
+            self.bytes += size
+            self.points += len(lines)
+            self.fields += fields
+            self.hosts |= hosts
+            self.last_write = time.time()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'writes': self.writes,
+                'bytes': self.bytes,
+                'points': self.points,
+                'fields': self.fields,
+                'hosts': len(self.hosts),
+                'last_write': self.last_write
+            }
+
+    def serve(self, conn) -> None:
+        """
+        Serves HTTP requests until stop command arrives through conn.
+
+        :param conn: control pipe end
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        while True:
+            command = conn.recv()
+            if command == 'stop':
+                self.shutdown()
+                return
+            conn.send(self.stats())
+            if command == 'reset':
+                self.reset()
+
+
+class InfluxHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, status: int, body: bytes = b'') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self) -> None:
+        if self.path.startswith('/ping'):
+            self.reply(204)
+        else:
+            self.reply(200, json.dumps(
+                {'results': [{'statement_id': 0}]}
+            ).encode())
+
+    def do_POST(self) -> None:
+        body = self.read_body()
+        if self.path.startswith('/write'):
+            size = len(body)
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            self.server.record(body, size)
+            self.reply(204)
+        else:
+            self.reply(200, json.dumps(
+                {'results': [{'statement_id': 0}]}
+            ).encode())
+
+
+class Service:
+    """
+    Runs Agents or InfluxStub in a child process.
+    """
+    def __init__(self, factory, *args, **kwargs) -> None:
+        """
+        Starts the child process and waits until it listens.
+
+        :param factory: Agents or InfluxStub
+        :param args: positional arguments of factory
+        :param kwargs: keyword arguments of factory
+        """
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=self.run, args=(child, factory, args, kwargs), daemon=True
+        )
+        self.process.start()
+        self.address = self.conn.recv()
+
+    @staticmethod
+    def run(conn, factory, args, kwargs) -> None:
+        service = factory(*args, **kwargs)
+        if isinstance(service, Agents):
+            conn.send(service.ports)
+        else:
+            conn.send(service.server_address[1])
+        service.serve(conn)
+
+    def command(self, command: str) -> dict:
+        """
+        :param command: 'stats' or 'reset'
+        :return: counters of the service, before reset in case of reset
+        """
+        self.conn.send(command)
+        return self.conn.recv()
+
+    def stop(self) -> None:
+        self.conn.send('stop')
+        self.process.join()
@@ -0,0 +1,93 @@
+"""
+Compares per-poll cost of SNMPv3 GET done naively, i.e. with engine and
+user built from passphrases for every poll, against pooled engines and
+precomputed master keys of collector.snmp. SNMPv2c GET of the same OIDs
+through EnginePool is measured for reference.
+"""
+import argparse
+import time
+
+from . import report, setup
+
+OIDS = ['1.3.6.1.2.1.1.{column}.0'.format(column=column)
+        for column in range(1, 7)]
+
+
+def naive(responder):
+    from pysnmp.hlapi import (SnmpEngine, UdpTransportTarget, UsmUserData,
+                              usmAesCfb128Protocol, usmHMACSHAAuthProtocol)
+
+    from collector.snmp import get_cmd
+
+    def query(oids):
+        return get_cmd(
+            SnmpEngine(),
+            UsmUserData(responder.user, responder.auth_key,
+                        responder.privacy_key,
+                        authProtocol=usmHMACSHAAuthProtocol,
+                        privProtocol=usmAesCfb128Protocol),
+            UdpTransportTarget(('127.0.0.1', responder.port)),
+            oids
+        )
+    return query
+
+
+def pooled(port, community, usm=None):
+    from collector.snmp import EnginePool, get_cmd
+    pool = EnginePool()
+
+    def query(oids):
+        with pool.session('127.0.0.1', port, community,
+                          usm=usm) as session:
+            return get_cmd(*session, oids)
+    return query
+
+
+def measure(query, polls):
+    start = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(polls):
+        error_indication, *_ = query(OIDS)
+        assert error_indication is None, error_indication
+    return (
+        (time.perf_counter() - start) / polls,
+        (time.process_time() - cpu) / polls
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--polls', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from pyasn1.type.univ import Integer
+
+    from collector.tests.utils import SnmpResponder, UsmResponder
+
+    with UsmResponder() as responder:
+        before = measure(naive(responder), args.polls)
+        datagrams = responder.requests
+        after = measure(pooled(responder.port, '', responder.usm),
+                        args.polls)
+        datagrams = (datagrams, responder.requests - datagrams)
+    with SnmpResponder(Integer, 1) as responder:
+        v2c = measure(pooled(responder.port, 'watcheye'), args.polls)
+    report(
+        'SNMP GET of {oids} OIDs, {polls} polls (wall, CPU)'.format(
+            oids=len(OIDS), polls=args.polls),
+        [
+            ('SNMPv3, new engine per poll',
+             '{0:.2f} ms, {1:.2f} ms, {2} datagrams'.format(
+                 before[0] * 1000, before[1] * 1000, datagrams[0])),
+            ('SNMPv3, EnginePool',
+             '{0:.2f} ms, {1:.2f} ms, {2} datagrams'.format(
+                 after[0] * 1000, after[1] * 1000, datagrams[1])),
+            ('SNMPv2c, EnginePool',
+             '{0:.2f} ms, {1:.2f} ms'.format(v2c[0] * 1000, v2c[1] * 1000))
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
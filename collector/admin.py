@@ -10,7 +10,27 @@ restricted_names = ['host', 'instance']
 # ------------------------------- ModelForms -------------------------------- #
 
 
-class AlwaysValidForm(forms.ModelForm):
+class WritePolicyForm(forms.ModelForm):
+    def clean_write_policy(self):
+        """
+        Replaces empty write policy with default value.
+        """
+        return self.default_if_empty('write_policy')
+
+    def clean_deadband(self):
+        """
+        Replaces empty deadband with default value.
+        """
+        return self.default_if_empty('deadband')
+
+    def default_if_empty(self, name):
+        value = self.cleaned_data[name]
+        if value is None:
+            value = self.instance._meta.get_field(name).default
+        return value
+
+
+class AlwaysValidForm(WritePolicyForm):
     """
     A workaround for inlines without change permission not returning
     all fields causing default ModelForm to complain. Data are unchanged
@@ -25,7 +45,7 @@ class AlwaysValidForm(forms.ModelForm):
         fields = '__all__'
 
 
-class ParameterCollisionForm(forms.ModelForm):
+class ParameterCollisionForm(WritePolicyForm):
     def clean(self):
         """
         Tags come from several sources: hostname, instance name,
@@ -113,6 +133,47 @@ class InstanceForm(forms.ModelForm):
         fields = '__all__'
 
 
+class HostForm(forms.ModelForm):
+    def clean(self):
+        """
+        SNMPv3 privacy requires authentication and both of them require
+        security name and passphrase of at least 8 characters (RFC 3414).
+        """
+        cleaned_data = super().clean()
+        auth_protocol = cleaned_data.get('auth_protocol')
+        privacy_protocol = cleaned_data.get('privacy_protocol')
+
+        for protocol, key in (('auth_protocol', 'auth_key'),
+                              ('privacy_protocol', 'privacy_key')):
+            if cleaned_data.get(protocol) and \
+                    len(cleaned_data.get(key, '')) < 8:
+                self.add_error(key, forms.ValidationError(
+                    message=_('Passphrase should be at least 8 characters '
+                              'long.'),
+                    code='invalid'
+                ))
+        if privacy_protocol and not auth_protocol:
+            self.add_error('privacy_protocol', forms.ValidationError(
+                message=_('Privacy requires authentication protocol.'),
+                code='invalid'
+            ))
+        if (auth_protocol or privacy_protocol) and \
+                not cleaned_data.get('security_name'):
+            self.add_error('security_name', forms.ValidationError(
+                message=_('SNMPv3 protocols require a security name.'),
+                code='invalid'
+            ))
+        return cleaned_data
+
+    class Meta:
+        model = Host
+        exclude = ['groups', 'tags']
+        widgets = {
+            'auth_key': forms.PasswordInput(render_value=True),
+            'privacy_key': forms.PasswordInput(render_value=True)
+        }
+
+
 class TagForm(forms.ModelForm):
     def clean_name(self):
         """
@@ -148,7 +209,7 @@ class TagForm(forms.ModelForm):
 class ParameterInline(admin.TabularInline):
     """
     InfluxDB does not allow to change parameter type therefore parameter
-    should not be changed.
+    should not be changed, except for the way its samples are written.
     """
 
     model = Parameter
@@ -220,6 +281,7 @@ class TagAdmin(admin.ModelAdmin):
 
 class HostAdmin(admin.ModelAdmin):
     list_display = ('name', 'ip', 'community', 'port')
+    form = HostForm
     fieldsets = [
         (
             None,
@@ -230,7 +292,16 @@ class HostAdmin(admin.ModelAdmin):
         (
             _('SNMP'),
             {
-                'fields': ['community', 'port']
+                'fields': ['community', 'port', 'timeout', 'retries',
+                           'shard']
+            }
+        ),
+        (
+            _('SNMPv3'),
+            {
+                'classes': ['collapse'],
+                'fields': ['security_name', 'auth_protocol', 'auth_key',
+                           'privacy_protocol', 'privacy_key']
             }
         )
     ]
@@ -251,13 +322,13 @@ class GroupAdmin(admin.ModelAdmin):
         (
             None,
             {
-                'fields': ['name', 'type', 'description']
+                'fields': ['name', 'type', 'description', 'precision']
             }
         ),
         (
             _('SNMP'),
             {
-                'fields': ['oid']
+                'fields': ['oid', 'bulk', 'interval']
             }
         )
     ]
@@ -0,0 +1,317 @@
+import asyncio
+import ipaddress
+import random
+import socket
+import typing
+
+from celery.utils.log import get_task_logger
+from pyasn1.codec.ber import decoder, encoder
+from pyasn1.error import PyAsn1Error
+from pyasn1.type.univ import Null
+from pysnmp.proto import api
+
+from . import codec
+from .constants import SNMP_TOO_BIG
+
+SNMP_CONCURRENCY = 256
+SNMP_TIMEOUT = 1.0
+SNMP_RETRIES = 5
+REQUEST_ID_MASK = 0x7fffffff
+logger = get_task_logger(__name__)
+p_mod = api.protoModules[api.protoVersion2c]
+
+t_address = typing.Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+# IP address, port, community, OIDs optionally followed by timeout and
+# retries overriding these of the poller
+t_request = typing.Tuple[str, int, str, typing.Sequence[str]]
+
+
+def encode_pysnmp(request_id: int, community: str,
+                  parameters: typing.Sequence[str]) -> bytes:
+    """
+    Encodes GetRequest message with pysnmp.
+
+    :param request_id: request-id of PDU
+    :param community: community name
+    :param parameters: list of OIDs
+    :return: message ready to be sent
+    """
+    pdu = p_mod.GetRequestPDU()
+    p_mod.apiPDU.setDefaults(pdu)
+    p_mod.apiPDU.setRequestID(pdu, request_id)
+    p_mod.apiPDU.setVarBinds(
+        pdu, [(oid, p_mod.Null('')) for oid in parameters]
+    )
+    message = p_mod.Message()
+    p_mod.apiMessage.setDefaults(message)
+    p_mod.apiMessage.setCommunity(message, community)
+    p_mod.apiMessage.setPDU(message, pdu)
+    return encoder.encode(message)
+
+
+def decode_pysnmp(data: bytes) -> codec.t_response:
+    """
+    Decodes response message with pysnmp.
+
+    :param data: received datagram
+    :return: same as codec.decode_response
+    """
+    message, _ = decoder.decode(data, asn1Spec=p_mod.Message())
+    pdu = p_mod.apiMessage.getPDU(message)
+    return (
+        int(p_mod.apiPDU.getRequestID(pdu)),
+        int(p_mod.apiPDU.getErrorStatus(pdu)),
+        int(p_mod.apiPDU.getErrorIndex(pdu)),
+        [
+            (str(name), value._value)
+            for name, value in p_mod.apiPDU.getVarBinds(pdu)
+            if not isinstance(value, Null)
+        ]
+    )
+
+
+def encode_builtin(request_id: int, community: str,
+                   parameters: typing.Sequence[str]) -> bytes:
+    """
+    Encodes GetRequest message with built-in codec falling back to
+    pysnmp for OIDs the codec does not support.
+
+    :param request_id: request-id of PDU
+    :param community: community name
+    :param parameters: list of OIDs
+    :return: message ready to be sent
+    """
+    try:
+        return codec.encode_get(request_id, community, parameters)
+    except ValueError:
+        return encode_pysnmp(request_id, community, parameters)
+
+
+def decode_builtin(data: bytes) -> codec.t_response:
+    """
+    Decodes response message with built-in codec falling back to pysnmp
+    for messages the codec does not support.
+
+    :param data: received datagram
+    :return: same as codec.decode_response
+    """
+    try:
+        return codec.decode_response(data)
+    except codec.DecodeError:
+        return decode_pysnmp(data)
+
+
+class SnmpProtocol(asyncio.DatagramProtocol):
+    """
+    Datagram protocol shared by all requests of an AsyncPoller. Incoming
+    responses are matched with awaiting requests by request-id.
+    """
+    def __init__(self, pending: dict,
+                 decode: typing.Callable[[bytes], codec.t_response] =
+                 decode_pysnmp) -> None:
+        """
+        Constructor of new SnmpProtocol objects.
+
+        :param pending: maps request-id to awaiting future and address
+        :param decode: response message decoder
+        """
+        self.pending = pending
+        self.decode = decode
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        """
+        Decodes received message and resolves matching future with
+        error-status and samples of the response. Unknown, late and
+        malformed responses are dropped.
+
+        :param data: received datagram
+        :param addr: sender's address
+        """
+        try:
+            request_id, error_status, _error_index, samples = \
+                self.decode(data)
+        except PyAsn1Error:
+            logger.warning('Malformed SNMP response from %(addr)s.',
+                           {'addr': addr[0]})
+            return
+        try:
+            future, ip, port = self.pending[request_id]
+        except KeyError:
+            return
+        if future.done() or addr[1] != port or \
+                ipaddress.ip_address(addr[0]) != ip:
+            return
+        future.set_result((error_status, samples))
+
+    def error_received(self, exc: Exception) -> None:
+        logger.warning('SNMP transport error: %(error)s.', {'error': exc})
+
+
+class AsyncPoller:
+    """
+    Fires SNMPv2c GET queries at many hosts at once. All requests share
+    one UDP socket per address family and theirs responses are told
+    apart by request-id, so a single process waits on hundreds of round
+    trips simultaneously.
+    """
+    def __init__(self, concurrency: int = SNMP_CONCURRENCY,
+                 timeout: float = SNMP_TIMEOUT,
+                 retries: int = SNMP_RETRIES,
+                 builtin_codec: bool = False) -> None:
+        """
+        Constructor of new AsyncPoller objects.
+
+        :param concurrency: maximal number of requests awaiting response
+        :param timeout: seconds to wait for response before resending
+        :param retries: number of resends before giving up
+        :param builtin_codec: encode and decode messages with built-in
+            codec instead of pysnmp
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        if builtin_codec:
+            self.encode, self.decode = encode_builtin, decode_builtin
+        else:
+            self.encode, self.decode = encode_pysnmp, decode_pysnmp
+        self.pending = {}
+        self._transports = {}
+        self._request_id = random.randrange(REQUEST_ID_MASK)
+
+    def next_request_id(self) -> int:
+        """
+        Request-ids are unique among pending requests of the poller.
+
+        :return: next request-id
+        """
+        while True:
+            self._request_id = (self._request_id + 1) & REQUEST_ID_MASK
+            if self._request_id not in self.pending:
+                return self._request_id
+
+    async def transport(self, ip: t_address):
+        """
+        Lazily opens UDP socket of address family matching given IP.
+
+        :param ip: destination IP address
+        :return: datagram transport
+        """
+        family = socket.AF_INET if ip.version == 4 else socket.AF_INET6
+        try:
+            return self._transports[family]
+        except KeyError:
+            pass
+        local_addr = ('0.0.0.0', 0) if ip.version == 4 else ('::', 0)
+        loop = asyncio.get_event_loop()
+        transport, _protocol = await loop.create_datagram_endpoint(
+            lambda: SnmpProtocol(self.pending, self.decode),
+            local_addr=local_addr,
+            family=family
+        )
+        self._transports[family] = transport
+        return transport
+
+    def close(self) -> None:
+        """
+        Closes all sockets opened by the poller.
+        """
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+
+    async def get(self, ip: str, port: int, community: str,
+                  parameters: typing.Sequence[str], timeout: float = None,
+                  retries: int = None) -> typing.Optional[list]:
+        """
+        Sends single GET request and awaits the response resending it
+        on timeout. Request answered with tooBig error is split in
+        halves which are sent separately.
+
+        :param ip: host IP address
+        :param port: SNMP port number
+        :param community: community name
+        :param parameters: list of OIDs
+        :param timeout: overrides poller's timeout if not None
+        :param retries: overrides poller's retries if not None
+        :return: samples as list of pairs: OID and its collected value
+            or None if host did not respond
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if retries is None:
+            retries = self.retries
+        address = ipaddress.ip_address(ip)
+        transport = await self.transport(address)
+        request_id = self.next_request_id()
+
+        data = self.encode(request_id, community, parameters)
+
+        future = asyncio.get_event_loop().create_future()
+        self.pending[request_id] = future, address, port
+        try:
+            for _attempt in range(retries + 1):
+                transport.sendto(data, (ip, port))
+                try:
+                    response = await asyncio.wait_for(
+                        asyncio.shield(future), timeout
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                break
+            else:
+                logger.warning(
+                    'No SNMP response from %(ip)s:%(port)s.',
+                    {'ip': ip, 'port': port}
+                )
+                return None
+        finally:
+            del self.pending[request_id]
+
+        error_status, samples = response
+        if error_status == SNMP_TOO_BIG and len(parameters) > 1:
+            half = len(parameters) // 2
+            results = await asyncio.gather(
+                self.get(ip, port, community, parameters[:half], timeout,
+                         retries),
+                self.get(ip, port, community, parameters[half:], timeout,
+                         retries)
+            )
+            if None in results:
+                return None
+            return results[0] + results[1]
+        return samples
+
+    async def gather(self, requests: typing.Iterable[t_request]) -> list:
+        """
+        Sends all requests keeping at most concurrency of them awaiting
+        response at the same time.
+
+        :param requests: requests as tuples matching get arguments
+        :return: results in order of requests
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(request):
+            async with semaphore:
+                return await self.get(*request)
+
+        try:
+            return await asyncio.gather(
+                *[limited(request) for request in requests]
+            )
+        finally:
+            self.close()
+
+    def poll(self, requests: typing.Iterable[t_request]) -> list:
+        """
+        Synchronous entry point running gather in a new event loop.
+
+        :param requests: requests as tuples matching get arguments
+        :return: results in order of requests
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.gather(requests))
+        finally:
+            loop.close()
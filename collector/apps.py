@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.core.checks import register
 from django.utils.translation import gettext_lazy as _
 
 
 class CollectorConfig(AppConfig):
     name = 'collector'
     verbose_name = _('collector')
+
+    def ready(self) -> None:
+        from . import checks, signals
+        register(checks.check_cache)
+        register(checks.check_sample_batch)
+        signals.connect()
@@ -0,0 +1,150 @@
+"""
+Compact columnar batch of samples passed through Celery broker and
+result backend instead of lists of pairs or triples repeating the same
+long identifiers. Samples are grouped into columns by OID prefix (or
+parameter name), which is kept once, and the whole batch is serialized
+with msgpack. Columns are built and read back without per sample work
+other than splitting OIDs, the rest is left to msgpack's C extension.
+"""
+import itertools
+import typing
+
+import msgpack
+
+VERSION = 2
+SNMP = True
+HTTP = False
+
+
+class SampleBatch:
+    """
+    Samples of a single host. SNMP sample is identified by OID split
+    into its prefix, common to the column, and last arc. HTTP sample is
+    identified by parameter name, common to the column, and instance
+    name. Values keep theirs types as far as msgpack does (integers,
+    floats, booleans, strings, bytes and None).
+    """
+    def __init__(self, mode: bool = SNMP) -> None:
+        """
+        Constructor of new SampleBatch objects.
+
+        :param mode: origin of samples: SNMP or HTTP
+        """
+        self.mode = mode
+        # per column: OID prefix including its last dot or parameter name
+        self.names = []
+        # per column: last arcs of OIDs or instance names
+        self.suffixes = []
+        # per column: values of samples
+        self.columns = []
+        # maps column's key to its suffixes and values
+        self._keys = {}
+
+    def __len__(self) -> int:
+        """
+        :return: number of samples
+        """
+        return sum(len(column) for column in self.columns)
+
+    def _column(self, key: typing.Optional[str], name: str,
+                suffixes: list, column: list) -> typing.Tuple[list, list]:
+        self.names.append(name)
+        self.suffixes.append(suffixes)
+        self.columns.append(column)
+        self._keys[key] = suffixes, column
+        return suffixes, column
+
+    def extend(self, samples: typing.Iterable[tuple]) -> 'SampleBatch':
+        """
+        Appends samples of the batch's mode.
+
+        :param samples: pairs of OID and value or triples of parameter
+            name, instance name and value
+        :return: the batch itself
+        """
+        keys = self._keys
+        if self.mode == HTTP:
+            for parameter, instance, value in samples:
+                try:
+                    suffixes, column = keys[parameter]
+                except KeyError:
+                    suffixes, column = self._column(parameter, parameter,
+                                                    [], [])
+                suffixes.append(instance)
+                column.append(value)
+            return self
+        for oid, value in samples:
+            prefix, dot, arc = oid.rpartition('.')
+            # OIDs without dot share column of empty prefix
+            key = prefix if dot else None
+            try:
+                suffixes, column = keys[key]
+            except KeyError:
+                suffixes, column = self._column(key, prefix + dot, [], [])
+            suffixes.append(arc)
+            column.append(value)
+        return self
+
+    def values(self) -> typing.Iterator[typing.Any]:
+        """
+        :return: values of samples in order of iteration
+        """
+        return itertools.chain.from_iterable(self.columns)
+
+    def __iter__(self) -> typing.Iterator[tuple]:
+        """
+        :return: pairs of OID and value or triples of parameter name,
+            instance name and value, column by column in order of
+            appending
+        """
+        columns = zip(self.names, self.suffixes, self.columns)
+        if self.mode == HTTP:
+            return itertools.chain.from_iterable(
+                zip(itertools.repeat(name), suffixes, column)
+                for name, suffixes, column in columns
+            )
+        return itertools.chain.from_iterable(
+            zip(map(name.__add__, suffixes), column)
+            for name, suffixes, column in columns
+        )
+
+    def dumps(self) -> bytes:
+        """
+        :return: batch serialized with msgpack
+        """
+        return msgpack.packb(
+            [VERSION, self.mode, self.names, self.suffixes, self.columns],
+            use_bin_type=True
+        )
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'SampleBatch':
+        """
+        :param data: batch serialized by dumps
+        :return: SampleBatch object
+        :raises ValueError: if data is not a batch of known version
+        """
+        fields = msgpack.unpackb(data, raw=False)
+        if not isinstance(fields, list) or len(fields) != 5 or \
+                fields[0] != VERSION:
+            raise ValueError('Unsupported sample batch.')
+        _version, mode, names, suffixes, columns = fields
+        batch = cls(mode)
+        for name, column_suffixes, column in zip(names, suffixes, columns):
+            if mode == HTTP:
+                key = name
+            else:
+                key = name[:-1] if name else None
+            batch._column(key, name, column_suffixes, column)
+        return batch
+
+
+def load_samples(samples: typing.Union[bytes, typing.Iterable]
+                 ) -> typing.Iterable[tuple]:
+    """
+    :param samples: serialized SampleBatch or samples themselves
+    :return: samples as pairs or triples
+    """
+    if isinstance(samples, (bytes, bytearray)):
+        return SampleBatch.loads(samples)
+    return samples
@@ -0,0 +1,85 @@
+"""
+System checks of settings collector depends on.
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+DUMMY_CACHE = 'django.core.cache.backends.dummy.DummyCache'
+LOCAL_MEMORY_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+SAMPLE_BATCH_SERIALIZER = 'msgpack'
+
+
+def cache_backend() -> str:
+    """
+    :return: dotted path of default Django cache backend
+    """
+    return settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+
+
+def check_cache(app_configs=None, **kwargs) -> list:
+    """
+    Checks if default Django cache is shared by processes. Configuration
+    version stamp, learned chunk sizes, hosts' health and last written
+    values are kept there, so with a cache local to a process changes
+    made in admin never reach workers.
+
+    :param app_configs: ignored, checks are not bound to applications
+    :param kwargs: other arguments of the check
+    :return: list of errors and warnings
+    """
+    backend = cache_backend()
+    if backend == DUMMY_CACHE:
+        return [checks.Error(
+            'Collector requires working Django cache.',
+            hint='Configure CACHES with a shared backend, e.g. Redis or '
+                 'Memcached.',
+            id='collector.E001'
+        )]
+    if backend == LOCAL_MEMORY_CACHE:
+        return [checks.Warning(
+            'Django cache is local to a process, so workers notice '
+            'configuration changes made by other processes only after '
+            'CONFIG_MAX_AGE seconds.',
+            hint='Configure CACHES with a shared backend, e.g. Redis or '
+                 'Memcached, unless the collector runs in a single '
+                 'process.',
+            id='collector.W001'
+        )]
+    return []
+
+
+def check_sample_batch(app_configs=None, **kwargs) -> list:
+    """
+    Checks if Celery serializes results with msgpack and accepts it
+    when SAMPLE_BATCH setting is enabled. Batches are bytes, which JSON
+    carries base64 encoded, so they would take more space than lists of
+    samples they replace.
+
+    :param app_configs: ignored, checks are not bound to applications
+    :param kwargs: other arguments of the check
+    :return: list of errors
+    """
+    if not getattr(settings, 'SAMPLE_BATCH', False):
+        return []
+    errors = []
+    serializer = getattr(settings, 'CELERY_RESULT_SERIALIZER', 'json')
+    if serializer != SAMPLE_BATCH_SERIALIZER:
+        errors.append(checks.Error(
+            'SAMPLE_BATCH requires results serialized with msgpack.',
+            hint="Set CELERY_RESULT_SERIALIZER = 'msgpack'.",
+            id='collector.E002'
+        ))
+    accept_content = getattr(settings, 'CELERY_ACCEPT_CONTENT', ['json'])
+    result_accept_content = getattr(settings,
+                                    'CELERY_RESULT_ACCEPT_CONTENT',
+                                    None) or accept_content
+    if SAMPLE_BATCH_SERIALIZER not in accept_content or \
+            SAMPLE_BATCH_SERIALIZER not in result_accept_content:
+        errors.append(checks.Error(
+            'SAMPLE_BATCH requires msgpack to be accepted by workers.',
+            hint="Add 'msgpack' to CELERY_ACCEPT_CONTENT (and "
+                 'CELERY_RESULT_ACCEPT_CONTENT if set).',
+            id='collector.E003'
+        ))
+    return errors
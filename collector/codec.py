@@ -0,0 +1,257 @@
+"""
+Minimal BER codec of SNMPv2c GetRequest and GetResponse messages.
+
+It handles only what polling needs: numeric OIDs in requests and
+primitive SNMPv2 types in responses. Anything else raises DecodeError,
+so callers are expected to fall back to pysnmp.
+"""
+import functools
+import typing
+
+SNMP_VERSION_2C = 1
+OBJECT_CACHE_SIZE = 65536
+
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIME_TICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+GET_REQUEST = 0xa0
+GET_RESPONSE = 0xa2
+
+SIGNED = {INTEGER}
+UNSIGNED = {COUNTER32, GAUGE32, TIME_TICKS, COUNTER64}
+OCTETS = {OCTET_STRING, IP_ADDRESS, OPAQUE}
+# values pysnmp represents with subclasses of Null
+EMPTY = {NULL, NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW}
+
+# request-id, error-status, error-index, samples
+t_response = typing.Tuple[int, int, int, typing.List[tuple]]
+
+
+class DecodeError(ValueError):
+    """
+    Message is malformed or uses features the codec does not support.
+    """
+
+
+def encode_length(length: int) -> bytes:
+    """
+    :param length: number of content octets
+    :return: definite form of length octets
+    """
+    if length < 0x80:
+        return bytes((length,))
+    octets = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(octets),)) + octets
+
+
+def encode_tlv(tag: int, content: bytes) -> bytes:
+    """
+    :param tag: identifier octet
+    :param content: content octets
+    :return: encoded element
+    """
+    return bytes((tag,)) + encode_length(len(content)) + content
+
+
+def encode_integer(value: int) -> bytes:
+    """
+    :param value: signed integer
+    :return: encoded INTEGER in its shortest two's complement form
+    """
+    size = (value if value >= 0 else ~value).bit_length() // 8 + 1
+    return encode_tlv(INTEGER, value.to_bytes(size, 'big', signed=True))
+
+
+def encode_arc(arc: int) -> bytes:
+    """
+    :param arc: sub-identifier of OID
+    :return: base 128 octets with continuation bits
+    """
+    octets = [arc & 0x7f]
+    arc >>= 7
+    while arc:
+        octets.append(0x80 | arc & 0x7f)
+        arc >>= 7
+    return bytes(reversed(octets))
+
+
+@functools.lru_cache(maxsize=OBJECT_CACHE_SIZE)
+def encode_var_bind(oid: str) -> bytes:
+    """
+    Encodes var-bind of GET request, i.e. OID paired with NULL value.
+    Polled OIDs repeat every interval, so var-binds are memoized.
+
+    :param oid: dotted numeric OID
+    :return: encoded var-bind
+    """
+    arcs = [int(arc) for arc in oid.split('.')]
+    if len(arcs) < 2:
+        raise ValueError('OID {oid} is too short.'.format(oid=oid))
+    content = encode_arc(arcs[0] * 40 + arcs[1]) + b''.join(
+        encode_arc(arc) for arc in arcs[2:]
+    )
+    return encode_tlv(SEQUENCE,
+                      encode_tlv(OBJECT_IDENTIFIER, content) + b'\x05\x00')
+
+
+def encode_get(request_id: int, community: str,
+               oids: typing.Iterable[str]) -> bytes:
+    """
+    Encodes SNMPv2c GetRequest message.
+
+    :param request_id: request-id of PDU
+    :param community: community name
+    :param oids: dotted numeric OIDs
+    :return: message ready to be sent
+    """
+    var_binds = encode_tlv(SEQUENCE,
+                           b''.join(encode_var_bind(oid) for oid in oids))
+    pdu = encode_tlv(
+        GET_REQUEST,
+        encode_integer(request_id) + b'\x02\x01\x00\x02\x01\x00' + var_binds
+    )
+    return encode_tlv(SEQUENCE, b''.join([
+        encode_integer(SNMP_VERSION_2C),
+        encode_tlv(OCTET_STRING, community.encode()),
+        pdu
+    ]))
+
+
+def decode_tlv(data: bytes, offset: int) -> typing.Tuple[int, int, int]:
+    """
+    Decodes identifier and length octets of an element.
+
+    :param data: message
+    :param offset: position of the element
+    :return: tag, position of content and position past the element
+    """
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+    except IndexError:
+        raise DecodeError('Message is truncated.')
+    if tag & 0x1f == 0x1f:
+        raise DecodeError('Multi-octet tags are not supported.')
+    start = offset + 2
+    if length & 0x80:
+        size = length & 0x7f
+        if not size:
+            raise DecodeError('Indefinite length is not supported.')
+        length = int.from_bytes(data[start:start + size], 'big')
+        start += size
+    end = start + length
+    if end > len(data):
+        raise DecodeError('Message is truncated.')
+    return tag, start, end
+
+
+def expect(data: bytes, offset: int, tag: int) -> typing.Tuple[int, int]:
+    """
+    Decodes element of given tag.
+
+    :param data: message
+    :param offset: position of the element
+    :param tag: expected tag
+    :return: position of content and position past the element
+    """
+    actual, start, end = decode_tlv(data, offset)
+    if actual != tag:
+        raise DecodeError(
+            'Expected tag {expected:#x}, got {actual:#x}.'.format(
+                expected=tag, actual=actual)
+        )
+    return start, end
+
+
+def decode_oid(content: bytes) -> str:
+    """
+    :param content: content octets of OBJECT IDENTIFIER
+    :return: dotted numeric OID
+    """
+    arcs = []
+    arc = 0
+    for octet in content:
+        arc = arc << 7 | octet & 0x7f
+        if not octet & 0x80:
+            arcs.append(arc)
+            arc = 0
+    if not arcs or content[-1] & 0x80:
+        raise DecodeError('Malformed OBJECT IDENTIFIER.')
+    first = arcs[0]
+    if first < 80:
+        head = [first // 40, first % 40]
+    else:
+        head = [2, first - 80]
+    return '.'.join(str(arc) for arc in head + arcs[1:])
+
+
+def decode_value(tag: int, content: bytes):
+    """
+    Decodes value of var-bind the same way pysnmp objects hold it.
+
+    :param tag: identifier octet
+    :param content: content octets
+    :return: int, bytes, tuple of OID arcs or None for empty values
+    """
+    if tag in SIGNED:
+        return int.from_bytes(content, 'big', signed=True)
+    if tag in UNSIGNED:
+        return int.from_bytes(content, 'big')
+    if tag in OCTETS:
+        return bytes(content)
+    if tag in EMPTY:
+        return None
+    if tag == OBJECT_IDENTIFIER:
+        return tuple(int(arc) for arc in decode_oid(content).split('.'))
+    raise DecodeError('Unsupported value tag {tag:#x}.'.format(tag=tag))
+
+
+def decode_response(data: bytes) -> t_response:
+    """
+    Decodes SNMPv2c GetResponse message. Var-binds with empty values
+    (NULL, noSuchObject, noSuchInstance and endOfMibView) are left out
+    just like pysnmp's Null instances are by the pollers.
+
+    :param data: received datagram
+    :return: request-id, error-status, error-index and samples as list
+        of pairs: OID and its value
+    """
+    start, end = expect(data, 0, SEQUENCE)
+    if end != len(data):
+        raise DecodeError('Trailing octets after message.')
+    start, offset = expect(data, start, INTEGER)
+    if int.from_bytes(data[start:offset], 'big') != SNMP_VERSION_2C:
+        raise DecodeError('Only SNMPv2c messages are supported.')
+    _start, offset = expect(data, offset, OCTET_STRING)
+    offset, end = expect(data, offset, GET_RESPONSE)
+
+    header = []
+    for _field in range(3):
+        start, offset = expect(data, offset, INTEGER)
+        header.append(int.from_bytes(data[start:offset], 'big', signed=True))
+    request_id, error_status, error_index = header
+
+    offset, end = expect(data, offset, SEQUENCE)
+    samples = []
+    while offset < end:
+        start, offset = expect(data, offset, SEQUENCE)
+        start, name_end = expect(data, start, OBJECT_IDENTIFIER)
+        oid = decode_oid(data[start:name_end])
+        tag, start, value_end = decode_tlv(data, name_end)
+        if value_end != offset:
+            raise DecodeError('Malformed var-bind.')
+        value = decode_value(tag, data[start:value_end])
+        if value is not None:
+            samples.append((oid, value))
+    return request_id, error_status, error_index, samples
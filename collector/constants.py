@@ -5,3 +5,6 @@ OID_MAX_LENGTH = 64
 EPOCH = timezone.datetime(1970, 1, 1)
 INFLUXDB_PORT = 8086
 INFLUXDB_DATABASE = 'watcheye'
+INFLUXDB_RETENTION_POLICY = 'watcheye'
+# error-status of PDU (RFC 1905)
+SNMP_TOO_BIG = 1
@@ -0,0 +1,94 @@
+"""
+Change-only writes of samples. Last written value of every sample of
+a parameter which is not written always is kept in Django cache for
+heartbeat seconds, so the sample is written again once it changes
+enough or its last value expires. Configure CACHES with a shared backend
+to let workers of all hosts see the same values.
+"""
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Parameter
+
+LAST_VALUE_KEY = 'collector:last-value:{host}:{oid}'
+INFLUXDB_HEARTBEAT = 3600
+NUMERIC_TYPES = (Parameter.FLOAT, Parameter.INTEGER)
+_missing = object()
+
+
+def changed(parameter: Parameter, last: typing.Any,
+            value: typing.Any) -> bool:
+    """
+    :param parameter: parameter of the sample
+    :param last: last written value of the sample
+    :param value: current value of the sample
+    :return: whether the value is worth writing according to write policy
+        of the parameter, deadband applies to numeric parameters only
+    """
+    policy = parameter.write_policy
+    if policy == Parameter.ALWAYS:
+        return True
+    if policy == Parameter.ON_CHANGE or \
+            parameter.type not in NUMERIC_TYPES:
+        return value != last
+    try:
+        difference = abs(value - last)
+    except TypeError:
+        return True
+    if policy == Parameter.RELATIVE_DEADBAND:
+        return difference > abs(last) * parameter.deadband / 100
+    return difference > parameter.deadband
+
+
+class LastValues:
+    """
+    Last written values of samples of a host, fetched from cache at once
+    and stored back at once.
+    """
+    def __init__(self, host: str, oids: typing.Iterable[str]) -> None:
+        """
+        Constructor of new LastValues objects.
+
+        :param host: host name
+        :param oids: identifiers of samples subject to write policies
+        """
+        self.host = host
+        keys = {LAST_VALUE_KEY.format(host=host, oid=oid): oid
+                for oid in oids}
+        self._values = {
+            keys[key]: value
+            for key, value in (cache.get_many(keys) if keys else {}).items()
+        }
+        # maps heartbeat to written values of samples by theirs keys
+        self._written = {}
+
+    def changed(self, parameter: Parameter, oid: str,
+                value: typing.Any) -> bool:
+        """
+        Decides whether sample is to be written and remembers it if so.
+
+        :param parameter: parameter of the sample
+        :param oid: identifier of the sample
+        :param value: current value of the sample
+        :return: whether the value is worth writing
+        """
+        last = self._values.get(oid, _missing)
+        if last is not _missing and not changed(parameter, last, value):
+            return False
+        heartbeat = parameter.heartbeat or \
+            getattr(settings, 'INFLUXDB_HEARTBEAT', INFLUXDB_HEARTBEAT)
+        key = LAST_VALUE_KEY.format(host=self.host, oid=oid)
+        self._written.setdefault(heartbeat, {})[key] = value
+        self._values[oid] = value
+        return True
+
+    def save(self) -> None:
+        """
+        Stores values written since the last save, each until its
+        heartbeat expires.
+        """
+        for heartbeat, values in self._written.items():
+            cache.set_many(values, heartbeat)
+        self._written = {}
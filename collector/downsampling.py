@@ -0,0 +1,143 @@
+"""
+Downsampling of stored points into retention policies of coarser
+resolution by InfluxDB continuous queries, one per measurement (group)
+and tier. Numeric fields are rolled up into theirs mean, min and max.
+"""
+import hashlib
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from influxdb import InfluxDBClient
+from influxdb.line_protocol import quote_ident
+
+from .constants import INFLUXDB_DATABASE, INFLUXDB_RETENTION_POLICY
+from .models import Group, Parameter
+
+# (interval, duration) of retention policy of every tier
+INFLUXDB_DOWNSAMPLING = ()
+NUMERIC_TYPES = (Parameter.FLOAT, Parameter.INTEGER)
+AGGREGATES = ('mean', 'min', 'max')
+# continuous queries named with other prefix are left alone by sync
+PREFIX = 'collector'
+SYNC_KEY = 'collector:downsampling-sync'
+SYNC_DELAY = 5
+
+t_tier = typing.Tuple[str, str]
+
+
+def tiers() -> typing.List[t_tier]:
+    """
+    :return: intervals and durations of downsampling tiers, finest first
+    """
+    return list(getattr(settings, 'INFLUXDB_DOWNSAMPLING',
+                        INFLUXDB_DOWNSAMPLING))
+
+
+def tier_policy(policy: str, interval: str) -> str:
+    """
+    :param policy: retention policy of raw points
+    :param interval: interval of tier
+    :return: retention policy of tier
+    """
+    return '{policy}_{interval}'.format(policy=policy, interval=interval)
+
+
+def continuous_queries(database: str = None, policy: str = None
+                       ) -> typing.Dict[str, str]:
+    """
+    Builds continuous queries of all groups having numeric parameters.
+    Name of a query carries digest of its statement, so changed queries
+    have new names.
+
+    :param database: InfluxDB database, INFLUXDB_DATABASE if None
+    :param policy: retention policy of raw points,
+        INFLUXDB_RETENTION_POLICY if None
+    :return: maps names of continuous queries to theirs select statements
+    """
+    database = database or getattr(settings, 'INFLUXDB_DATABASE',
+                                   INFLUXDB_DATABASE)
+    policy = policy or getattr(settings, 'INFLUXDB_RETENTION_POLICY',
+                               INFLUXDB_RETENTION_POLICY)
+    queries = {}
+    for group in Group.objects.prefetch_related('parameters').order_by('name'):
+        fields = sorted(
+            parameter.name for parameter in group.parameters.all()
+            if parameter.type in NUMERIC_TYPES and not parameter.indexing
+        )
+        if not fields:
+            continue
+        source = policy
+        for index, (interval, _duration) in enumerate(tiers()):
+            target = tier_policy(policy, interval)
+            # every tier but the first one rolls up aggregates of previous
+            # tier, so e.g. max of an hour is max of its 5 minute maxima
+            aggregates = ', '.join(
+                '{aggregate}({field}) AS {alias}'.format(
+                    aggregate=aggregate,
+                    field=quote_ident(
+                        aggregate + '_' + field if index else field
+                    ),
+                    alias=quote_ident(aggregate + '_' + field)
+                )
+                for field in fields for aggregate in AGGREGATES
+            )
+            select = (
+                'SELECT {aggregates} INTO {target} FROM {source} '
+                'GROUP BY time({interval}), *'
+            ).format(
+                aggregates=aggregates,
+                target='.'.join(map(quote_ident,
+                                    (database, target, group.name))),
+                source='.'.join(map(quote_ident,
+                                    (database, source, group.name))),
+                interval=interval
+            )
+            name = '{prefix}_{group}_{interval}_{digest}'.format(
+                prefix=PREFIX, group=group.name, interval=interval,
+                digest=hashlib.md5(select.encode()).hexdigest()[:8]
+            )
+            queries[name] = select
+            source = target
+    return queries
+
+
+def sync(client: InfluxDBClient, database: str = None, policy: str = None
+         ) -> typing.Tuple[typing.List[str], typing.List[str]]:
+    """
+    Creates missing continuous queries and drops the ones of removed or
+    changed groups and parameters.
+
+    :param client: InfluxDB client of user with write privilege
+    :param database: InfluxDB database, INFLUXDB_DATABASE if None
+    :param policy: retention policy of raw points,
+        INFLUXDB_RETENTION_POLICY if None
+    :return: names of created and dropped continuous queries
+    """
+    database = database or getattr(settings, 'INFLUXDB_DATABASE',
+                                   INFLUXDB_DATABASE)
+    queries = continuous_queries(database, policy)
+    existing = {
+        query['name']
+        for databases in client.get_list_continuous_queries()
+        for query in databases.get(database, [])
+        if query['name'].startswith(PREFIX + '_')
+    }
+    dropped = sorted(existing - set(queries))
+    created = sorted(set(queries) - existing)
+    for name in dropped:
+        client.drop_continuous_query(name, database)
+    for name in created:
+        client.create_continuous_query(name, queries[name], database)
+    return created, dropped
+
+
+def schedule_sync() -> None:
+    """
+    Schedules sync of continuous queries a few seconds ahead, unless it
+    has been scheduled already, so saving a group with all its parameters
+    syncs them once.
+    """
+    from .tasks import sync_continuous_queries
+    if cache.add(SYNC_KEY, True, SYNC_DELAY * 10):
+        sync_continuous_queries.apply_async(countdown=SYNC_DELAY)
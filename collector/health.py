@@ -0,0 +1,125 @@
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import scheduling
+
+SNMP_BREAKER_THRESHOLD = 3
+SNMP_BREAKER_MAX_BACKOFF = 3600
+HEALTH_KEY = 'collector:health:{ip}:{port}'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def breaker_enabled() -> bool:
+    """
+    :return: True if polling of dead hosts is to be backed off
+    """
+    return getattr(settings, 'SNMP_BREAKER', False)
+
+
+def states(endpoints: typing.Iterable[typing.Tuple[str, int]]) -> dict:
+    """
+    Looks health of many endpoints up at once. Endpoints which were
+    never polled are missing from the result.
+
+    :param endpoints: pairs of IP address and port
+    :return: maps endpoint to its health state
+    """
+    keys = {
+        HEALTH_KEY.format(ip=ip, port=port): (ip, port)
+        for ip, port in endpoints
+    }
+    return {
+        keys[key]: state
+        for key, state in cache.get_many(keys.keys()).items()
+    }
+
+
+def circuit(state: typing.Optional[dict], now: float = None) -> str:
+    """
+    Tells whether endpoint is to be polled normally (closed circuit),
+    skipped (open circuit) or probed with a single query (half-open
+    circuit, backoff has just expired).
+
+    :param state: health state of endpoint or None
+    :param now: current timestamp, defaults to time.time()
+    :return: one of CLOSED, OPEN and HALF_OPEN
+    """
+    if not state or state['retry_at'] is None:
+        return CLOSED
+    if now is None:
+        now = time.time()
+    return OPEN if now < state['retry_at'] else HALF_OPEN
+
+
+def record(ip: str, port: int, answered: bool) -> None:
+    """
+    Records outcome of polling endpoint with SNMP_BREAKER setting
+    enabled, health of endpoints is not tracked otherwise.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    :param answered: whether the endpoint answered any query
+    """
+    if not breaker_enabled():
+        return
+    if answered:
+        record_success(ip, port)
+    else:
+        record_failure(ip, port)
+
+
+def record_success(ip: str, port: int) -> None:
+    """
+    Closes the circuit of endpoint which answered a query by forgetting
+    its health state. Healthy endpoints have no state, so successes
+    write to cache only when endpoint recovers.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    """
+    key = HEALTH_KEY.format(ip=ip, port=port)
+    if cache.get(key) is not None:
+        cache.delete(key)
+
+
+def record_failure(ip: str, port: int) -> dict:
+    """
+    Counts failed polling cycles of endpoint, failed queries of the same
+    cycle (i.e. within half of SNMP interval) count once. Once SNMP_
+    BREAKER_THRESHOLD of them is reached the circuit opens for an
+    interval, failures of open circuit are ignored and every failed
+    probe of half-open circuit doubles the backoff up to SNMP_BREAKER_
+    MAX_BACKOFF seconds.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    :return: updated health state
+    """
+    key = HEALTH_KEY.format(ip=ip, port=port)
+    now = time.time()
+    state = cache.get(key) or {'failures': 0, 'retry_at': None,
+                               'failed_at': None}
+    if circuit(state, now) == OPEN:
+        return state
+    failed_at = state.get('failed_at')
+    if state['retry_at'] is None and failed_at is not None and \
+            now - failed_at < scheduling.interval() / 2:
+        return state
+    state['failures'] += 1
+    state['failed_at'] = now
+    threshold = getattr(settings, 'SNMP_BREAKER_THRESHOLD',
+                        SNMP_BREAKER_THRESHOLD)
+    if state['failures'] >= threshold:
+        maximal = getattr(settings, 'SNMP_BREAKER_MAX_BACKOFF',
+                          SNMP_BREAKER_MAX_BACKOFF)
+        exponent = min(state['failures'] - threshold, 32)
+        backoff = min(scheduling.interval() * 2 ** exponent, maximal)
+        state['retry_at'] = now + backoff
+    cache.set(key, state, None)
+    return state
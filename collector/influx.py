@@ -0,0 +1,356 @@
+import gzip
+import os
+import threading
+import typing
+
+import requests
+from celery import signals
+from celery.utils.log import get_logger
+from django.conf import settings
+from influxdb import InfluxDBClient
+
+from .constants import INFLUXDB_DATABASE, INFLUXDB_PORT
+from .lineprotocol import LineBuffer
+
+INFLUXDB_POOL_SIZE = 10
+INFLUXDB_BUFFER_MAX_POINTS = 5000
+INFLUXDB_BUFFER_MAX_BYTES = 1048576
+INFLUXDB_BUFFER_MAX_LATENCY = 1.0
+INFLUXDB_GZIP_LEVEL = 6
+logger = get_logger(__name__)
+
+# username, password, database
+t_client_key = typing.Tuple[str, str, typing.Optional[str]]
+
+
+class ClientPool:
+    """
+    Process scoped InfluxDB clients, one per set of credentials. Every
+    client keeps a pool of keep-alive HTTP connections, so writes do not
+    pay for TCP (and TLS) handshake each. Clients are shared by threads,
+    which is safe as long as nobody switches theirs database or user.
+
+    Pool notices being inherited by a forked process (e.g. Celery's
+    prefork pool) and starts over instead of sharing connections with
+    its parent.
+    """
+    def __init__(self) -> None:
+        """
+        Constructor of new ClientPool objects.
+        """
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._clients = {}
+
+    def client(self, username: str = None, password: str = None,
+               database: typing.Optional[str] = '') -> InfluxDBClient:
+        """
+        Looks client of given credentials up creating it if necessary.
+
+        :param username: InfluxDB user, INFLUXDB_USERNAME if None
+        :param password: user's password, INFLUXDB_PASSWORD if None
+        :param database: default database of the client, INFLUXDB_DATABASE
+            if empty, none if None
+        :return: shared client
+        """
+        key = self._key(username, password, database)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                return self._clients[key]
+            except KeyError:
+                pass
+        client = self._create(*key)
+        with self._lock:
+            return self._clients.setdefault(key, client)
+
+    def discard(self, client: InfluxDBClient) -> None:
+        """
+        Closes client, e.g. after a connection error, so the next call of
+        client builds a new one.
+
+        :param client: client returned by client
+        """
+        with self._lock:
+            for key, pooled in list(self._clients.items()):
+                if pooled is client:
+                    del self._clients[key]
+        client.close()
+
+    def close(self) -> None:
+        """
+        Closes all clients of the pool.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._reset()
+        for client in clients:
+            client.close()
+
+    @staticmethod
+    def _key(username: str, password: str,
+             database: typing.Optional[str]) -> t_client_key:
+        if username is None:
+            username = settings.INFLUXDB_USERNAME
+        if password is None:
+            password = settings.INFLUXDB_PASSWORD
+        if database == '':
+            database = getattr(settings, 'INFLUXDB_DATABASE',
+                               INFLUXDB_DATABASE)
+        return username, password, database
+
+    @staticmethod
+    def _create(username: str, password: str,
+                database: typing.Optional[str]) -> InfluxDBClient:
+        return InfluxDBClient(
+            host=settings.INFLUXDB_HOST,
+            port=getattr(settings, 'INFLUXDB_PORT', INFLUXDB_PORT),
+            username=username,
+            password=password,
+            database=database,
+            pool_size=getattr(settings, 'INFLUXDB_POOL_SIZE',
+                              INFLUXDB_POOL_SIZE)
+        )
+
+
+pool = ClientPool()
+
+
+class TrafficCounter:
+    """
+    Process wide totals of line protocol written by write_lines, before
+    and after compression, to weigh bandwidth saved by compression
+    against its CPU time.
+    """
+    def __init__(self) -> None:
+        """
+        Constructor of new TrafficCounter objects.
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.writes = 0
+            self.bytes = 0
+            self.sent_bytes = 0
+
+    def add(self, size: int, sent_size: int) -> None:
+        """
+        :param size: size of line protocol in bytes
+        :param sent_size: size of request body, compressed or not
+        """
+        with self._lock:
+            self.writes += 1
+            self.bytes += size
+            self.sent_bytes += sent_size
+
+    def totals(self) -> typing.Dict[str, int]:
+        """
+        :return: number of writes and bytes and sent bytes written by them
+        """
+        with self._lock:
+            return {
+                'writes': self.writes,
+                'bytes': self.bytes,
+                'sent_bytes': self.sent_bytes
+            }
+
+
+traffic = TrafficCounter()
+
+
+def call(function: typing.Callable[[InfluxDBClient], typing.Any]):
+    """
+    Calls function with shared client of application user. Client which
+    failed to connect (after its own retries) is replaced with a new one
+    and the call is repeated once.
+
+    :param function: callable accepting client
+    :return: value returned by function
+    """
+    client = pool.client()
+    try:
+        return function(client)
+    except requests.exceptions.ConnectionError:
+        pool.discard(client)
+        return function(pool.client())
+
+
+def write_points(points: typing.List[dict], **kwargs) -> None:
+    """
+    Writes points with shared client of application user.
+
+    :param points: points as accepted by InfluxDBClient.write_points
+    :param kwargs: other arguments of InfluxDBClient.write_points
+    """
+    call(lambda client: client.write_points(points, **kwargs))
+
+
+class WriteBuffer:
+    """
+    Coalesces points of many add_samples calls into few write requests.
+    Points serialized to line protocol are copied as they come and written
+    together as soon as there are max_points of them, they take
+    max_bytes or the oldest of them waits for max_latency seconds,
+    whichever comes first.
+
+    Points are written by the thread which fills the buffer up or by a
+    timer thread, so a failed write cannot be reported to the caller;
+    it is logged and its points are dropped (unless write spools them,
+    see collector.spool). Callers learn about written points through
+    callbacks called after successful writes only.
+    """
+    def __init__(self, max_points: int = INFLUXDB_BUFFER_MAX_POINTS,
+                 max_bytes: int = INFLUXDB_BUFFER_MAX_BYTES,
+                 max_latency: float = INFLUXDB_BUFFER_MAX_LATENCY,
+                 write: typing.Callable = None) -> None:
+        """
+        Constructor of new WriteBuffer objects.
+
+        :param max_points: number of points written at once
+        :param max_bytes: size of line protocol written at once
+        :param max_latency: seconds points might wait for being written
+        :param write: callable accepting newline separated points and
+            time_precision, write_lines by default
+        """
+        self.max_points = max_points
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.write = write or write_lines
+        self._lock = threading.Lock()
+        # flush returns once points of a concurrent flush are written too
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._buffers = {}
+        self._points = 0
+        self._bytes = 0
+        self._timer = None
+        # maps time precision to callbacks of its buffered points
+        self._callbacks = {}
+
+    def add(self, points: LineBuffer, time_precision: str,
+            written: typing.Callable[[], None] = None) -> None:
+        """
+        Buffers points flushing the buffer if it is full.
+
+        :param points: serialized points, free to be reused afterwards
+        :param time_precision: precision of points' time
+        :param written: callable called once points are written
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                buffer = self._buffers[time_precision]
+            except KeyError:
+                buffer = self._buffers[time_precision] = LineBuffer()
+            buffer.extend(points)
+            if written is not None:
+                self._callbacks.setdefault(time_precision, []).append(
+                    written
+                )
+            self._points += points.points
+            self._bytes += len(points)
+            full = self._points >= self.max_points or \
+                self._bytes >= self.max_bytes
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_latency, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all buffered points.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+                buffers = self._buffers
+                callbacks = self._callbacks
+                timer = self._timer
+                self._buffers = {}
+                self._callbacks = {}
+                self._points = 0
+                self._bytes = 0
+                self._timer = None
+            if timer is not None:
+                timer.cancel()
+            for time_precision, buffer in buffers.items():
+                try:
+                    self.write(buffer.getvalue(), time_precision)
+                except Exception:
+                    logger.exception(
+                        'Could not write %(points)d buffered points to '
+                        'InfluxDB.',
+                        {'points': buffer.points}
+                    )
+                    continue
+                for written in callbacks.get(time_precision, ()):
+                    try:
+                        written()
+                    except Exception:
+                        logger.exception('Callback of written points '
+                                         'failed.')
+
+
+def write_lines(data: str, time_precision: str) -> None:
+    """
+    Writes points serialized to line protocol as they are, the client
+    only encodes them. With INFLUXDB_GZIP setting enabled request body
+    is compressed with INFLUXDB_GZIP_LEVEL (1 is fastest, 9 smallest).
+
+    :param data: newline separated points
+    :param time_precision: precision of points' time
+    """
+    body = (data + '\n').encode()
+    if not getattr(settings, 'INFLUXDB_GZIP', False):
+        write_points([data], time_precision=time_precision, protocol='line')
+        traffic.add(len(body), len(body))
+        return
+    compressed = gzip.compress(body, compresslevel=getattr(
+        settings, 'INFLUXDB_GZIP_LEVEL', INFLUXDB_GZIP_LEVEL
+    ))
+    # client's own gzip option compresses at level 9 only
+    call(lambda client: client.request(
+        url='write',
+        method='POST',
+        params={
+            'db': getattr(settings, 'INFLUXDB_DATABASE', INFLUXDB_DATABASE),
+            'precision': time_precision
+        },
+        data=compressed,
+        expected_response_code=204,
+        headers={
+            'Content-Type': 'application/octet-stream',
+            'Content-Encoding': 'gzip',
+            'Accept': 'text/plain'
+        }
+    ))
+    traffic.add(len(body), len(compressed))
+
+
+@signals.worker_process_init.connect
+def worker_process_init(**_kwargs) -> None:
+    """
+    Builds client of a fresh worker process upfront instead of on its
+    first write and starts counting its traffic from zero.
+    """
+    pool.close()
+    pool.client()
+    traffic.reset()
+
+
+@signals.worker_process_shutdown.connect
+def worker_process_shutdown(**_kwargs) -> None:
+    pool.close()
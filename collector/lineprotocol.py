@@ -0,0 +1,199 @@
+"""
+InfluxDB line protocol serialization of typed samples, producing the
+same lines as influxdb.line_protocol.make_lines without building a dict
+of every point and guessing types of its values.
+"""
+import functools
+import io
+import threading
+import typing
+
+# nanoseconds per unit of InfluxDB time precisions
+PRECISIONS = {
+    'h': 3600 * 10 ** 9,
+    'm': 60 * 10 ** 9,
+    's': 10 ** 9,
+    'ms': 10 ** 6,
+    'u': 10 ** 3,
+    'n': 1
+}
+_local = threading.local()
+
+
+def escape(value: typing.Any) -> str:
+    """
+    Escapes measurement name, tag key or value or field key.
+
+    :param value: anything, converted to string first
+    :return: escaped string
+    """
+    return str(value).replace(
+        '\\', '\\\\'
+    ).replace(
+        ' ', '\\ '
+    ).replace(
+        ',', '\\,'
+    ).replace(
+        '=', '\\='
+    ).replace(
+        '\n', '\\n'
+    )
+
+
+# names of measurements, tags and fields repeat in every write
+escape_key = functools.lru_cache(maxsize=4096)(escape)
+
+
+def format_integer(value: typing.Any) -> str:
+    return str(int(value)) + 'i'
+
+
+def format_float(value: typing.Any) -> str:
+    return repr(float(value))
+
+
+def format_boolean(value: typing.Any) -> str:
+    return str(bool(value))
+
+
+def format_string(value: typing.Any) -> str:
+    return '"' + str(value).replace(
+        '\\', '\\\\'
+    ).replace(
+        '"', '\\"'
+    ).replace(
+        '\n', '\\n'
+    ) + '"'
+
+
+def encode_time(timestamp: float, precision: str,
+                time_precision: str) -> int:
+    """
+    Floors timestamp to precision and expresses it in units of time
+    precision of the write, e.g. 90.5 s floored to minutes is 60000 ms.
+
+    :param timestamp: seconds from epoch
+    :param precision: precision of stored point
+    :param time_precision: precision of the write, not coarser than
+        precision
+    :return: integer timestamp
+    """
+    # microseconds are as far as float timestamps of today are exact
+    nanoseconds = int(round(timestamp * 10 ** 6)) * 1000
+    units = nanoseconds // PRECISIONS[precision]
+    return units * PRECISIONS[precision] // PRECISIONS[time_precision]
+
+
+def finest(precisions: typing.Iterable[str]) -> str:
+    """
+    :param precisions: time precisions
+    :return: the finest of them, coarser ones make timestamps shorter
+    """
+    return min(precisions, key=PRECISIONS.__getitem__)
+
+
+def tag(key: str, value: typing.Any) -> typing.Optional[str]:
+    """
+    :param key: tag name
+    :param value: tag value
+    :return: escaped key=value pair, None if value is empty
+    """
+    value = escape(value)
+    if not value:
+        return None
+    return escape_key(key) + '=' + value
+
+
+def series(measurement: str, tags: typing.Dict[str, str]) -> str:
+    """
+    :param measurement: measurement name
+    :param tags: maps tag names to pairs built by tag
+    :return: measurement and tags part of a line, tags sorted by name
+    """
+    return ','.join(
+        [escape_key(measurement)] + [tags[key] for key in sorted(tags)]
+    )
+
+
+class LineBuffer:
+    """
+    Points serialized to line protocol. Buffer is meant to be reused
+    after clear, see local_buffer.
+    """
+    def __init__(self) -> None:
+        """
+        Constructor of new LineBuffer objects.
+        """
+        self._io = io.StringIO()
+        self.points = 0
+
+    def __len__(self) -> int:
+        """
+        :return: size of serialized points in characters
+        """
+        return self._io.tell()
+
+    def clear(self) -> None:
+        self._io.seek(0)
+        self._io.truncate()
+        self.points = 0
+
+    def append(self, series: str, fields: str, time: int) -> None:
+        """
+        Serializes single point.
+
+        :param series: measurement and tags as built by series
+        :param fields: comma separated fields
+        :param time: timestamp in precision of the write
+        """
+        if self.points:
+            self._io.write('\n')
+        self._io.write(series)
+        self._io.write(' ')
+        self._io.write(fields)
+        self._io.write(' ')
+        self._io.write(str(time))
+        self.points += 1
+
+    def extend(self, other: 'LineBuffer') -> None:
+        """
+        Copies all points of other buffer.
+
+        :param other: buffer of points of the same time precision
+        """
+        if not other.points:
+            return
+        if self.points:
+            self._io.write('\n')
+        self._io.write(other.getvalue())
+        self.points += other.points
+
+    def getvalue(self) -> str:
+        """
+        :return: newline separated points
+        """
+        return self._io.getvalue()
+
+    def batches(self, size: int) -> typing.Iterator[str]:
+        """
+        :param size: maximal number of points of a batch
+        :return: newline separated points of consecutive batches
+        """
+        if self.points <= size:
+            yield self.getvalue()
+            return
+        lines = self.getvalue().split('\n')
+        for start in range(0, len(lines), size):
+            yield '\n'.join(lines[start:start + size])
+
+
+def local_buffer() -> LineBuffer:
+    """
+    :return: cleared buffer of the calling thread
+    """
+    try:
+        buffer = _local.buffer
+    except AttributeError:
+        buffer = _local.buffer = LineBuffer()
+    buffer.clear()
+    return buffer
@@ -1,11 +1,11 @@
 import getpass
 
-import influxdb
 import influxdb.exceptions
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from collector.constants import INFLUXDB_DATABASE, INFLUXDB_PORT
+from collector import downsampling, influx
+from collector.constants import INFLUXDB_DATABASE, INFLUXDB_RETENTION_POLICY
 
 
 class Command(BaseCommand):
@@ -34,7 +34,10 @@ class Command(BaseCommand):
     def handle(self, *args: tuple, **options: dict) -> None:
         """
         Connects to InfluxDB instance and creates database, retention
-        policy and application user with minimal privileges.
+        policy and application user with minimal privileges. When
+        INFLUXDB_DOWNSAMPLING is set, creates also retention policies of
+        its tiers and syncs continuous queries filling them, which is
+        safe to repeat.
 
         :param args: positional arguments
         :param options: command line parameters
@@ -43,15 +46,15 @@ class Command(BaseCommand):
         password = options['password'] or getpass.getpass('Password: ')
         database = getattr(settings, 'INFLUXDB_DATABASE', INFLUXDB_DATABASE)
         policy = options['policy'] or \
-            getattr(settings, 'INFLUXDB_RETENTION_POLICY', 'watcheye')
+            getattr(settings, 'INFLUXDB_RETENTION_POLICY',
+                    INFLUXDB_RETENTION_POLICY)
         duration = options['duration'] or \
             getattr(settings, 'INFLUXDB_DURATION', '100d')
 
-        client = influxdb.InfluxDBClient(
-            host=settings.INFLUXDB_HOST,
-            port=getattr(settings, 'INFLUXDB_PORT', INFLUXDB_PORT),
+        client = influx.pool.client(
             username=options['username'],
-            password=password
+            password=password,
+            database=None
         )
         try:
             client.create_database(database)
@@ -74,6 +77,8 @@ class Command(BaseCommand):
             if e.content != 'retention policy already exists':
                 raise CommandError('Could not create retention policy.') from e
 
+        self.downsample(client, database, policy)
+
         try:
             client.create_user(
                 username=settings.INFLUXDB_USERNAME,
@@ -91,3 +96,39 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS('InfluxDB provisioning successfully completed.')
         )
+
+    def downsample(self, client: influxdb.InfluxDBClient, database: str,
+                   policy: str) -> None:
+        """
+        Creates retention policies of downsampling tiers and syncs
+        continuous queries filling them.
+
+        :param client: InfluxDB client of admin
+        :param database: InfluxDB database
+        :param policy: retention policy of raw points
+        :raises: CommandError
+        """
+        tiers = downsampling.tiers()
+        if not tiers:
+            return
+        for interval, duration in tiers:
+            try:
+                client.create_retention_policy(
+                    name=downsampling.tier_policy(policy, interval),
+                    duration=duration,
+                    replication='1',
+                    database=database
+                )
+            except influxdb.exceptions.InfluxDBClientError as e:
+                if e.content != 'retention policy already exists':
+                    raise CommandError(
+                        'Could not create retention policy.'
+                    ) from e
+        try:
+            created, dropped = downsampling.sync(client, database, policy)
+        except influxdb.exceptions.InfluxDBClientError as e:
+            raise CommandError('Could not create continuous queries.') from e
+        self.stdout.write(
+            'Created {created} and dropped {dropped} continuous '
+            'queries.'.format(created=len(created), dropped=len(dropped))
+        )
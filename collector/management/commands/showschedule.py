@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from collector import scheduling
+from collector.tasks import aggregator, rounds
+
+
+class Command(BaseCommand):
+    help = 'Shows how SNMP polling of hosts is spread across the interval.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--buckets',
+            type=int,
+            default=scheduling.SNMP_STAGGER_BUCKETS,
+            help='Number of equal parts of the interval (default: 6).'
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """
+        Prints number of hosts polled in each part of the interval, hosts
+        of groups polled more often are counted in each of theirs rounds
+        but once per moment they are polled at.
+        With staggering disabled all of them are polled at beginning of
+        theirs round. Random jitter is not taken into account.
+
+        :param args: positional arguments
+        :param options: command line parameters
+        """
+        period = scheduling.interval()
+        stagger = scheduling.stagger_enabled()
+        plans = list(aggregator())
+        delays = {
+            target.name: scheduling.offset(target.name, period)
+            if stagger else 0
+            for target in plans
+        }
+        polls = {
+            (target.name, round_delays[target.name])
+            for targets, round_delays, _timestamp in rounds(plans, delays, 0)
+            for target in targets
+        }
+        profile = scheduling.load_profile(
+            ((delay, 1) for _name, delay in polls),
+            period,
+            options['buckets']
+        )
+        width = period / len(profile)
+        peak = max(profile) or 1
+        for index, hosts in enumerate(profile):
+            label = '{start:g}-{end:g}s'.format(
+                start=index * width, end=(index + 1) * width
+            )
+            self.stdout.write(
+                '{label:>14} {hosts:>6} {bar}'.format(
+                    label=label,
+                    hosts=hosts,
+                    bar='#' * round(hosts / peak * 40)
+                )
+            )
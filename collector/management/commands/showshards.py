@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+
+from collector import sharding
+from collector.tasks import aggregator, expand_tables
+
+DEFAULT_QUEUE = '(default)'
+
+
+class Command(BaseCommand):
+    help = 'Shows assignment of hosts to SNMP polling shards.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--hosts',
+            action='store_true',
+            help='List shard of every host.'
+        )
+        parser.add_argument(
+            '--add',
+            metavar='QUEUE',
+            help='Show how many hosts would move to a new shard.'
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """
+        Prints number of hosts and OIDs polled by each shard. Hosts
+        which are not routed to any shard are polled from default queue.
+        Hosts of groups polled more often are planned more than once but
+        counted once.
+
+        :param args: positional arguments
+        :param options: command line parameters
+        """
+        targets = list(aggregator())
+        pinned = {target.name: target.shard for target in targets}
+        assignment = {
+            name: sharding.route(name, shard)
+            for name, shard in pinned.items()
+        }
+        load = {queue: [set(), 0] for queue in sharding.shards()}
+        for target in targets:
+            queue = assignment[target.name] or DEFAULT_QUEUE
+            hosts_oids = load.setdefault(queue, [set(), 0])
+            hosts_oids[0].add(target.name)
+            hosts_oids[1] += len(target.parameters) + \
+                len(expand_tables(target.tables))
+
+        peak = max((oids for _hosts, oids in load.values()), default=0) or 1
+        self.stdout.write('{queue:<24} {hosts:>6} {oids:>8}'.format(
+            queue='shard', hosts='hosts', oids='OIDs'))
+        for queue, (hosts, oids) in sorted(load.items()):
+            self.stdout.write('{queue:<24} {hosts:>6} {oids:>8} {bar}'.format(
+                queue=queue, hosts=len(hosts), oids=oids,
+                bar='#' * round(oids / peak * 40)
+            ))
+
+        if options['hosts']:
+            self.stdout.write('')
+            for name, queue in sorted(assignment.items()):
+                self.stdout.write('{name:<24} {queue}'.format(
+                    name=name, queue=queue or DEFAULT_QUEUE))
+
+        if options['add']:
+            nodes = sharding.shards() + [options['add']]
+            moved = sum(
+                assignment[name] != sharding.route(name, shard, nodes)
+                for name, shard in pinned.items()
+            )
+            self.stdout.write('')
+            self.stdout.write(
+                'Adding {queue} moves {moved} of {total} hosts.'.format(
+                    queue=options['add'], moved=moved, total=len(pinned)
+                )
+            )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0001_initial')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='bulk',
+            field=models.BooleanField(
+                blank=True,
+                default=False,
+                help_text='Should tabular group be collected with GETBULK '
+                          'column walks instead of GET queries of every '
+                          'single instance?',
+                verbose_name='bulk'
+            )
+        )
+    ]
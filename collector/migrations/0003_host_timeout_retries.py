@@ -0,0 +1,34 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0002_group_bulk')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='host',
+            name='timeout',
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                help_text='Seconds to wait for SNMP response before '
+                          'resending the query. Leave empty to use the '
+                          'default.',
+                validators=[django.core.validators.MinValueValidator(0.01)],
+                verbose_name='timeout'
+            )
+        ),
+        migrations.AddField(
+            model_name='host',
+            name='retries',
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                null=True,
+                help_text='Number of SNMP query resends before giving up. '
+                          'Leave empty to use the default.',
+                verbose_name='retries'
+            )
+        )
+    ]
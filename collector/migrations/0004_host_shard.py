@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0003_host_timeout_retries')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='host',
+            name='shard',
+            field=models.CharField(
+                blank=True,
+                help_text='Celery queue of workers polling the host. Leave '
+                          'empty to assign one of configured shards '
+                          'automatically.',
+                max_length=64,
+                verbose_name='shard'
+            )
+        )
+    ]
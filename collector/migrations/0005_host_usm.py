@@ -0,0 +1,73 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0004_host_shard')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='host',
+            name='security_name',
+            field=models.CharField(
+                blank=True,
+                help_text='SNMPv3 user name. Hosts having it set are polled '
+                          'with SNMPv3 instead of SNMPv2c.',
+                max_length=64,
+                verbose_name='security name'
+            )
+        ),
+        migrations.AddField(
+            model_name='host',
+            name='auth_protocol',
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ('', 'none'),
+                    ('MD5', 'MD5'),
+                    ('SHA', 'SHA'),
+                    ('SHA224', 'SHA-224'),
+                    ('SHA256', 'SHA-256'),
+                    ('SHA384', 'SHA-384'),
+                    ('SHA512', 'SHA-512')
+                ],
+                max_length=8,
+                verbose_name='authentication protocol'
+            )
+        ),
+        migrations.AddField(
+            model_name='host',
+            name='auth_key',
+            field=models.CharField(
+                blank=True,
+                max_length=64,
+                verbose_name='authentication passphrase'
+            )
+        ),
+        migrations.AddField(
+            model_name='host',
+            name='privacy_protocol',
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ('', 'none'),
+                    ('DES', 'DES'),
+                    ('3DES', '3DES'),
+                    ('AES128', 'AES-128'),
+                    ('AES192', 'AES-192'),
+                    ('AES256', 'AES-256')
+                ],
+                max_length=8,
+                verbose_name='privacy protocol'
+            )
+        ),
+        migrations.AddField(
+            model_name='host',
+            name='privacy_key',
+            field=models.CharField(
+                blank=True,
+                max_length=64,
+                verbose_name='privacy passphrase'
+            )
+        )
+    ]
@@ -0,0 +1,37 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0005_host_usm')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='interval',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Seconds between SNMP queries of the group if it '
+                          'is to be polled more often than once per SNMP '
+                          'interval. Leave empty to use the default.',
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name='interval'
+            )
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='precision',
+            field=models.CharField(
+                blank=True,
+                choices=[('', 'default'), ('m', 'minutes'),
+                         ('s', 'seconds'), ('ms', 'milliseconds')],
+                help_text="Precision of samples' timestamps. Samples of the "
+                          'same minute, second or millisecond overwrite each '
+                          'other. Leave empty to use the default.',
+                max_length=2,
+                verbose_name='precision'
+            )
+        )
+    ]
@@ -0,0 +1,48 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('collector', '0006_group_interval_precision')
+    ]
+    operations = [
+        migrations.AddField(
+            model_name='parameter',
+            name='write_policy',
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[(0, 'always'), (1, 'on change'),
+                         (2, 'absolute deadband'), (3, 'relative deadband')],
+                default=0,
+                help_text='Should samples be written every time or only when '
+                          'they change (by more than deadband)?',
+                verbose_name='write policy'
+            )
+        ),
+        migrations.AddField(
+            model_name='parameter',
+            name='deadband',
+            field=models.FloatField(
+                blank=True,
+                default=0,
+                help_text='Change of numeric sample not worth writing, in '
+                          'units of the parameter or percent of the last '
+                          'written value.',
+                validators=[django.core.validators.MinValueValidator(0)],
+                verbose_name='deadband'
+            )
+        ),
+        migrations.AddField(
+            model_name='parameter',
+            name='heartbeat',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Seconds after which unchanged sample is written '
+                          'anyway. Leave empty to use the default.',
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name='heartbeat'
+            )
+        )
+    ]
@@ -14,6 +14,13 @@ class Group(models.Model):
         (SCALAR, _('scalar')),
         (TABULAR, _('tabular'))
     )
+    DEFAULT_PRECISION = ''
+    PRECISIONS = (
+        (DEFAULT_PRECISION, _('default')),
+        ('m', _('minutes')),
+        ('s', _('seconds')),
+        ('ms', _('milliseconds'))
+    )
     name = models.CharField(
         verbose_name=_('name'),
         primary_key=True,
@@ -42,6 +49,31 @@ class Group(models.Model):
                     'parts.</b>'),
         validators=(oid_validator,)
     )
+    bulk = models.BooleanField(
+        verbose_name=_('bulk'),
+        blank=True,
+        default=False,
+        help_text=_('Should tabular group be collected with GETBULK column '
+                    'walks instead of GET queries of every single instance?')
+    )
+    interval = models.PositiveIntegerField(
+        verbose_name=_('interval'),
+        blank=True,
+        null=True,
+        validators=(validators.MinValueValidator(1),),
+        help_text=_('Seconds between SNMP queries of the group if it is to '
+                    'be polled more often than once per SNMP interval. '
+                    'Leave empty to use the default.')
+    )
+    precision = models.CharField(
+        verbose_name=_('precision'),
+        max_length=2,
+        blank=True,
+        choices=PRECISIONS,
+        help_text=_("Precision of samples' timestamps. Samples of the same "
+                    'minute, second or millisecond overwrite each other. '
+                    'Leave empty to use the default.')
+    )
 
     class Meta:
         verbose_name = _('Group')
@@ -62,6 +94,16 @@ class Parameter(models.Model):
         (STRING, _('string')),
         (BOOLEAN, _('boolean'))
     )
+    ALWAYS = 0
+    ON_CHANGE = 1
+    ABSOLUTE_DEADBAND = 2
+    RELATIVE_DEADBAND = 3
+    WRITE_POLICIES = (
+        (ALWAYS, _('always')),
+        (ON_CHANGE, _('on change')),
+        (ABSOLUTE_DEADBAND, _('absolute deadband')),
+        (RELATIVE_DEADBAND, _('relative deadband'))
+    )
     group = models.ForeignKey(
         to=Group,
         on_delete=models.CASCADE,
@@ -99,6 +141,30 @@ class Parameter(models.Model):
         default=0,
         help_text=_('Last but one OID part.')
     )
+    write_policy = models.PositiveSmallIntegerField(
+        verbose_name=_('write policy'),
+        blank=True,
+        choices=WRITE_POLICIES,
+        default=ALWAYS,
+        help_text=_('Should samples be written every time or only when they '
+                    'change (by more than deadband)?')
+    )
+    deadband = models.FloatField(
+        verbose_name=_('deadband'),
+        blank=True,
+        default=0,
+        validators=(validators.MinValueValidator(0),),
+        help_text=_('Change of numeric sample not worth writing, in units '
+                    'of the parameter or percent of the last written value.')
+    )
+    heartbeat = models.PositiveIntegerField(
+        verbose_name=_('heartbeat'),
+        blank=True,
+        null=True,
+        validators=(validators.MinValueValidator(1),),
+        help_text=_('Seconds after which unchanged sample is written '
+                    'anyway. Leave empty to use the default.')
+    )
 
     class Meta:
         verbose_name = _('Parameter')
@@ -124,6 +190,24 @@ class Tag(models.Model):
 
 
 class Host(models.Model):
+    NO_PROTOCOL = ''
+    AUTH_PROTOCOLS = (
+        (NO_PROTOCOL, _('none')),
+        ('MD5', 'MD5'),
+        ('SHA', 'SHA'),
+        ('SHA224', 'SHA-224'),
+        ('SHA256', 'SHA-256'),
+        ('SHA384', 'SHA-384'),
+        ('SHA512', 'SHA-512')
+    )
+    PRIVACY_PROTOCOLS = (
+        (NO_PROTOCOL, _('none')),
+        ('DES', 'DES'),
+        ('3DES', '3DES'),
+        ('AES128', 'AES-128'),
+        ('AES192', 'AES-192'),
+        ('AES256', 'AES-256')
+    )
     name = models.CharField(
         verbose_name=_('name'),
         primary_key=True,
@@ -162,6 +246,57 @@ class Host(models.Model):
         help_text=_('Set SNMP GET port. '
                     '<b>Ensure same value is set on the device.</b>')
     )
+    timeout = models.FloatField(
+        verbose_name=_('timeout'),
+        blank=True,
+        null=True,
+        validators=(validators.MinValueValidator(0.01),),
+        help_text=_('Seconds to wait for SNMP response before resending '
+                    'the query. Leave empty to use the default.')
+    )
+    retries = models.PositiveSmallIntegerField(
+        verbose_name=_('retries'),
+        blank=True,
+        null=True,
+        help_text=_('Number of SNMP query resends before giving up. '
+                    'Leave empty to use the default.')
+    )
+    shard = models.CharField(
+        verbose_name=_('shard'),
+        max_length=constants.NAME_MAX_LENGTH,
+        blank=True,
+        help_text=_('Celery queue of workers polling the host. Leave empty '
+                    'to assign one of configured shards automatically.')
+    )
+    security_name = models.CharField(
+        verbose_name=_('security name'),
+        max_length=constants.NAME_MAX_LENGTH,
+        blank=True,
+        help_text=_('SNMPv3 user name. Hosts having it set are polled with '
+                    'SNMPv3 instead of SNMPv2c.')
+    )
+    auth_protocol = models.CharField(
+        verbose_name=_('authentication protocol'),
+        max_length=8,
+        blank=True,
+        choices=AUTH_PROTOCOLS
+    )
+    auth_key = models.CharField(
+        verbose_name=_('authentication passphrase'),
+        max_length=constants.NAME_MAX_LENGTH,
+        blank=True
+    )
+    privacy_protocol = models.CharField(
+        verbose_name=_('privacy protocol'),
+        max_length=8,
+        blank=True,
+        choices=PRIVACY_PROTOCOLS
+    )
+    privacy_key = models.CharField(
+        verbose_name=_('privacy passphrase'),
+        max_length=constants.NAME_MAX_LENGTH,
+        blank=True
+    )
     tags = models.ManyToManyField(
         to=Tag,
         related_name='hosts',
@@ -0,0 +1,86 @@
+import collections
+import threading
+import typing
+
+from . import signals
+
+HostPlan = collections.namedtuple(
+    'HostPlan', ['name', 'ip', 'port', 'community', 'parameters', 'tables',
+                 'timeout', 'retries', 'shard', 'usm', 'interval']
+)
+# timeout and retries default to settings, shard to consistent hashing,
+# hosts without SNMPv3 user (see snmp.usm_user_data) are polled with v2c,
+# parameters of groups polled more often than SNMP_INTERVAL are planned
+# separately with theirs interval
+HostPlan.__new__.__defaults__ = (None, None, None, None, None)
+
+
+class PollPlan:
+    """
+    Compiled SNMP polling settings of all hosts together with version
+    stamp of configuration they were compiled from.
+    """
+    def __init__(self, hosts: typing.List[HostPlan], version: str) -> None:
+        """
+        Constructor of new PollPlan objects.
+
+        :param hosts: settings of each host as produced by aggregator
+        :param version: configuration version stamp
+        """
+        self.hosts = hosts
+        self.version = version
+        self._chunks = {}
+
+    def chunks(self, host: HostPlan,
+               size: int) -> typing.List[typing.List[str]]:
+        """
+        Slices host's OIDs into chunks not longer than size. Slices are
+        memoized, so they are computed only when learned chunk size of
+        the host changes. Host settings derived from the plan's ones
+        (e.g. probes of dead hosts) are sliced without memoization.
+
+        :param host: host settings, usually belonging to the plan
+        :param size: maximal length of a chunk
+        :return: slices of host's OIDs
+        """
+        key = host.name, host.interval, size
+        parameters = host.parameters
+        try:
+            memoized, sliced = self._chunks[key]
+        except KeyError:
+            pass
+        else:
+            if memoized is parameters:
+                return sliced
+        sliced = [
+            parameters[i:i + size] for i in range(0, len(parameters), size)
+        ]
+        self._chunks.setdefault(key, (parameters, sliced))
+        return sliced
+
+
+class PlanCache:
+    """
+    Process memory cache of PollPlan. The plan is compiled again only
+    when configuration version stamp changes, so in steady state
+    getting the plan takes no database queries.
+    """
+    def __init__(self, compiler: typing.Callable[[], typing.Iterable]):
+        """
+        Constructor of new PlanCache objects.
+
+        :param compiler: callable producing HostPlan objects
+        """
+        self.compiler = compiler
+        self._lock = threading.Lock()
+        self._plan = None
+
+    def get(self) -> PollPlan:
+        """
+        :return: plan matching current configuration
+        """
+        version = signals.config_version()
+        with self._lock:
+            if self._plan is None or self._plan.version != version:
+                self._plan = PollPlan(list(self.compiler()), version)
+            return self._plan
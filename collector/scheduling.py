@@ -0,0 +1,86 @@
+import hashlib
+import random
+import typing
+
+from django.conf import settings
+
+SNMP_INTERVAL = 60
+SNMP_STAGGER_JITTER = 0
+SNMP_STAGGER_BUCKETS = 6
+
+# delay in seconds, weight
+t_load = typing.Tuple[float, int]
+
+
+def stagger_enabled() -> bool:
+    """
+    :return: True if hosts are to be spread across polling interval
+    """
+    return getattr(settings, 'SNMP_STAGGER', False)
+
+
+def interval() -> float:
+    """
+    :return: polling interval in seconds
+    """
+    return getattr(settings, 'SNMP_INTERVAL', SNMP_INTERVAL)
+
+
+def offset(name: str, period: float) -> float:
+    """
+    Maps host name onto a point of polling interval. Unlike built-in
+    hash() md5 digest is the same in every process, so a host keeps its
+    slot across scheduler runs and worker restarts.
+
+    :param name: host name
+    :param period: length of interval in seconds
+    :return: offset in seconds from the beginning of interval
+    """
+    digest = hashlib.md5(name.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32 * period
+
+
+def countdown(name: str) -> float:
+    """
+    Delay of host's polling tasks. The stable offset is optionally
+    shifted by random jitter of at most SNMP_STAGGER_JITTER seconds.
+
+    :param name: host name
+    :return: delay in seconds
+    """
+    period = interval()
+    jitter = getattr(settings, 'SNMP_STAGGER_JITTER', SNMP_STAGGER_JITTER)
+    return (offset(name, period) + random.uniform(0, jitter)) % period
+
+
+def load_profile(load: typing.Iterable[t_load], period: float,
+                 buckets: int) -> typing.List[int]:
+    """
+    Sums weights of tasks falling into equal parts of interval.
+
+    :param load: pairs of delay and weight, e.g. number of queries
+    :param period: length of interval in seconds
+    :param buckets: number of interval parts
+    :return: total weight of each part
+    """
+    profile = [0] * buckets
+    for delay, weight in load:
+        profile[min(int(delay / period * buckets), buckets - 1)] += weight
+    return profile
+
+
+def describe_profile(profile: typing.Sequence[int], period: float) -> str:
+    """
+    Formats load profile as human readable text.
+
+    :param profile: total weight of each part of interval
+    :param period: length of interval in seconds
+    :return: comma separated weights labeled with time ranges
+    """
+    width = period / len(profile)
+    return ', '.join(
+        '{start:g}-{end:g}s: {weight}'.format(
+            start=index * width, end=(index + 1) * width, weight=weight
+        )
+        for index, weight in enumerate(profile)
+    )
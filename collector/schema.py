@@ -0,0 +1,242 @@
+"""
+Compiled layout of samples of a host: every sample identifier is indexed
+once with everything needed to turn its value into a tag or a field of
+a point, so samples are packed in a single pass over them instead of
+scanning parameters of every instance. Compiled schemas keep host's
+configuration in worker memory, so in steady state samples are written
+without database queries.
+"""
+import collections
+import threading
+import typing
+
+from django.db.models import QuerySet
+
+from . import lineprotocol, signals
+from .models import Group, Host, Instance, Parameter
+
+casters = {
+    Parameter.BOOLEAN: bool,
+    Parameter.INTEGER: int,
+    Parameter.FLOAT: float,
+    Parameter.STRING: str
+}
+formatters = {
+    Parameter.BOOLEAN: lineprotocol.format_boolean,
+    Parameter.INTEGER: lineprotocol.format_integer,
+    Parameter.FLOAT: lineprotocol.format_float,
+    Parameter.STRING: lineprotocol.format_string
+}
+
+# point is index of sample's point in HostSchema.points, key is escaped
+# field key followed by '=', parameter is set for samples subject to
+# write policy only
+Sample = collections.namedtuple(
+    'Sample', ['point', 'name', 'key', 'caster', 'formatter', 'indexing',
+               'tabular', 'parameter']
+)
+# series is complete measurement and tags part of point's lines unless
+# its tags depend on values of indexing samples; tags are point's own
+# tags as pairs built by lineprotocol.tag (None if empty)
+Point = collections.namedtuple(
+    'Point', ['group', 'measurement', 'tags', 'series']
+)
+
+# tag names and pairs built by lineprotocol.tag, None if tag is empty
+t_pairs = typing.Sequence[typing.Tuple[str, typing.Optional[str]]]
+
+
+def compose_oid(group: Group, parameter: Parameter, instance: Instance) -> str:
+    """
+    Composes OID or OID-like identifier uniquely identifying a sample.
+
+    :param group: sample's Group object instance
+    :param parameter: sample's Parameter object instance
+    :param instance: sample's Instance object instance
+    :return: sample's identifier
+    """
+    if group.oid:
+        template = '{group.oid}.{parameter.oid}.{instance.oid}'
+    else:
+        template = '{group.name}:{parameter.name}:{instance.name}'
+    return template.format(group=group,
+                           parameter=parameter,
+                           instance=instance)
+
+
+def hosts() -> QuerySet:
+    """
+    :return: hosts with everything theirs schemas are compiled from
+        prefetched
+    """
+    return Host.objects.prefetch_related(
+        'tag_values', 'instances', 'instances__group',
+        'instances__group__parameters'
+    )
+
+
+def apply_tags(tags: typing.Dict[str, str], pairs: t_pairs) -> None:
+    """
+    Overrides tags, empty ones remove tags of the same name.
+
+    :param tags: maps tag names to pairs built by lineprotocol.tag
+    :param pairs: tags overriding them
+    """
+    for name, pair in pairs:
+        if pair is None:
+            tags.pop(name, None)
+        else:
+            tags[name] = pair
+
+
+class HostSchema:
+    """
+    Samples and points of a host compiled from its configuration. Host
+    tags are host's tag values, its name and values of indexing
+    parameters of scalar groups; points of tabular groups are tagged
+    also with values of theirs indexing parameters and instance name.
+    """
+    def __init__(self, host: Host) -> None:
+        """
+        Constructor of new HostSchema objects.
+
+        :param host: Host object with tag values and instances (with
+            groups and theirs parameters) prefetched, see hosts
+        """
+        self.host = host
+        self.name = host.name
+        tags = {tag_value.tag_id: tag_value.value
+                for tag_value in host.tag_values.all()}
+        tags['host'] = host.name
+        self.tags = {}
+        apply_tags(self.tags, ((name, lineprotocol.tag(name, value))
+                               for name, value in tags.items()))
+        self.points = []
+        self.samples = {}
+        # maps parameter and instance names of HTTP samples to identifiers
+        self.names = {}
+        # identifiers of samples subject to write policies
+        self.policies = []
+        for instance in host.instances.all():
+            self._add_instance(instance)
+
+    def _add_instance(self, instance: Instance) -> None:
+        group = instance.group
+        tabular = group.type == Group.TABULAR
+        point = len(self.points)
+        for parameter in group.parameters.all():
+            oid = compose_oid(group, parameter, instance)
+            self.names[parameter.name, instance.name] = oid
+            if oid in self.samples:
+                continue
+            indexing = parameter.indexing
+            policy = not indexing and \
+                parameter.write_policy != Parameter.ALWAYS
+            self.samples[oid] = Sample(
+                point=point,
+                name=parameter.name,
+                key=lineprotocol.escape_key(parameter.name) + '=',
+                caster=casters[parameter.type],
+                formatter=formatters[parameter.type],
+                indexing=indexing,
+                tabular=tabular,
+                parameter=parameter if policy else None
+            )
+            if policy:
+                self.policies.append(oid)
+        tags = []
+        if tabular:
+            tags.append(('instance',
+                         lineprotocol.tag('instance', instance.name)))
+        self.points.append(Point(
+            group=group,
+            measurement=group.name,
+            tags=tags,
+            series=self._series(group.name, self.tags, tags)
+        ))
+
+    def series(self, point: Point,
+               host_tags: typing.Optional[typing.Dict[str, str]] = None,
+               tags: t_pairs = ()) -> str:
+        """
+        :param point: one of the points
+        :param host_tags: host's tags overridden by scalar indexing
+            samples, None if there are none
+        :param tags: tags of point's indexing samples
+        :return: measurement and sorted tags part of point's lines
+        """
+        if host_tags is None and not tags:
+            return point.series
+        if host_tags is None:
+            host_tags = self.tags
+        return self._series(point.measurement, host_tags,
+                            list(tags) + point.tags)
+
+    @staticmethod
+    def _series(measurement: str, host_tags: typing.Dict[str, str],
+                tags: t_pairs) -> str:
+        merged = dict(host_tags)
+        apply_tags(merged, tags)
+        return lineprotocol.series(measurement, merged)
+
+
+class SchemaCache:
+    """
+    Process memory read-through cache of HostSchema objects. All of them
+    are dropped once configuration version stamp changes, so in steady
+    state host's samples are packed without querying database nor
+    compiling its schema again. The stamp is kept in Django cache, which
+    has to be shared with admin, see checks.check_cache.
+    """
+    def __init__(self) -> None:
+        """
+        Constructor of new SchemaCache objects.
+        """
+        self._lock = threading.Lock()
+        self._version = None
+        self._schemas = {}
+
+    def get(self, name: str) -> HostSchema:
+        """
+        Looks schema of host up compiling it if necessary.
+
+        :param name: host name
+        :return: schema of the host matching current configuration
+        :raises Host.DoesNotExist: if there is no such host
+        """
+        version = signals.config_version()
+        with self._lock:
+            self._validate(version)
+            try:
+                return self._schemas[name]
+            except KeyError:
+                pass
+        schema = HostSchema(hosts().get(name=name))
+        with self._lock:
+            if self._version != version:
+                return schema
+            return self._schemas.setdefault(name, schema)
+
+    def warm(self) -> int:
+        """
+        Compiles schemas of all hosts at once.
+
+        :return: number of hosts
+        """
+        version = signals.config_version()
+        compiled = [HostSchema(host) for host in hosts()]
+        if signals.config_version() != version:
+            return len(compiled)
+        with self._lock:
+            self._validate(version)
+            for schema in compiled:
+                self._schemas.setdefault(schema.name, schema)
+        return len(compiled)
+
+    def _validate(self, version: str) -> None:
+        if self._version != version:
+            self._version = version
+            self._schemas = {}
+
+
+schemas = SchemaCache()
@@ -0,0 +1,96 @@
+import bisect
+import functools
+import hashlib
+import typing
+
+from django.conf import settings
+
+SNMP_SHARD_REPLICAS = 128
+
+
+def digest(key: str) -> int:
+    """
+    :param key: any text
+    :return: position of key on the ring, the same in every process
+    """
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hashing ring mapping keys onto nodes. Every node is
+    placed on the ring in many virtual copies, so keys are spread evenly
+    and adding or removing one of N nodes moves only about 1/N of keys.
+    """
+    def __init__(self, nodes: typing.Iterable[str],
+                 replicas: int = SNMP_SHARD_REPLICAS) -> None:
+        """
+        Constructor of new HashRing objects.
+
+        :param nodes: names of nodes, e.g. Celery queues
+        :param replicas: number of virtual copies of each node
+        """
+        self.nodes = list(nodes)
+        ring = sorted(
+            (digest('{node}#{replica}'.format(node=node, replica=replica)),
+             node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _node in ring]
+        self._owners = [node for _point, node in ring]
+
+    def node(self, key: str) -> str:
+        """
+        Finds node owning key, i.e. the first one clockwise from key's
+        position on the ring.
+
+        :param key: e.g. host name
+        :return: node name
+        """
+        if not self._points:
+            raise LookupError('Ring has no nodes.')
+        index = bisect.bisect(self._points, digest(key))
+        if index == len(self._points):
+            index = 0
+        return self._owners[index]
+
+
+def shards() -> typing.List[str]:
+    """
+    :return: names of queues hosts are spread across, empty list if
+        sharding is disabled
+    """
+    return list(getattr(settings, 'SNMP_SHARDS', []))
+
+
+@functools.lru_cache(maxsize=8)
+def ring(nodes: typing.Tuple[str, ...], replicas: int) -> HashRing:
+    """
+    :param nodes: names of nodes
+    :param replicas: number of virtual copies of each node
+    :return: memoized ring of given nodes
+    """
+    return HashRing(nodes, replicas)
+
+
+def route(name: str, override: str = None,
+          nodes: typing.Sequence[str] = None) -> typing.Optional[str]:
+    """
+    Assigns host to a queue. Manual override takes precedence over
+    consistent hashing of host name onto SNMP_SHARDS.
+
+    :param name: host name
+    :param override: queue set for the host explicitly, if any
+    :param nodes: queues to be used instead of SNMP_SHARDS
+    :return: queue name or None if host is to be polled from default
+        queue
+    """
+    if override:
+        return override
+    if nodes is None:
+        nodes = shards()
+    if not nodes:
+        return None
+    replicas = getattr(settings, 'SNMP_SHARD_REPLICAS', SNMP_SHARD_REPLICAS)
+    return ring(tuple(nodes), replicas).node(name)
@@ -0,0 +1,90 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import downsampling
+from .models import Group, Host, Instance, Parameter, Tag, TagValue
+
+CONFIG_VERSION_KEY = 'collector:config-version'
+CONFIG_MAX_AGE = 300
+
+
+def config_version() -> str:
+    """
+    Version stamp of collector configuration shared by all processes
+    through Django cache. Anything compiled from configuration remains
+    valid as long as the stamp does not change.
+
+    The stamp also changes every CONFIG_MAX_AGE seconds (unless it is
+    set to None), so processes not sharing the cache with admin (see
+    checks.check_cache) eventually pick changes up.
+
+    :return: current version stamp
+    """
+    version = cache.get(CONFIG_VERSION_KEY)
+    if version is None:
+        cache.add(CONFIG_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CONFIG_VERSION_KEY)
+    max_age = getattr(settings, 'CONFIG_MAX_AGE', CONFIG_MAX_AGE)
+    if max_age:
+        version = '{version}:{epoch}'.format(
+            version=version, epoch=int(time.time() // max_age)
+        )
+    return version
+
+
+def bump_config_version() -> None:
+    """
+    Invalidates everything compiled from collector configuration.
+    """
+    cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def configuration_changed(sender, **kwargs) -> None:
+    """
+    Bumps configuration version once the transaction changing collector
+    model commits. Bumping it earlier would let workers compile rows
+    the transaction has not committed yet under the new stamp.
+
+    :param sender: model class
+    :param kwargs: other arguments of the signal
+    """
+    transaction.on_commit(bump_config_version)
+
+
+def schema_changed(sender, raw: bool = False, **kwargs) -> None:
+    """
+    Syncs downsampling continuous queries once the transaction changing
+    group or parameter commits.
+
+    :param sender: model class
+    :param raw: whether the object is being loaded from fixture
+    :param kwargs: other arguments of the signal
+    """
+    if not raw and downsampling.tiers():
+        transaction.on_commit(downsampling.schedule_sync)
+
+
+def connect() -> None:
+    """
+    Connects configuration_changed receiver to signals of all collector
+    models and schema_changed to the ones of groups and parameters.
+    """
+    for model in (Group, Host, Instance, Parameter, Tag, TagValue):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                configuration_changed,
+                sender=model,
+                dispatch_uid='collector.configuration_changed'
+            )
+    for model in (Group, Parameter):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                schema_changed,
+                sender=model,
+                dispatch_uid='collector.schema_changed'
+            )
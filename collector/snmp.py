@@ -0,0 +1,550 @@
+import collections
+import contextlib
+import functools
+import ipaddress
+import os
+import threading
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from pyasn1.type.univ import Null
+from pysnmp.entity import config
+from pysnmp.entity.rfc3413 import cmdgen
+from pysnmp.hlapi import (CommunityData, ContextData, SnmpEngine,
+                          Udp6TransportTarget, UdpTransportTarget,
+                          UsmUserData)
+from pysnmp.hlapi.asyncore.cmdgen import lcd
+from pysnmp.proto.rfc1902 import ObjectName, OctetString
+from pysnmp.proto.rfc1905 import EndOfMibView
+
+SNMP_POOL_SIZE = 1024
+SNMP_POOL_MAX_ENGINES = 4
+SNMP_MIN_CHUNK_SIZE = 1
+SNMP_MAX_CHUNK_SIZE = 128
+SNMP_DEFAULT_CHUNK_SIZE = 32
+SNMP_MTU = 1472
+# SEQUENCE, OID and value tags and lengths of a single var-bind
+VAR_BIND_OVERHEAD = 6
+# message and PDU headers without community name
+MESSAGE_OVERHEAD = 32
+# SNMPv3 header, security parameters and scoped PDU header
+USM_OVERHEAD = 96
+CHUNK_SIZE_KEY = 'collector:chunk-size:{ip}:{port}'
+BAD_OIDS_KEY = 'collector:bad-oids:{ip}:{port}'
+SNMP_BAD_OIDS_TTL = 3600
+OBJECT_NAME_CACHE_SIZE = 65536
+
+AUTH_PROTOCOLS = {
+    'MD5': config.usmHMACMD5AuthProtocol,
+    'SHA': config.usmHMACSHAAuthProtocol,
+    'SHA224': config.usmHMAC128SHA224AuthProtocol,
+    'SHA256': config.usmHMAC192SHA256AuthProtocol,
+    'SHA384': config.usmHMAC256SHA384AuthProtocol,
+    'SHA512': config.usmHMAC384SHA512AuthProtocol
+}
+# AES-192 and AES-256 keys are extended the way Net-SNMP does
+PRIVACY_PROTOCOLS = {
+    'DES': config.usmDESPrivProtocol,
+    '3DES': config.usm3DESEDEPrivProtocol,
+    'AES128': config.usmAesCfb128Protocol,
+    'AES192': config.usmAesBlumenthalCfb192Protocol,
+    'AES256': config.usmAesBlumenthalCfb256Protocol
+}
+
+# security name, authentication protocol, authentication passphrase,
+# privacy protocol, privacy passphrase
+t_usm = typing.Tuple[str, str, str, str, str]
+
+# IP address, port, community, SNMPv3 user
+t_target_key = typing.Tuple[str, int, str, typing.Optional[t_usm]]
+
+
+class EnginePool:
+    """
+    Worker scoped pool of SNMP engines and transport targets.
+
+    Bootstrapping SnmpEngine (MIB builder, message processing and
+    security subsystems) and resolving transport target addresses is
+    much more expensive than the GET query itself, so both are reused
+    between queries. An engine is not thread-safe, therefore each
+    thread checks one out for the time of a query. Every engine owns at
+    most one socket per address family, so limiting number of engines
+    caps number of open sockets.
+
+    Pool notices being inherited by a forked process (e.g. Celery's
+    prefork pool) and starts over instead of sharing sockets with its
+    parent.
+    """
+    def __init__(self, size: int = SNMP_POOL_SIZE,
+                 max_engines: int = SNMP_POOL_MAX_ENGINES) -> None:
+        """
+        Constructor of new EnginePool objects.
+
+        :param size: maximal number of cached authentication data and
+            transport target pairs
+        :param max_engines: maximal number of SNMP engines
+        """
+        self.size = size
+        self.max_engines = max_engines
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._targets = collections.OrderedDict()
+        self._engines = collections.defaultdict(list)
+        self._targets_served = {}
+        self._users = {}
+        self._created = 0
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._reset()
+
+    def target(self, ip: str, port: int, community: str,
+               timeout: float = None, retries: int = None,
+               usm: typing.Sequence[str] = None) -> tuple:
+        """
+        Looks up authentication data and transport target for given
+        endpoint creating them if necessary. Least recently used pairs
+        are evicted when pool size is exceeded.
+
+        :param ip: host IP address
+        :param port: SNMP port number
+        :param community: community name, ignored if usm is given
+        :param timeout: response timeout in seconds, pysnmp's default
+            if None
+        :param retries: number of retries, pysnmp's default if None
+        :param usm: SNMPv3 user, see usm_user_data, SNMPv2c is used if
+            None
+        :return: authentication data and transport target
+        """
+        usm = tuple(usm) if usm else None
+        key = ip, port, community, timeout, retries, usm
+        with self._lock:
+            self._check_pid()
+            try:
+                self._targets.move_to_end(key)
+                return self._targets[key]
+            except KeyError:
+                pass
+
+        if ipaddress.ip_address(ip).version == 4:
+            transport = UdpTransportTarget
+        else:
+            transport = Udp6TransportTarget
+        options = {
+            name: option
+            for name, option in (('timeout', timeout), ('retries', retries))
+            if option is not None
+        }
+        value = (
+            usm_user_data(usm) if usm else CommunityData(community,
+                                                         mpModel=1),
+            transport((ip, port), **options)
+        )
+
+        with self._lock:
+            self._targets[key] = value
+            while len(self._targets) > self.size:
+                self._targets.popitem(last=False)
+        return value
+
+    def acquire(self, usm: t_usm = None) -> SnmpEngine:
+        """
+        Checks an engine out of the pool blocking while all of
+        max_engines are in use. Engines are partitioned by SNMPv3 user,
+        because pysnmp identifies users of an engine by security name
+        only and would query every agent with credentials of the first
+        user of that name. When the limit is reached, idle engine of
+        another user is closed to make room.
+
+        :param usm: SNMPv3 user the engine is going to be used for, see
+            usm_user_data, None for SNMPv2c
+        :return: SNMP engine for exclusive use
+        """
+        with self._available:
+            self._check_pid()
+            while not self._engines[usm] and \
+                    self._created >= self.max_engines:
+                idle = next((engines for engines in self._engines.values()
+                             if engines), None)
+                if idle:
+                    self._close(idle.pop())
+                else:
+                    self._available.wait()
+            if self._engines[usm]:
+                return self._engines[usm].pop()
+            self._created += 1
+        engine = SnmpEngine()
+        with self._lock:
+            self._targets_served[id(engine)] = set()
+            self._users[id(engine)] = usm
+        return engine
+
+    def _close(self, engine: SnmpEngine) -> None:
+        del self._targets_served[id(engine)]
+        del self._users[id(engine)]
+        if engine.transportDispatcher is not None:
+            engine.transportDispatcher.closeDispatcher()
+        self._created -= 1
+
+    def release(self, engine: SnmpEngine, key: t_target_key) -> None:
+        """
+        Returns engine to the pool. Engines which were configured for
+        more targets than pool size are closed, so theirs internal
+        configuration tables do not grow without limit.
+
+        :param engine: engine previously returned by acquire
+        :param key: target the engine has been used for
+        """
+        with self._available:
+            if self._pid != os.getpid():
+                return
+            served = self._targets_served[id(engine)]
+            served.add(key)
+            if len(served) > self.size:
+                self._close(engine)
+            else:
+                self._engines[self._users[id(engine)]].append(engine)
+            self._available.notify()
+
+    @contextlib.contextmanager
+    def session(self, ip: str, port: int, community: str,
+                timeout: float = None, retries: int = None,
+                usm: typing.Sequence[str] = None):
+        """
+        Provides engine, authentication data and transport target ready
+        to be passed to get_cmd or pysnmp.hlapi commands.
+
+        SNMPv3 engines keep discovered engine IDs, boots and time of
+        agents together with keys localized for them, so only the first
+        query of a host served by a pooled engine performs discovery.
+
+        :param ip: host IP address
+        :param port: SNMP port number
+        :param community: community name
+        :param timeout: response timeout in seconds
+        :param retries: number of retries
+        :param usm: SNMPv3 user, see usm_user_data
+        :return: context manager of engine, auth data and target tuple
+        """
+        usm = tuple(usm) if usm else None
+        auth_data, transport_target = self.target(ip, port, community,
+                                                  timeout, retries, usm)
+        engine = self.acquire(usm)
+        try:
+            yield engine, auth_data, transport_target
+        finally:
+            self.release(engine, (ip, port, community, usm))
+
+
+@functools.lru_cache(maxsize=SNMP_POOL_SIZE)
+def usm_user_data(usm: t_usm) -> UsmUserData:
+    """
+    Builds SNMPv3 user data with master keys derived from passphrases.
+    Deriving a key hashes a megabyte of repeated passphrase, so it is
+    done once per process and user instead of whenever an engine is
+    configured. Engines localize master keys with agent's engine ID.
+
+    :param usm: security name, authentication protocol and passphrase,
+        privacy protocol and passphrase, protocols being keys of
+        AUTH_PROTOCOLS and PRIVACY_PROTOCOLS or empty
+    :return: SNMPv3 user data
+    """
+    security_name, auth_protocol, auth_key, privacy_protocol, \
+        privacy_key = usm
+    auth_protocol = AUTH_PROTOCOLS.get(auth_protocol,
+                                       config.usmNoAuthProtocol)
+    privacy_protocol = PRIVACY_PROTOCOLS.get(privacy_protocol,
+                                             config.usmNoPrivProtocol)
+    options = {
+        'authProtocol': auth_protocol,
+        'privProtocol': privacy_protocol,
+        'authKeyType': config.usmKeyTypeMaster,
+        'privKeyType': config.usmKeyTypeMaster
+    }
+    if auth_protocol != config.usmNoAuthProtocol:
+        options['authKey'] = config.authServices[
+            auth_protocol
+        ].hashPassphrase(OctetString(auth_key))
+    if privacy_protocol != config.usmNoPrivProtocol:
+        options['privKey'] = config.privServices[
+            privacy_protocol
+        ].hashPassphrase(auth_protocol, OctetString(privacy_key))
+    return UsmUserData(security_name, **options)
+
+
+@functools.lru_cache(maxsize=OBJECT_NAME_CACHE_SIZE)
+def object_name(oid: str) -> ObjectName:
+    """
+    Converts numeric OID into ObjectName straight from integer arcs.
+    Names are immutable, so they are memoized and shared by queries.
+
+    :param oid: dotted numeric OID
+    :return: SNMP object name
+    """
+    return ObjectName(tuple(int(arc) for arc in oid.split('.')))
+
+
+def get_cmd(engine: SnmpEngine,
+            auth_data: typing.Union[CommunityData, UsmUserData],
+            transport_target: UdpTransportTarget,
+            oids: typing.Sequence[str]) -> tuple:
+    """
+    Performs SNMP GET query of numeric OIDs. Unlike pysnmp.hlapi.getCmd
+    it does not resolve var-binds through MIB view controller in any
+    direction: request is built from memoized object names and names
+    of response are mapped back onto requested OIDs, so theirs form
+    matches compose_oid. Duplicate OIDs are queried once, error index
+    still counts requested OIDs.
+
+    :param engine: SNMP engine
+    :param auth_data: authentication data, SNMPv2c community or SNMPv3
+        user
+    :param transport_target: transport target
+    :param oids: list of numeric OIDs
+    :return: error indication, error status, error index and list of
+        pairs: OID and its value
+    """
+    names = collections.OrderedDict(
+        (object_name(oid), oid) for oid in oids
+    )
+    context_data = ContextData()
+    address_name, _params_name = lcd.configure(
+        engine, auth_data, transport_target, context_data.contextName
+    )
+    response = {}
+
+    def callback(_engine, _handle, error_indication, error_status,
+                 error_index, var_binds, _context):
+        response.update(error_indication=error_indication,
+                        error_status=error_status,
+                        error_index=error_index,
+                        var_binds=var_binds)
+
+    cmdgen.GetCommandGenerator().sendVarBinds(
+        engine, address_name, context_data.contextEngineId,
+        context_data.contextName, [(name, Null('')) for name in names],
+        callback
+    )
+    engine.transportDispatcher.runDispatcher()
+
+    error_index = response['error_index']
+    # duplicates are sent once, so error-index points into shorter list
+    # than the requested one
+    if len(names) < len(oids) and 0 < int(error_index or 0) <= len(names):
+        error_index = oids.index(
+            list(names.values())[int(error_index) - 1]
+        ) + 1
+    return (
+        response['error_indication'],
+        response['error_status'],
+        error_index,
+        [
+            (names.get(name) or str(name), value)
+            for name, value in response['var_binds']
+        ]
+    )
+
+
+def bulk_cmd(engine: SnmpEngine,
+             auth_data: typing.Union[CommunityData, UsmUserData],
+             transport_target: UdpTransportTarget,
+             columns: typing.Sequence[str],
+             max_repetitions: int) -> typing.Iterator[tuple]:
+    """
+    Walks table columns with GETBULK queries. Like get_cmd it bypasses
+    MIB resolution of pysnmp.hlapi.bulkCmd: requests are built from
+    memoized object names and names of responses are returned as
+    numeric OIDs. Walk is over once all columns are left (objects past
+    a column are yielded as theirs column with endOfMibView value), an
+    error occurs or agent stops advancing.
+
+    :param engine: SNMP engine
+    :param auth_data: authentication data, SNMPv2c community or SNMPv3
+        user
+    :param transport_target: transport target
+    :param columns: numeric OIDs of table columns
+    :param max_repetitions: number of rows requested at once
+    :return: tuples of error indication, error status, error index and
+        row as list of pairs: OID and its value
+    """
+    prefixes = [object_name(column) for column in columns]
+    names = list(prefixes)
+    context_data = ContextData()
+    address_name, _params_name = lcd.configure(
+        engine, auth_data, transport_target, context_data.contextName
+    )
+    generator = cmdgen.BulkCommandGeneratorSingleRun()
+    while True:
+        response = {}
+
+        def callback(_engine, _handle, error_indication, error_status,
+                     error_index, var_binds, _context):
+            response.update(error_indication=error_indication,
+                            error_status=error_status,
+                            error_index=error_index,
+                            var_binds=var_binds)
+
+        generator.sendVarBinds(
+            engine, address_name, context_data.contextEngineId,
+            context_data.contextName, 0, max_repetitions,
+            [(name, Null('')) for name in names], callback
+        )
+        engine.transportDispatcher.runDispatcher()
+        if response['error_indication'] or response['error_status']:
+            yield (response['error_indication'], response['error_status'],
+                   response['error_index'], [])
+            return
+        var_binds = list(response['var_binds'])
+        last = names
+        for start in range(0, len(var_binds) - len(names) + 1, len(names)):
+            row = var_binds[start:start + len(names)]
+            within = [
+                prefix.isPrefixOf(name) and not isinstance(value, EndOfMibView)
+                for prefix, (name, value) in zip(prefixes, row)
+            ]
+            if not any(within):
+                return
+            yield None, 0, 0, [
+                (str(name), value) if inside else (column, EndOfMibView())
+                for column, inside, (name, value) in zip(columns, within, row)
+            ]
+            last = [name for name, _value in row]
+        if last == names:
+            return
+        names = last
+
+
+def chunk_size_settings() -> typing.Tuple[int, int, int]:
+    """
+    :return: default, minimal and maximal chunk size
+    """
+    return (
+        getattr(settings, 'SNMP_DEFAULT_CHUNK_SIZE', SNMP_DEFAULT_CHUNK_SIZE),
+        getattr(settings, 'SNMP_MIN_CHUNK_SIZE', SNMP_MIN_CHUNK_SIZE),
+        getattr(settings, 'SNMP_MAX_CHUNK_SIZE', SNMP_MAX_CHUNK_SIZE)
+    )
+
+
+def chunk_sizes(endpoints: typing.Iterable[typing.Tuple[str, int]]) -> dict:
+    """
+    Looks learned chunk sizes of many endpoints up at once.
+
+    :param endpoints: pairs of IP address and port
+    :return: maps endpoint to number of OIDs to be sent in single query
+    """
+    default, _minimal, _maximal = chunk_size_settings()
+    keys = {
+        CHUNK_SIZE_KEY.format(ip=ip, port=port): (ip, port)
+        for ip, port in endpoints
+    }
+    learned = cache.get_many(keys.keys())
+    return {
+        endpoint: learned.get(key, default)
+        for key, endpoint in keys.items()
+    }
+
+
+def response_size(community: str, samples: typing.Iterable[tuple],
+                  usm: bool = False) -> int:
+    """
+    Estimates size of response message carrying given samples without
+    actually encoding it. Most of OID arcs are lower than 128, so each
+    of them is encoded in a single byte.
+
+    :param community: community name
+    :param samples: pairs of OID and value
+    :param usm: indicates SNMPv3 message
+    :return: approximate number of bytes
+    """
+    size = MESSAGE_OVERHEAD + len(community)
+    if usm:
+        size += USM_OVERHEAD
+    for oid, value in samples:
+        size += VAR_BIND_OVERHEAD + oid.count('.')
+        if isinstance(value, (bytes, str)):
+            size += len(value)
+        else:
+            size += 9
+    return size
+
+
+def learn_chunk_size(ip: str, port: int, requested: int, size: int = None,
+                     too_big: bool = False) -> int:
+    """
+    Adjusts chunk size of an endpoint to the outcome of a query. Chunk
+    grows while full chunks are answered and responses fit in SNMP_MTU
+    and is halved when agent answers with tooBig error. Timeout says
+    nothing about response size (agent might be just down), so it halves
+    chunk grown over SNMP_DEFAULT_CHUNK_SIZE down to the default at
+    most. Learned value is persisted in Django cache, so it is shared by
+    all workers using the same cache backend.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    :param requested: number of OIDs sent in the query
+    :param size: estimated size of response or None on timeout
+    :param too_big: indicates tooBig error status of response
+    :return: learned chunk size
+    """
+    default, minimal, maximal = chunk_size_settings()
+    key = CHUNK_SIZE_KEY.format(ip=ip, port=port)
+    current = cache.get(key, default)
+    if too_big:
+        learned = min(current, requested // 2)
+    elif size is None:
+        learned = min(current, max(requested // 2, default))
+    else:
+        mtu = getattr(settings, 'SNMP_MTU', SNMP_MTU)
+        per_oid = max(size - MESSAGE_OVERHEAD, 1) / requested
+        fit = int((mtu - MESSAGE_OVERHEAD) / per_oid)
+        if requested >= current:
+            learned = requested + max(requested // 4, 1)
+        else:
+            learned = current
+        learned = min(learned, fit)
+    learned = max(minimal, min(learned, maximal))
+    if learned != current:
+        cache.set(key, learned, None)
+    return learned
+
+
+def bad_oids(endpoints: typing.Iterable[typing.Tuple[str, int]]) -> dict:
+    """
+    Looks OIDs agents failed to answer up for many endpoints at once.
+
+    :param endpoints: pairs of IP address and port
+    :return: maps endpoint to set of its bad OIDs, endpoints without any
+        are left out
+    """
+    keys = {
+        BAD_OIDS_KEY.format(ip=ip, port=port): (ip, port)
+        for ip, port in endpoints
+    }
+    return {
+        keys[key]: oids
+        for key, oids in cache.get_many(keys.keys()).items()
+    }
+
+
+def remember_bad_oid(ip: str, port: int, oid: str) -> None:
+    """
+    Marks OID an agent answered with error as bad, so it is left out of
+    queries of the host until SNMP_BAD_OIDS_TTL seconds pass without
+    any other bad OID being found. Then all of them are tried again,
+    e.g. in case agent has been upgraded. Concurrent tasks of the same
+    host might overwrite each other's OIDs, which are found again in
+    the next cycle then.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    :param oid: OID pointed by error-index of response
+    """
+    key = BAD_OIDS_KEY.format(ip=ip, port=port)
+    oids = cache.get(key, set()) | {oid}
+    cache.set(key, oids,
+              getattr(settings, 'SNMP_BAD_OIDS_TTL', SNMP_BAD_OIDS_TTL))
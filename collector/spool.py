@@ -0,0 +1,383 @@
+"""
+On-disk spool of line protocol taking over writes to InfluxDB while it
+is unavailable or too slow. Points are appended to segment files which
+are replayed in bulk by a background thread once InfluxDB recovers.
+Every point has its timestamp, so replaying it again (e.g. after a crash
+in the middle of a segment) just overwrites the same point.
+"""
+import fcntl
+import os
+import threading
+import time
+import typing
+
+import requests
+from celery.utils.log import get_logger
+from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+
+from . import influx
+
+INFLUXDB_SPOOL_MAX_BYTES = 1073741824
+INFLUXDB_SPOOL_SEGMENT_BYTES = 8388608
+INFLUXDB_SPOOL_LATENCY = 5.0
+INFLUXDB_SPOOL_BACKOFF = 30.0
+# segment of a process is sealed (and becomes replayable) at latest
+# after SEGMENT_MAX_AGE seconds, drainer looks for segments every
+# DRAIN_INTERVAL seconds
+SEGMENT_MAX_AGE = 1.0
+DRAIN_INTERVAL = 1.0
+OPEN_SUFFIX = '.open'
+LOCK_NAME = 'drain.lock'
+# write errors worth retrying later, others are caused by points
+RETRYABLE_ERRORS = (requests.exceptions.RequestException,
+                    InfluxDBServerError)
+logger = get_logger(__name__)
+
+
+def alive(pid: int) -> bool:
+    """
+    :param pid: process identifier
+    :return: whether the process exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Spool:
+    """
+    Write-ahead spool of points of a directory shared by processes of
+    a host. Each process appends to its own segment file named after
+    creation time, process and time precision of its points, so segments
+    are replayed oldest first. Segments being appended to carry
+    OPEN_SUFFIX, the ones of dead processes are sealed by drainer.
+
+    Writes go to InfluxDB directly unless one of them failed or took
+    longer than latency seconds during last backoff seconds. Only one
+    process replays segments at a time, the others wait for its lock.
+    When spool grows over max_bytes the oldest segments are deleted.
+    """
+    def __init__(self, directory: str,
+                 max_bytes: int = INFLUXDB_SPOOL_MAX_BYTES,
+                 segment_bytes: int = INFLUXDB_SPOOL_SEGMENT_BYTES,
+                 latency: float = INFLUXDB_SPOOL_LATENCY,
+                 backoff: float = INFLUXDB_SPOOL_BACKOFF,
+                 batch_size: int = 10000,
+                 write: typing.Callable = None,
+                 background: bool = True) -> None:
+        """
+        Constructor of new Spool objects.
+
+        :param directory: directory of segment files, created if missing
+        :param max_bytes: size of all segments retained
+        :param segment_bytes: size of segment after which it is sealed
+        :param latency: seconds after which write is considered slow
+        :param backoff: seconds of spooling after failed or slow write
+        :param batch_size: number of points replayed at once
+        :param write: callable accepting newline separated points and
+            time_precision, influx.write_lines by default
+        :param background: whether to replay segments by a thread
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.latency = latency
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.write_through = write or influx.write_lines
+        self.background = background
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._file = None
+        self._path = None
+        self._opened = 0
+        self._sequence = 0
+        self._divert_until = 0
+        self._drainer = None
+        self.spooled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.replay_rate = 0.0
+
+    def write(self, data: str, time_precision: str) -> None:
+        """
+        Writes points to InfluxDB or spools them.
+
+        :param data: newline separated points
+        :param time_precision: precision of points' time
+        :raises InfluxDBClientError: if InfluxDB refused the points
+        """
+        self.start()
+        if time.monotonic() < self._divert_until:
+            self.append(data, time_precision)
+            return
+        start = time.monotonic()
+        try:
+            self.write_through(data, time_precision)
+        except RETRYABLE_ERRORS:
+            logger.warning(
+                'Could not write points to InfluxDB, spooling them for '
+                '%(backoff).0f s.',
+                {'backoff': self.backoff},
+                exc_info=True
+            )
+            self._divert()
+            self.append(data, time_precision)
+            return
+        elapsed = time.monotonic() - start
+        if elapsed > self.latency:
+            logger.warning(
+                'Write to InfluxDB took %(elapsed).1f s, spooling points '
+                'for %(backoff).0f s.',
+                {'elapsed': elapsed, 'backoff': self.backoff}
+            )
+            self._divert()
+
+    def _divert(self) -> None:
+        self._divert_until = time.monotonic() + self.backoff
+
+    def append(self, data: str, time_precision: str) -> None:
+        """
+        Appends points to segment of the process.
+
+        :param data: newline separated points
+        :param time_precision: precision of points' time
+        """
+        payload = data.encode() + b'\n'
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._file is not None and \
+                    not self._path.endswith(time_precision + OPEN_SUFFIX):
+                self._seal()
+            if self._file is None:
+                self._open(time_precision)
+            self._file.write(payload)
+            self._file.flush()
+            self.spooled += data.count('\n') + 1
+            if self._file.tell() >= self.segment_bytes:
+                self._seal()
+            self._start()
+
+    def start(self) -> None:
+        """
+        Starts drainer of the process, so segments left by other (also
+        dead) processes are replayed even if this one writes directly.
+        """
+        if self._drainer is not None and self._pid == os.getpid() or \
+                not self.background:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._start()
+
+    def _start(self) -> None:
+        if self.background and self._drainer is None and \
+                not self._closed.is_set():
+            self._drainer = threading.Thread(target=self._drain_forever,
+                                             daemon=True)
+            self._drainer.start()
+
+    def _open(self, time_precision: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        name = '{created:020d}-{pid}-{sequence}.{precision}'.format(
+            created=int(time.time() * 1000000), pid=self._pid,
+            sequence=self._sequence, precision=time_precision
+        )
+        self._path = os.path.join(self.directory, name + OPEN_SUFFIX)
+        self._file = open(self._path, 'ab')
+        self._opened = time.monotonic()
+
+    def _seal(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.rename(self._path, self._path[:-len(OPEN_SUFFIX)])
+        self._file = None
+        self._path = None
+        self._enforce_retention()
+
+    def _segments(self, sealed: bool = True) -> typing.List[str]:
+        """
+        :param sealed: list sealed segments only
+        :return: names of segments, oldest first
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        names = [name for name in names if name != LOCK_NAME]
+        if sealed:
+            names = [name for name in names
+                     if not name.endswith(OPEN_SUFFIX)]
+        return sorted(names)
+
+    def _enforce_retention(self) -> None:
+        sizes = []
+        for name in self._segments(sealed=False):
+            try:
+                sizes.append((name, os.path.getsize(
+                    os.path.join(self.directory, name)
+                )))
+            except FileNotFoundError:
+                pass
+        total = sum(size for _name, size in sizes)
+        for name, size in sizes:
+            if total <= self.max_bytes:
+                break
+            if name.endswith(OPEN_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as segment:
+                    points = segment.read().count(b'\n')
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.dropped += points
+            logger.warning(
+                'Spool exceeded %(max_bytes)d bytes, dropped %(points)d '
+                'oldest points.',
+                {'max_bytes': self.max_bytes, 'points': points}
+            )
+
+    def _seal_orphans(self) -> None:
+        """
+        Seals segments of this process which are old enough and the ones
+        left open by dead processes.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._file is not None and \
+                    time.monotonic() - self._opened >= SEGMENT_MAX_AGE:
+                self._seal()
+        for name in self._segments(sealed=False):
+            if name.endswith(OPEN_SUFFIX) and \
+                    not alive(int(name.split('-')[1])):
+                path = os.path.join(self.directory, name)
+                try:
+                    os.rename(path, path[:-len(OPEN_SUFFIX)])
+                except FileNotFoundError:
+                    pass
+
+    def drain(self) -> bool:
+        """
+        Replays sealed segments oldest first and removes them. Replay
+        stops at the first retryable error and is skipped while writes
+        are being spooled.
+
+        :return: False if replay failed, True otherwise
+        """
+        self._seal_orphans()
+        if time.monotonic() < self._divert_until:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_NAME), 'wb') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            start = time.monotonic()
+            replayed = self.replayed
+            try:
+                for name in self._segments():
+                    if not self._replay(name):
+                        return False
+            finally:
+                points = self.replayed - replayed
+                if points:
+                    elapsed = time.monotonic() - start
+                    self.replay_rate = points / max(elapsed, 1e-9)
+                    logger.info(
+                        'Replayed %(points)d spooled points, %(rate).0f '
+                        'points/s, %(segments)d segments left.',
+                        {
+                            'points': points,
+                            'rate': self.replay_rate,
+                            'segments': len(self._segments(sealed=False))
+                        }
+                    )
+        return True
+
+    def _replay(self, name: str) -> bool:
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as segment:
+                data = segment.read().decode()
+        except FileNotFoundError:
+            return True
+        # partially written point of a crashed process is dropped
+        lines = data.split('\n')[:-1]
+        time_precision = name.rsplit('.', 1)[1]
+        for start in range(0, len(lines), self.batch_size):
+            batch = lines[start:start + self.batch_size]
+            try:
+                self.write_through('\n'.join(batch), time_precision)
+            except RETRYABLE_ERRORS:
+                logger.warning('Could not replay spooled points.',
+                               exc_info=True)
+                self._divert()
+                return False
+            except InfluxDBClientError:
+                logger.exception(
+                    'InfluxDB refused %(points)d spooled points.',
+                    {'points': len(batch)}
+                )
+                self.dropped += len(batch)
+            else:
+                self.replayed += len(batch)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _drain_forever(self) -> None:
+        while not self._closed.wait(DRAIN_INTERVAL):
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Could not drain spool.')
+
+    def stats(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """
+        :return: number and size of segments waiting for replay (of all
+            processes) and numbers of points spooled, replayed and
+            dropped by this process as well as its last replay rate
+        """
+        names = self._segments(sealed=False)
+        size = 0
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        return {
+            'segments': len(names),
+            'bytes': size,
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'dropped': self.dropped,
+            'replay_rate': self.replay_rate
+        }
+
+    def close(self) -> None:
+        """
+        Seals segment of the process and stops its drainer.
+        """
+        self._closed.set()
+        with self._lock:
+            if self._pid == os.getpid() and self._file is not None:
+                self._seal()
@@ -1,29 +1,62 @@
 import datetime
-import ipaddress
+import itertools
+import time
 import typing
 
 import celery
+from celery import signals
+from celery.result import AsyncResult
 from celery.utils.log import get_task_logger
 from django.conf import settings
-from influxdb import InfluxDBClient
+from django.core.cache import cache
+from django.db import connections
 from pyasn1.type.univ import Null
-from pysnmp.hlapi import (CommunityData, ContextData, ObjectIdentity,
-                          ObjectType, SnmpEngine, Udp6TransportTarget,
-                          UdpTransportTarget, getCmd)
+from pysnmp.proto import errind
 
-from .constants import EPOCH, INFLUXDB_DATABASE, INFLUXDB_PORT
-from .models import Group, Host, Instance, Parameter
+from . import (
+    aiosnmp, checks, deadband, downsampling, health, influx, lineprotocol,
+    plan, scheduling, sharding, snmp, spool
+)
+from .batch import SampleBatch, load_samples
+from .constants import EPOCH, SNMP_TOO_BIG
+from .models import Group, Host
+from .schema import HostSchema, Sample, apply_tags, compose_oid, schemas
 
 SNMP_MAX_PARAMETERS_IN_QUERY = 32
+SNMP_HOSTS_PER_TASK = 500
+SNMP_MAX_REPETITIONS = 25
 INFLUXDB_BATCH_SIZE = getattr(settings, 'INFLUXDB_BATCH_SIZE', 10000)
+INFLUXDB_PRECISION = 'm'
+SAMPLE_BATCH_SERIALIZER = checks.SAMPLE_BATCH_SERIALIZER
 logger = get_task_logger(__name__)
-casters = {
-    Parameter.BOOLEAN: bool,
-    Parameter.INTEGER: int,
-    Parameter.FLOAT: float,
-    Parameter.STRING: str
-}
-
+engine_pool = snmp.EnginePool(
+    size=getattr(settings, 'SNMP_POOL_SIZE', snmp.SNMP_POOL_SIZE),
+    max_engines=getattr(settings, 'SNMP_POOL_MAX_ENGINES',
+                        snmp.SNMP_POOL_MAX_ENGINES)
+)
+write_spool = None
+if getattr(settings, 'INFLUXDB_SPOOL_DIR', None):
+    write_spool = spool.Spool(
+        settings.INFLUXDB_SPOOL_DIR,
+        max_bytes=getattr(settings, 'INFLUXDB_SPOOL_MAX_BYTES',
+                          spool.INFLUXDB_SPOOL_MAX_BYTES),
+        segment_bytes=getattr(settings, 'INFLUXDB_SPOOL_SEGMENT_BYTES',
+                              spool.INFLUXDB_SPOOL_SEGMENT_BYTES),
+        latency=getattr(settings, 'INFLUXDB_SPOOL_LATENCY',
+                        spool.INFLUXDB_SPOOL_LATENCY),
+        backoff=getattr(settings, 'INFLUXDB_SPOOL_BACKOFF',
+                        spool.INFLUXDB_SPOOL_BACKOFF),
+        batch_size=INFLUXDB_BATCH_SIZE
+    )
+write_buffer = influx.WriteBuffer(
+    max_points=getattr(settings, 'INFLUXDB_BUFFER_MAX_POINTS',
+                       influx.INFLUXDB_BUFFER_MAX_POINTS),
+    max_bytes=getattr(settings, 'INFLUXDB_BUFFER_MAX_BYTES',
+                      influx.INFLUXDB_BUFFER_MAX_BYTES),
+    max_latency=getattr(settings, 'INFLUXDB_BUFFER_MAX_LATENCY',
+                        influx.INFLUXDB_BUFFER_MAX_LATENCY),
+    write=write_spool and write_spool.write
+)
 t_sample_value = typing.Union[bool, int, float, str]
 
 # parameter name, instance name, value
@@ -34,69 +67,342 @@ t_http_samples = typing.Sequence[t_http_sample]
 # OID, value
 t_snmp_sample = typing.Tuple[str, t_sample_value]
 
-# single snmp_harvester task returns just a portion of data
-t_snmp_samples_chunk = typing.Sequence[t_snmp_sample]
+# single snmp_harvester task returns just a portion of data, serialized
+# SampleBatch with SAMPLE_BATCH setting enabled
+t_snmp_samples_chunk = typing.Union[typing.Sequence[t_snmp_sample], bytes]
 
 # group of snmp_harvester tasks returns full set of data
 t_snmp_samples = typing.Sequence[t_snmp_samples_chunk]
 
-t_samples = typing.Union[t_http_samples, t_snmp_samples]
+t_samples = typing.Union[t_http_samples, t_snmp_samples, bytes]
+
+# column OIDs, instance OIDs
+t_table = typing.Tuple[typing.List[str], typing.List[int]]
 
 
-def aggregator() -> typing.Iterator[typing.Tuple[str, str, int,
-                                                 str, typing.List[str]]]:
+def aggregator() -> typing.Iterator[plan.HostPlan]:
     """
-    Iterates over hosts producing settings for SNMP query.
+    Iterates over hosts producing settings for SNMP query. Tabular
+    groups with bulk option enabled are not split into single OIDs
+    but described as tables to be walked. Groups with interval shorter
+    than SNMP_INTERVAL are planned separately for each such interval.
 
-    :return: tuple matching to snmp_harvester arguments
+    :return: tuple of host name and snmp_harvester arguments followed
+        by tables matching to snmp_walker arguments
     """
     queryset = Host.objects.exclude(
-        community=''
+        community='', security_name=''
     ).prefetch_related(
         'instances', 'instances__group', 'instances__group__parameters'
     )
+    period = scheduling.interval()
     for host in queryset:
+        intervals = {}
+        for instance in host.instances.all():
+            group = instance.group
+            if not group.oid:
+                continue
+            interval = group.interval
+            if not interval or interval >= period:
+                interval = None
+            parameters, tables = intervals.setdefault(interval, ([], {}))
+            if group.bulk and group.type == Group.TABULAR:
+                tables.setdefault(group, []).append(instance.oid)
+                continue
+            parameters.extend(
+                compose_oid(group=group,
+                            parameter=parameter,
+                            instance=instance)
+                for parameter in group.parameters.all()
+            )
+        for interval in sorted(intervals, key=lambda value: value or 0):
+            parameters, tables = intervals[interval]
+            tables = [
+                (
+                    [
+                        '{group.oid}.{parameter.oid}'.format(
+                            group=group, parameter=parameter
+                        )
+                        for parameter in group.parameters.all()
+                    ],
+                    sorted(instances)
+                )
+                for group, instances in tables.items()
+            ]
+            if parameters or tables:
+                yield plan.HostPlan(host.name, host.ip, host.port,
+                                    host.community, parameters, tables,
+                                    host.timeout, host.retries,
+                                    host.shard or None, usm(host), interval)
 
-        parameters = [
-            compose_oid(group=instance.group,
-                        parameter=parameter,
-                        instance=instance)
-            for instance in host.instances.all()
-            for parameter in instance.group.parameters.all()
-            if instance.group.oid
-        ]
-        if parameters:
-            yield host.name, host.ip, host.port, host.community, parameters
+
+def usm(host: Host) -> typing.Optional[snmp.t_usm]:
+    """
+    :param host: host to be polled
+    :return: SNMPv3 user of the host or None if it is polled with SNMPv2c
+    """
+    if not host.security_name:
+        return None
+    return (host.security_name, host.auth_protocol, host.auth_key,
+            host.privacy_protocol, host.privacy_key)
+
+
+poll_plan = plan.PlanCache(aggregator)
 
 
-def compose_oid(group: Group, parameter: Parameter, instance: Instance) -> str:
+def expand_tables(tables: typing.Iterable[t_table]) -> typing.List[str]:
     """
-    Composes OID or OID-like identifier uniquely identifying a sample.
+    Lists OIDs of every single instance of given tables, so they might
+    be collected with GET queries.
 
-    :param group: sample's Group object instance
-    :param parameter: sample's Parameter object instance
-    :param instance: sample's Instance object instance
-    :return: sample's identifier
+    :param tables: tables as produced by aggregator
+    :return: list of OIDs
     """
-    if group.oid:
-        template = '{group.oid}.{parameter.oid}.{instance.oid}'
-    else:
-        template = '{group.name}:{parameter.name}:{instance.name}'
-    return template.format(group=group,
-                           parameter=parameter,
-                           instance=instance)
+    return [
+        '{column}.{instance}'.format(column=column, instance=instance)
+        for columns, instances in tables
+        for column in columns
+        for instance in instances
+    ]
 
 
-def chunks(vector: typing.Sequence) -> typing.Sequence:
+def chunks(vector: typing.Sequence,
+           size: int = SNMP_MAX_PARAMETERS_IN_QUERY) -> typing.Sequence:
     """
-    Slices vector into chunks not longer than
+    Slices vector into chunks not longer than size which defaults to
     SNMP_MAX_PARAMETERS_IN_QUERY constant.
 
     :param vector: possibly too long vector to be chopped
+    :param size: maximal length of a chunk
     :return: slices of vector
     """
-    for i in range(0, len(vector), SNMP_MAX_PARAMETERS_IN_QUERY):
-        yield vector[i:i + SNMP_MAX_PARAMETERS_IN_QUERY]
+    for i in range(0, len(vector), size):
+        yield vector[i:i + size]
+
+
+def budget(timeout: float = None,
+           retries: int = None) -> typing.Tuple[float, int]:
+    """
+    Resolves timeout and retries of a host falling back to SNMP_TIMEOUT
+    and SNMP_RETRIES settings.
+
+    :param timeout: host's timeout in seconds or None
+    :param retries: host's number of retries or None
+    :return: timeout and retries
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'SNMP_TIMEOUT', aiosnmp.SNMP_TIMEOUT)
+    if retries is None:
+        retries = getattr(settings, 'SNMP_RETRIES', aiosnmp.SNMP_RETRIES)
+    return timeout, retries
+
+
+def admit(current_plan: plan.PollPlan) -> typing.List[plan.HostPlan]:
+    """
+    Applies circuit breaker to hosts of the plan. Hosts with open circuit
+    are left out and hosts whose backoff has just expired are reduced to
+    a single chunk of OIDs probing whether they are alive again.
+
+    :param current_plan: compiled settings of all hosts
+    :return: settings of hosts to be polled
+    """
+    states = health.states(
+        (target.ip, target.port) for target in current_plan.hosts
+    )
+    now = time.time()
+    admitted = []
+    probes = []
+    skipped = 0
+    for target in current_plan.hosts:
+        circuit = health.circuit(states.get((target.ip, target.port)), now)
+        if circuit == health.OPEN:
+            skipped += 1
+        elif circuit == health.HALF_OPEN:
+            probes.append(target)
+        else:
+            admitted.append(target)
+
+    sizes = snmp.chunk_sizes((target.ip, target.port) for target in probes)
+    for target in probes:
+        oids = target.parameters + expand_tables(target.tables)
+        admitted.append(target._replace(
+            parameters=oids[:sizes[target.ip, target.port]], tables=[]
+        ))
+    if skipped or probes:
+        logger.info(
+            'Skipped %(skipped)d SNMP hosts with open circuit, '
+            'probing %(probes)d.',
+            {'skipped': skipped, 'probes': len(probes)}
+        )
+    return admitted
+
+
+def exclude_bad_oids(
+        hosts: typing.Sequence[plan.HostPlan]) -> typing.List[plan.HostPlan]:
+    """
+    Leaves OIDs agents are known to fail on out of hosts' parameters.
+
+    :param hosts: settings of hosts to be polled
+    :return: settings of hosts without bad OIDs
+    """
+    bad = snmp.bad_oids((target.ip, target.port) for target in hosts)
+    if not bad:
+        return list(hosts)
+    pruned = []
+    for target in hosts:
+        oids = bad.get((target.ip, target.port))
+        if oids:
+            target = target._replace(parameters=[
+                oid for oid in target.parameters if oid not in oids
+            ])
+        pruned.append(target)
+    return pruned
+
+
+def rounds(hosts: typing.Sequence[plan.HostPlan],
+           delays: typing.Dict[str, float],
+           timestamp: float) -> typing.Iterator:
+    """
+    Splits hosts into rounds of polling within SNMP_INTERVAL. Hosts
+    planned with shorter interval are polled in as many rounds as fit
+    into SNMP_INTERVAL, each delayed by one more interval. Host's delay
+    is reduced modulo its interval, so staggered hosts keep theirs slots
+    within every round. Samples of a round are stamped with time the
+    round starts at, regardless of hosts' delays.
+
+    :param hosts: settings of hosts to be polled
+    :param delays: maps host name to its tasks countdown
+    :param timestamp: start of the polling cycle as seconds from epoch
+    :return: tuples of hosts, each at most once, theirs delays and
+        timestamp of the round
+    """
+    period = scheduling.interval()
+    planned = {}
+    for target in hosts:
+        if not target.interval:
+            planned.setdefault((None, 0), []).append(target)
+            continue
+        for index in range(max(int(period // target.interval), 1)):
+            planned.setdefault((target.interval, index), []).append(target)
+    for (interval, index), targets in planned.items():
+        if interval is None:
+            yield targets, delays, timestamp
+            continue
+        yield targets, {
+            target.name: delays[target.name] % interval + index * interval
+            for target in targets
+        }, timestamp + index * interval
+
+
+def harvest_signatures(current_plan: plan.PollPlan,
+                       hosts: typing.Sequence[plan.HostPlan],
+                       delays: typing.Dict[str, float],
+                       queues: typing.Dict[str, str],
+                       timestamp: float = None) -> typing.Iterator:
+    """
+    Builds chord of snmp_harvester and snmp_walker tasks followed by
+    add_samples task for each host. Parameters are sliced into chunks
+    of size learned separately for each host.
+
+    :param current_plan: compiled settings of all hosts
+    :param hosts: settings of hosts to be polled
+    :param delays: maps host name to its tasks countdown
+    :param queues: maps host name to its shard queue or None
+    :param timestamp: time samples are stamped with, see rounds
+    :return: tuples of delay, number of hosts and signature
+    """
+    sizes = snmp.chunk_sizes((target.ip, target.port) for target in hosts)
+    for target in hosts:
+        host, ip, port, community = target[:4]
+        options = {'timeout': target.timeout, 'retries': target.retries}
+        if target.usm:
+            options['usm'] = target.usm
+        header = [
+            snmp_harvester.s(ip, port, community, parameters_chunk,
+                             **options)
+            for parameters_chunk in current_plan.chunks(target,
+                                                        sizes[ip, port])
+        ]
+        header.extend(
+            snmp_walker.s(ip, port, community, columns, instances,
+                          **options)
+            for columns, instances in target.tables
+        )
+        body = add_samples.s(host=host, timestamp=timestamp)
+        if getattr(settings, 'SAMPLE_BATCH', False):
+            body.set(serializer=SAMPLE_BATCH_SERIALIZER)
+        if delays[host]:
+            for signature in header:
+                signature.set(countdown=delays[host])
+        if queues[host]:
+            for signature in header + [body]:
+                signature.set(queue=queues[host])
+        yield delays[host], 1, celery.chord(header, body)
+
+
+def pipeline_signatures(current_plan: plan.PollPlan,
+                        hosts: typing.Sequence[plan.HostPlan],
+                        delays: typing.Dict[str, float],
+                        queues: typing.Dict[str, str],
+                        timestamp: float = None) -> typing.Iterator:
+    """
+    Builds single snmp_pipeline task for each host. Parameters are
+    sliced into chunks of size learned separately for each host.
+
+    :param current_plan: compiled settings of all hosts
+    :param hosts: settings of hosts to be polled
+    :param delays: maps host name to its tasks countdown
+    :param queues: maps host name to its shard queue or None
+    :param timestamp: time samples are stamped with, see rounds
+    :return: tuples of delay, number of hosts and signature
+    """
+    sizes = snmp.chunk_sizes((target.ip, target.port) for target in hosts)
+    for target in hosts:
+        host, ip, port, community = target[:4]
+        options = {'timeout': target.timeout, 'retries': target.retries}
+        if target.usm:
+            options['usm'] = target.usm
+        signature = snmp_pipeline.s(
+            host, ip, port, community,
+            current_plan.chunks(target, sizes[ip, port]), target.tables,
+            timestamp=timestamp, **options
+        )
+        if delays[host]:
+            signature.set(countdown=delays[host])
+        if queues[host]:
+            signature.set(queue=queues[host])
+        yield delays[host], 1, signature
+
+
+def multiplex_signatures(targets: typing.Sequence[tuple],
+                         delays: typing.Dict[str, float],
+                         queues: typing.Dict[str, str],
+                         timestamp: float = None) -> typing.Iterator:
+    """
+    Builds snmp_multiplexer tasks for batches of SNMP_HOSTS_PER_TASK
+    hosts. Hosts of each shard are batched separately in order of
+    theirs delays and each batch starts with delay of its first host.
+
+    :param targets: list of tuples as produced by aggregator
+    :param delays: maps host name to its tasks countdown
+    :param queues: maps host name to its shard queue or None
+    :param timestamp: time samples are stamped with, see rounds
+    :return: tuples of delay, number of hosts and signature
+    """
+    size = getattr(settings, 'SNMP_HOSTS_PER_TASK', SNMP_HOSTS_PER_TASK)
+    shards = {}
+    for target in targets:
+        shards.setdefault(queues[target[0]], []).append(target)
+    for queue, shard_targets in shards.items():
+        shard_targets.sort(key=lambda target: delays[target[0]])
+        for batch in chunks(shard_targets, size):
+            delay = delays[batch[0][0]]
+            signature = snmp_multiplexer.s(batch, timestamp)
+            if delay:
+                signature.set(countdown=delay)
+            if queue:
+                signature.set(queue=queue)
+            yield delay, len(batch), signature
 
 
 @celery.shared_task
@@ -106,16 +412,88 @@ def snmp_scheduler() -> None:
     Instead of delegating multiple tasks one super task is instantiated
     and such task is scheduled for periodic execution.
 
+    Settings of hosts are taken from poll_plan which is compiled again
+    only when collector configuration changes.
+
+    With SNMP_ENGINE setting set to 'asyncio' hosts are polled in
+    batches by snmp_multiplexer tasks instead of per chunk tasks. The
+    asynchronous engine speaks SNMPv2c only, so SNMPv3 hosts are polled
+    the same way as with synchronous engine. With SNMP_PIPELINE setting
+    set to 'direct' each host is polled by single snmp_pipeline task
+    instead of chord of per chunk tasks, so no result backend is
+    involved.
+
+    With SNMP_STAGGER setting enabled hosts are spread evenly across
+    SNMP_INTERVAL instead of being polled all at once. Each host is
+    delayed by offset derived from its name, so it keeps its slot from
+    one run to another, and planned load of the interval is logged.
+
+    With SNMP_BREAKER setting enabled hosts which failed to respond to
+    SNMP_BREAKER_THRESHOLD queries in a row are not polled until theirs
+    backoff expires.
+
+    With SNMP_SHARDS setting listing Celery queues polling tasks of each
+    host are routed to one of them by consistent hashing of host name
+    unless the host has its shard set explicitly.
+
+    OIDs which agents answered with an error are not queried again
+    until SNMP_BAD_OIDS_TTL expires.
+
+    Groups with interval shorter than SNMP_INTERVAL are polled several
+    times per run, see rounds.
+
+    Samples are stamped with time the run (or its round) starts at
+    instead of time they are stored at, so neither host's delay nor
+    slow polling moves them into the next minute.
+
     http://docs.celeryproject.org/en/latest/userguide/configuration.html#beat-schedule
     """
-    celery.group(
-        celery.chord(
-            (snmp_harvester.s(ip, port, community, parameters_chunk)
-             for parameters_chunk in chunks(parameters)),
-            add_samples.s(host=host)
+    current_plan = poll_plan.get()
+    hosts = current_plan.hosts
+    if health.breaker_enabled():
+        hosts = admit(current_plan)
+    hosts = exclude_bad_oids(hosts)
+    stagger = scheduling.stagger_enabled()
+    delays = {
+        target.name: scheduling.countdown(target.name) if stagger else 0
+        for target in hosts
+    }
+    queues = {
+        target.name: sharding.route(target.name, target.shard)
+        for target in hosts
+    }
+    timestamp = (datetime.datetime.utcnow() - EPOCH).total_seconds()
+    planned = []
+    for round_hosts, round_delays, round_timestamp in rounds(hosts, delays,
+                                                             timestamp):
+        if getattr(settings, 'SNMP_ENGINE', 'sync') == 'asyncio':
+            planned.extend(multiplex_signatures(
+                [target for target in round_hosts if not target.usm],
+                round_delays, queues, round_timestamp
+            ))
+            round_hosts = [target for target in round_hosts if target.usm]
+        if getattr(settings, 'SNMP_PIPELINE', 'chord') == 'direct':
+            planned.extend(pipeline_signatures(current_plan, round_hosts,
+                                               round_delays, queues,
+                                               round_timestamp))
+        else:
+            planned.extend(harvest_signatures(current_plan, round_hosts,
+                                              round_delays, queues,
+                                              round_timestamp))
+
+    if stagger:
+        period = scheduling.interval()
+        profile = scheduling.load_profile(
+            ((delay, hosts) for delay, hosts, _signature in planned),
+            period,
+            getattr(settings, 'SNMP_STAGGER_BUCKETS',
+                    scheduling.SNMP_STAGGER_BUCKETS)
+        )
+        logger.info(
+            'Planned SNMP polling of hosts: %(profile)s.',
+            {'profile': scheduling.describe_profile(profile, period)}
         )
-        for host, ip, port, community, parameters in aggregator()
-    ).delay()
+    celery.group(signature for *_, signature in planned).delay()
 
 
 class ResultPacker:
@@ -124,69 +502,64 @@ class ResultPacker:
     with the same sets of tags.
     """
     def __init__(self, host: Host,
-                 mapping: typing.Dict[str, t_sample_value]) -> None:
+                 mapping: typing.Dict[str, t_sample_value],
+                 schema: HostSchema = None) -> None:
         """
         Constructor of new ResultPacker objects.
 
         :param host: Host object which samples belong to.
         :param mapping: maps OID-like sample identifiers to theirs value
+        :param schema: compiled schema of the host, looked up in schemas
+            if None
         """
         self.host = host
         self.mapping = mapping
-        self._global_tags = None
+        self._schema = schema
+        self._last_values = None
 
     @classmethod
-    def snmp(cls, host: Host, samples: t_snmp_samples):
+    def snmp(cls, host: Host, samples: t_snmp_samples,
+             schema: HostSchema = None):
         """
         Alternative "constructor" for SNMP samples adjusting
         theirs structure before calling actual constructor.
 
         :param host: Host object which samples belong to.
         :param samples: chunks of SNMP samples
+        :param schema: compiled schema of the host
         :return: ResultPacker instance
         """
         mapping = {
             oid: value
             for sample in samples
-            for oid, value in sample
+            for oid, value in load_samples(sample)
         }
-        return cls(host, mapping)
+        return cls(host, mapping, schema)
 
     @classmethod
-    def http(cls, host: Host, samples: t_http_samples):
+    def http(cls, host: Host, samples: t_http_samples,
+             schema: HostSchema = None):
         """
         Alternative "constructor" for HTTP samples adjusting
         theirs structure before calling actual constructor.
 
         :param host: Host object which samples belong to.
         :param samples: chunks of HTTP samples
+        :param schema: compiled schema of the host, looked up in schemas
+            if None
         :return: ResultPacker instance
         """
+        schema = schema or schemas.get(host.name)
         mapping = {}
-        samples_tree = {}
-        missing = []
-        for parameter, instance, value in samples:
+        unknown = []
+        for parameter, instance, value in load_samples(samples):
             try:
-                samples_tree[parameter][instance] = value
+                mapping[schema.names[parameter, instance]] = value
             except KeyError:
-                samples_tree[parameter] = {instance: value}
-
-        for instance in host.instances.all():
-            for parameter in instance.group.parameters.all():
-                try:
-                    value = samples_tree[parameter.name].pop(instance.name)
-                except KeyError:
-                    missing.append([parameter.name, instance.name])
-                else:
-                    oid = compose_oid(
-                        group=instance.group,
-                        parameter=parameter,
-                        instance=instance)
-                    mapping[oid] = value
-        unknown = [
-            [parameter, instance]
-            for parameter, instances in samples_tree.items()
-            for instance in instances
+                unknown.append([parameter, instance])
+        missing = [
+            list(names) for names, oid in schema.names.items()
+            if oid not in mapping
         ]
         if missing:
             elements = ', '.join('#'.join(row) for row in missing)
@@ -199,140 +572,218 @@ class ResultPacker:
                 'Unknown samples: {elements}.'.format(elements=elements)
             )
 
-        return cls(host, mapping)
+        return cls(host, mapping, schema)
 
     @property
-    def global_tags(self) -> typing.Dict[str, t_sample_value]:
+    def schema(self) -> HostSchema:
+        """
+        :return: compiled schema of host's samples, cached by schemas
         """
-        Host specific tags comes from scalar indexing parameters,
-        host name and tags themselves.
+        if self._schema is None:
+            self._schema = schemas.get(self.host.name)
+        return self._schema
 
-        :return: tags as name to value mapping
+    @property
+    def last_values(self) -> deadband.LastValues:
         """
-        if self._global_tags is not None:
-            return self._global_tags
-        tags = {tag_value.tag_id: tag_value.value
-                for tag_value in self.host.tag_values.all()}
-        tags['host'] = self.host.name
-        for instance in self.host.instances.all():
-            if instance.group.type == Group.SCALAR:
-                tags.update(self.values_for_instance(instance, True))
-        self._global_tags = tags
-        return tags
-
-    def tags(self, instance) -> typing.Dict[str, t_sample_value]:
+        Last written values of host's samples subject to write policies,
+        fetched from cache on first use.
+
+        :return: LastValues object
         """
-        Instance specific tags - host tags enriched with instance name
-        and tabular indexing parameters.
+        if self._last_values is None:
+            self._last_values = deadband.LastValues(self.host.name,
+                                                    self.schema.policies)
+        return self._last_values
 
-        :param instance: Host's parameters Instance object
-        :return: tags as name to value mapping
+    def save_last_values(self) -> None:
+        """
+        Stores values of samples subject to write policies serialized
+        since the last save as last written ones. Called once theirs
+        points are written or spooled, so values of failed writes are
+        written again.
         """
-        t = dict(self.global_tags)
-        if instance.group.type == Group.TABULAR:
-            t.update(self.values_for_instance(instance, True))
-            t['instance'] = instance.name
-        return t
+        if self._last_values is not None:
+            self._last_values.save()
 
-    def fields(self, instance) -> typing.Dict[str, t_sample_value]:
+    def pack(self) -> typing.Tuple[typing.Optional[typing.Dict[str, str]],
+                                   typing.Dict[int, list],
+                                   typing.Dict[int, list]]:
         """
-        Instance specific fields - samples which are not considered as
-        indexing parameters.
+        Sorts samples into tags and fields of points in a single pass
+        over them. Samples which are not indexed by host's schema are
+        left in mapping, non-indexing samples which have not changed
+        enough according to theirs parameter's write policy are skipped.
 
-        :param instance: Host's parameters Instance object
-        :return: fields as name to value mapping
+        :return: host's tags if overridden by scalar indexing samples,
+            None otherwise, tags and fields of points by theirs index
         """
-        return dict(self.values_for_instance(instance, False))
+        samples = self.schema.samples
+        host_tags = []
+        tags = {}
+        fields = {}
+        unknown = {}
+        for oid, value in self.mapping.items():
+            try:
+                sample = samples[oid]
+            except KeyError:
+                unknown[oid] = value
+                continue
+            point, name, key, caster, formatter, indexing, tabular, \
+                parameter = sample
+            try:
+                if indexing or parameter is not None:
+                    encoded = self.encode(oid, sample, value)
+                else:
+                    encoded = key + formatter(value)
+            except (ValueError, TypeError):
+                self.cast_error(value, caster)
+                continue
+            if indexing:
+                point_tags = tags.setdefault(point, []) if tabular \
+                    else host_tags
+                point_tags.append((name, encoded))
+            elif encoded is not None:
+                fields.setdefault(point, []).append((name, encoded))
+        self.mapping = unknown
+        if not host_tags:
+            return None, tags, fields
+        overridden = dict(self.schema.tags)
+        apply_tags(overridden, host_tags)
+        return overridden, tags, fields
 
-    def values_for_instance(self, instance: Instance,
-                            indexing: bool) -> typing.Iterator[t_snmp_sample]:
+    def encode(self, oid: str, sample: Sample,
+               value: t_sample_value) -> typing.Optional[str]:
+        """
+        :param oid: sample's identifier
+        :param sample: compiled sample
+        :param value: sample's value
+        :return: tag pair of indexing sample (None if empty), field of
+            the other ones (None if not worth writing)
+        :raises ValueError: if value cannot be cast
+        :raises TypeError: if value cannot be cast
         """
-        Iterates through parameters of given instance and casts
-        gathered values.
+        value = sample.caster(value)
+        if sample.indexing:
+            return lineprotocol.tag(sample.name, value)
+        if not self.last_values.changed(sample.parameter, oid, value):
+            return None
+        return sample.key + sample.formatter(value)
 
-        :param instance: process parameters for this instance only
-        :param indexing: process indexing or non-indexing parameters
-        :return: tuple of parameter name and value
+    @staticmethod
+    def cast_error(value: typing.Any, caster: typing.Callable) -> None:
+        logger.error(
+            'Cannot cast %(value)s of %(actual_type)s to %(target_type)s.',
+            {
+                'value': value,
+                'target_type': caster.__name__,
+                'actual_type': type(value).__name__
+            }
+        )
+
+    def serialize(self, buffer: lineprotocol.LineBuffer, timestamp: float,
+                  default_precision: str) -> str:
         """
-        for parameter in instance.group.parameters.all():
-            oid = compose_oid(
-                group=instance.group,
-                parameter=parameter,
-                instance=instance
+        Serializes a point of every instance having some fields. Time of
+        each point is floored to precision of its group and all of them
+        are written in the finest of these precisions.
+
+        :param buffer: buffer to append points to
+        :param timestamp: seconds from epoch
+        :param default_precision: precision of groups not having one
+        :return: time precision of the points
+        """
+        host_schema = self.schema
+        host_tags, tags, fields = self.pack()
+        if not fields:
+            return default_precision
+        precisions = {}
+        for index in fields:
+            group = host_schema.points[index].group
+            if group.name not in precisions:
+                precisions[group.name] = sample_precision(group,
+                                                          default_precision)
+        time_precision = lineprotocol.finest(precisions.values())
+        times = {
+            group_precision: lineprotocol.encode_time(
+                timestamp, group_precision, time_precision
+            )
+            for group_precision in set(precisions.values())
+        }
+        for index in sorted(fields):
+            point = host_schema.points[index]
+            buffer.append(
+                host_schema.series(point, host_tags, tags.get(index, ())),
+                ','.join(text for _name, text in sorted(fields[index])),
+                times[precisions[point.group.name]]
             )
-            if oid in self.mapping and parameter.indexing == indexing:
-                value = self.mapping.pop(oid)
-                target_type = casters[parameter.type]
-
-                try:
-                    yield parameter.name, target_type(value)
-                except (ValueError, TypeError):
-                    logger.error(
-                        'Cannot cast %(value)s of %(actual_type)s '
-                        'to %(target_type)s.',
-                        {
-                            'value': value,
-                            'target_type': target_type.__name__,
-                            'actual_type': type(value).__name__
-                        }
-                    )
+        return time_precision
+
+
+def sample_precision(group: Group, default: str) -> str:
+    """
+    Group's precision defaults to INFLUXDB_PRECISION unless the group is
+    polled more often, samples of such group are stored with precision
+    of seconds at least.
+
+    :param group: group of samples
+    :param default: INFLUXDB_PRECISION setting
+    :return: time precision of group's samples
+    """
+    if group.precision:
+        return group.precision
+    if group.interval and group.interval * 10 ** 9 < \
+            lineprotocol.PRECISIONS[default]:
+        return lineprotocol.finest([default, 's'])
+    return default
 
 
 @celery.shared_task
 def add_samples(samples: t_samples, host: str, mode: bool = True,
                 timestamp: float = None) -> None:
     """
-    Inserts multiple samples into database in a single query.
+    Inserts multiple samples into database in a single query. With
+    INFLUXDB_BUFFER setting enabled points are queued in worker's
+    write_buffer to be written together with points of other hosts.
+    With INFLUXDB_SPOOL_DIR setting points which cannot be written are
+    spooled to disk instead of failing the task. Timestamps are floored
+    to minutes unless INFLUXDB_PRECISION setting or samples' group says
+    otherwise. Host's configuration is read from worker's schemas, so
+    in steady state no database queries are made.
 
     :param host: host name
-    :param samples: list of pairs: parameter name and its value
+    :param samples: list of pairs: parameter name and its value, or
+        serialized SampleBatch objects, see queue_samples
     :param mode: indicates origin of samples: True - SNMP, False - HTTP
     :param timestamp: timestamp as seconds from epoch
     """
     try:
-        host = Host.objects.prefetch_related(
-            'tag_values', 'instances', 'instances__group',
-            'instances__group__parameters'
-        ).get(name=host)
+        host_schema = schemas.get(host)
     except Host.DoesNotExist:
         logger.error('Host {host} was not found.'.format(host=host))
         return
+    host = host_schema.host
 
     if timestamp is None:
         timestamp = (datetime.datetime.utcnow() - EPOCH).total_seconds()
     if mode:
-        packer = ResultPacker.snmp(host, samples)
+        packer = ResultPacker.snmp(host, samples, host_schema)
     else:
-        packer = ResultPacker.http(host, samples)
-
-    client = InfluxDBClient(
-        host=settings.INFLUXDB_HOST,
-        port=getattr(settings, 'INFLUXDB_PORT', INFLUXDB_PORT),
-        username=settings.INFLUXDB_USERNAME,
-        password=settings.INFLUXDB_PASSWORD,
-        database=getattr(settings, 'INFLUXDB_DATABASE', INFLUXDB_DATABASE)
-    )
+        packer = ResultPacker.http(host, samples, host_schema)
 
-    tt = int(timestamp / 60)
-    points = []
-    for instance in host.instances.all():
-        fields = packer.fields(instance)
-        tags = packer.tags(instance)
-        if fields:
-            points.append(
-                {
-                    'measurement': instance.group.name,
-                    'time': tt,
-                    'fields': fields,
-                    'tags': tags
-                }
-            )
-    if points:
-        client.write_points(
-            points=points,
-            time_precision='m',
-            batch_size=INFLUXDB_BATCH_SIZE
-        )
+    points = lineprotocol.local_buffer()
+    time_precision = packer.serialize(
+        points, timestamp,
+        getattr(settings, 'INFLUXDB_PRECISION', INFLUXDB_PRECISION)
+    )
+    if points.points and getattr(settings, 'INFLUXDB_BUFFER', False):
+        write_buffer.add(points, time_precision=time_precision,
+                         written=packer.save_last_values)
+    elif points.points:
+        write = write_spool.write if write_spool else influx.write_lines
+        for batch in points.batches(INFLUXDB_BATCH_SIZE):
+            write(batch, time_precision=time_precision)
+        packer.save_last_values()
 
     not_indexed_fields = set(packer.mapping.keys())
     if not_indexed_fields:
@@ -345,36 +796,352 @@ def add_samples(samples: t_samples, host: str, mode: bool = True,
         )
 
 
+def dump_samples(task: celery.Task,
+                 samples: t_snmp_samples_chunk) -> t_snmp_samples_chunk:
+    """
+    Serializes samples returned by task as SampleBatch with SAMPLE_BATCH
+    setting enabled, unless the task is called directly (e.g. by
+    snmp_pipeline) and its result does not leave the worker.
+
+    :param task: snmp_harvester or snmp_walker task
+    :param samples: pairs of OID and value
+    :return: samples or serialized SampleBatch of them
+    """
+    if task.request.called_directly or \
+            not getattr(settings, 'SAMPLE_BATCH', False):
+        return samples
+    return SampleBatch().extend(samples).dumps()
+
+
+def queue_samples(samples: t_samples, host: str, mode: bool = True,
+                  timestamp: float = None) -> AsyncResult:
+    """
+    Queues add_samples task. With SAMPLE_BATCH setting enabled samples
+    are sent as a single SampleBatch in message serialized with msgpack.
+
+    :param samples: chunks of SNMP samples or HTTP samples
+    :param host: host name
+    :param mode: indicates origin of samples: True - SNMP, False - HTTP
+    :param timestamp: timestamp as seconds from epoch
+    :return: result of queued task
+    """
+    options = {'host': host, 'mode': mode, 'timestamp': timestamp}
+    if not getattr(settings, 'SAMPLE_BATCH', False):
+        return add_samples.delay(samples, **options)
+    if mode:
+        samples = itertools.chain.from_iterable(samples)
+    data = SampleBatch(mode).extend(samples).dumps()
+    return add_samples.apply_async(([data] if mode else data,), options,
+                                   serializer=SAMPLE_BATCH_SERIALIZER)
+
+
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def flush_write_buffer(**_kwargs) -> None:
+    """
+    Writes points buffered by a worker which is shutting down and logs
+    how much it has written. Points which cannot be written are left
+    in the spool for the next worker.
+    """
+    write_buffer.flush()
+    totals = influx.traffic.totals()
+    if totals['writes']:
+        logger.info(
+            'Wrote %(bytes)d bytes of points to InfluxDB in %(writes)d '
+            'requests, %(sent_bytes)d bytes sent.',
+            totals
+        )
+    if write_spool is not None:
+        write_spool.close()
+        logger.info(
+            'Spooled %(spooled)d points, replayed %(replayed)d and dropped '
+            '%(dropped)d of them, %(segments)d segments (%(bytes)d bytes) '
+            'left.',
+            write_spool.stats()
+        )
+
+
+@signals.worker_process_init.connect
+def start_spool(**_kwargs) -> None:
+    """
+    Starts replaying spooled points in every pool process, so points
+    left by a crashed or restarted worker are written as soon as
+    InfluxDB accepts them.
+    """
+    if write_spool is not None:
+        write_spool.start()
+
+
+@signals.worker_init.connect
+def warm_schemas(**_kwargs) -> None:
+    """
+    Compiles schemas of all hosts when worker starts, before it forks
+    pool processes, so they write first samples without querying
+    database. Worker starts anyway if configuration cannot be loaded.
+    Schemas are invalidated through Django cache, so worker warns if it
+    is not shared with admin (Celery does not run system checks).
+    """
+    for message in checks.check_cache():
+        logger.warning('%(message)s %(hint)s',
+                       {'message': message.msg, 'hint': message.hint})
+    try:
+        hosts = schemas.warm()
+    except Exception:
+        logger.exception('Could not load configuration of hosts.')
+    else:
+        logger.info('Loaded configuration of %(hosts)d hosts.',
+                    {'hosts': hosts})
+    finally:
+        connections.close_all()
+
+
 @celery.shared_task
 def snmp_harvester(ip: str, port: int, community: str,
-                   parameters: typing.Iterable[str]) -> t_snmp_samples_chunk:
+                   parameters: typing.Iterable[str], timeout: float = None,
+                   retries: int = None,
+                   usm: typing.Sequence[str] = None) -> t_snmp_samples_chunk:
     """
     Fires SNMP GET query at endpoint defined by ip and port. The query
-    consists all of OIDs defined in parameters argument.
+    consists all of OIDs defined in parameters argument. SNMP engine and
+    transport target are taken from worker's engine_pool. OIDs are sent
+    and received without MIB resolution.
+
+    Query answered with tooBig error is split in halves which are sent
+    separately. When any other error points at a var-bind its OID is
+    remembered as bad for the host and the rest of the query is sent
+    again. Outcome of every query adjusts chunk size learned for the
+    host, health state is updated once with outcome of all of them.
 
     :param ip: host IP address
     :param port: SNMP port number
     :param community: community name
     :param parameters: list of OIDs
+    :param timeout: response timeout in seconds, see budget
+    :param retries: number of retries, see budget
+    :param usm: SNMPv3 user, see snmp.usm_user_data, community is used
+        if None
     :returns: samples as list of pairs: OID and its collected value
     """
-    if ipaddress.ip_address(ip).version == 4:
-        transport = UdpTransportTarget
-    else:
-        transport = Udp6TransportTarget
-
-    result = getCmd(
-        SnmpEngine(),
-        CommunityData(community, mpModel=1),
-        transport((ip, port)),
-        ContextData(),
-        *[ObjectType(ObjectIdentity(oid)) for oid in parameters]
-    )
+    samples = []
+    pending = [list(parameters)]
+    answered = failed = False
+    timeout, retries = budget(timeout, retries)
+    with engine_pool.session(ip, port, community, timeout, retries,
+                             usm) as (engine, auth_data, transport_target):
+        while pending:
+            chunk = pending.pop()
+            error_indication, error_status, error_index, var_binds = \
+                snmp.get_cmd(engine, auth_data, transport_target, chunk)
 
-    _error_indication, _error_status, _error_index, var_binds = next(result)
+            if error_status == SNMP_TOO_BIG and len(chunk) > 1:
+                snmp.learn_chunk_size(ip, port, len(chunk), too_big=True)
+                half = len(chunk) // 2
+                pending.extend([chunk[half:], chunk[:half]])
+                continue
 
-    return [
-        (str(name), value._value)
-        for name, value in var_binds
-        if not isinstance(value, Null)
+            # error-index counts var-binds from 1, 0 means none of them
+            error_index = int(error_index)
+            if not error_indication and error_status and \
+                    0 < error_index <= len(chunk):
+                bad = chunk[error_index - 1]
+                logger.info(
+                    'SNMP agent %(ip)s:%(port)s failed on %(oid)s: '
+                    '%(error)s.',
+                    {'ip': ip, 'port': port, 'oid': bad,
+                     'error': error_status.prettyPrint()}
+                )
+                snmp.remember_bad_oid(ip, port, bad)
+                answered = True
+                remainder = [oid for oid in chunk if oid != bad]
+                if remainder:
+                    pending.append(remainder)
+                continue
+
+            chunk_samples = [
+                (oid, value._value)
+                for oid, value in var_binds
+                if not isinstance(value, Null)
+            ]
+            if error_indication:
+                logger.warning(
+                    'SNMP query of %(ip)s:%(port)s failed: %(error)s.',
+                    {'ip': ip, 'port': port, 'error': error_indication}
+                )
+                failed = True
+            else:
+                answered = True
+            if isinstance(error_indication, errind.RequestTimedOut):
+                snmp.learn_chunk_size(ip, port, len(chunk))
+            elif not error_indication:
+                snmp.learn_chunk_size(
+                    ip, port, len(chunk),
+                    snmp.response_size(community, chunk_samples,
+                                       bool(usm))
+                )
+            samples.extend(chunk_samples)
+    if answered or failed:
+        health.record(ip, port, answered)
+    return dump_samples(snmp_harvester, samples)
+
+
+@celery.shared_task
+def snmp_walker(ip: str, port: int, community: str,
+                columns: typing.Sequence[str],
+                instances: typing.Sequence[int], timeout: float = None,
+                retries: int = None,
+                usm: typing.Sequence[str] = None) -> t_snmp_samples_chunk:
+    """
+    Walks table columns with SNMP GETBULK queries at endpoint defined by
+    ip and port. Rows are matched with instances by index suffix and
+    the walk stops as soon as all of instances are found. Number of rows
+    fetched at once is controlled with SNMP_MAX_REPETITIONS setting.
+
+    :param ip: host IP address
+    :param port: SNMP port number
+    :param community: community name
+    :param columns: list of column OIDs
+    :param instances: list of instance OIDs
+    :param timeout: response timeout in seconds, see budget
+    :param retries: number of retries, see budget
+    :param usm: SNMPv3 user, see snmp.usm_user_data
+    :returns: samples as list of pairs: OID and its collected value
+    """
+    wanted = set(instances)
+    remaining = set(wanted)
+    samples = []
+    max_repetitions = getattr(settings, 'SNMP_MAX_REPETITIONS',
+                              SNMP_MAX_REPETITIONS)
+    timeout, retries = budget(timeout, retries)
+    with engine_pool.session(ip, port, community, timeout, retries,
+                             usm) as (engine, auth_data, transport_target):
+        rows = snmp.bulk_cmd(engine, auth_data, transport_target, columns,
+                             max_repetitions)
+        for error_indication, error_status, _error_index, var_binds in rows:
+            if error_indication:
+                logger.warning(
+                    'SNMP walk of %(ip)s:%(port)s failed: %(error)s.',
+                    {'ip': ip, 'port': port, 'error': error_indication}
+                )
+                health.record(ip, port, False)
+                return dump_samples(snmp_walker, samples)
+            if error_status:
+                break
+            for column, (name, value) in zip(columns, var_binds):
+                oid = str(name)
+                index = oid[len(column) + 1:]
+                if not index.isdigit() or int(index) not in wanted or \
+                        isinstance(value, Null):
+                    continue
+                samples.append((oid, value._value))
+                remaining.discard(int(index))
+            if not remaining:
+                break
+    health.record(ip, port, True)
+    return dump_samples(snmp_walker, samples)
+
+
+@celery.shared_task(ignore_result=True)
+def snmp_pipeline(host: str, ip: str, port: int, community: str,
+                  parameters_chunks: typing.Iterable[typing.Sequence[str]],
+                  tables: typing.Iterable[t_table], timeout: float = None,
+                  retries: int = None, usm: typing.Sequence[str] = None,
+                  timestamp: float = None) -> None:
+    """
+    Polls all chunks and tables of a host one after another and stores
+    samples within the same task. Unlike chord of snmp_harvester and
+    snmp_walker tasks nothing is passed through result backend.
+
+    :param host: host name
+    :param ip: host IP address
+    :param port: SNMP port number
+    :param community: community name
+    :param parameters_chunks: lists of OIDs queried at once
+    :param tables: tables as produced by aggregator
+    :param timeout: response timeout in seconds, see budget
+    :param retries: number of retries, see budget
+    :param usm: SNMPv3 user, see snmp.usm_user_data
+    :param timestamp: timestamp as seconds from epoch, time of storing
+        samples if None
+    """
+    samples = [
+        snmp_harvester(ip, port, community, parameters_chunk,
+                       timeout=timeout, retries=retries, usm=usm)
+        for parameters_chunk in parameters_chunks
     ]
+    samples.extend(
+        snmp_walker(ip, port, community, columns, instances,
+                    timeout=timeout, retries=retries, usm=usm)
+        for columns, instances in tables
+    )
+    add_samples(samples, host=host, timestamp=timestamp)
+
+
+@celery.shared_task
+def snmp_multiplexer(targets: typing.Sequence[tuple],
+                     timestamp: float = None) -> None:
+    """
+    Polls many hosts at once with asynchronous SNMP engine and queues
+    samples of each host for storage. Concurrency, timeout and retries
+    are controlled with SNMP_CONCURRENCY, SNMP_TIMEOUT and SNMP_RETRIES
+    settings which hosts might override. Tables are collected with GET
+    queries of theirs instances. With SNMP_BUILTIN_CODEC setting enabled
+    messages are encoded and decoded by collector.codec instead of
+    pysnmp.
+
+    :param targets: list of tuples as produced by aggregator
+    :param timestamp: timestamp as seconds from epoch, time of storing
+        samples if None
+    """
+    hosts = []
+    requests = []
+    sizes = snmp.chunk_sizes((ip, port) for _host, ip, port, *_ in targets)
+    for (host, ip, port, community, parameters, tables, timeout, retries,
+         *_) in targets:
+        for parameters_chunk in chunks(parameters + expand_tables(tables),
+                                       sizes[ip, port]):
+            hosts.append(host)
+            requests.append((ip, port, community, parameters_chunk, timeout,
+                             retries))
+
+    poller = aiosnmp.AsyncPoller(
+        concurrency=getattr(settings, 'SNMP_CONCURRENCY',
+                            aiosnmp.SNMP_CONCURRENCY),
+        timeout=getattr(settings, 'SNMP_TIMEOUT', aiosnmp.SNMP_TIMEOUT),
+        retries=getattr(settings, 'SNMP_RETRIES', aiosnmp.SNMP_RETRIES),
+        builtin_codec=getattr(settings, 'SNMP_BUILTIN_CODEC', False)
+    )
+    samples = {}
+    answered = {}
+    for host, request, samples_chunk in zip(hosts, requests,
+                                            poller.poll(requests)):
+        ip, port, community, parameters_chunk, *_ = request
+        answered.setdefault((ip, port), False)
+        if samples_chunk is None:
+            snmp.learn_chunk_size(ip, port, len(parameters_chunk))
+            continue
+        answered[ip, port] = True
+        snmp.learn_chunk_size(ip, port, len(parameters_chunk),
+                              snmp.response_size(community, samples_chunk))
+        if samples_chunk:
+            samples.setdefault(host, []).append(samples_chunk)
+
+    for (ip, port), endpoint_answered in answered.items():
+        health.record(ip, port, endpoint_answered)
+    for host, host_samples in samples.items():
+        queue_samples(host_samples, host, timestamp=timestamp)
+
+
+@celery.shared_task(ignore_result=True)
+def sync_continuous_queries() -> None:
+    """
+    Brings downsampling continuous queries in line with groups and
+    parameters after they have changed.
+    """
+    cache.delete(downsampling.SYNC_KEY)
+    created, dropped = downsampling.sync(influx.pool.client())
+    if created or dropped:
+        logger.info(
+            'Created %(created)d and dropped %(dropped)d continuous '
+            'queries.',
+            {'created': len(created), 'dropped': len(dropped)}
+        )
@@ -88,6 +88,55 @@ class ParameterCollisionForm(TestCase):
         self.assertTrue(form.is_valid())
 
 
+class HostFormTests(TestCase):
+    """
+    Tests HostForm customizations.
+    """
+
+    data = {
+        'name': 'spam',
+        'ip': '10.0.0.1',
+        'port': 161,
+        'community': '',
+        'security_name': 'watcheye',
+        'auth_protocol': 'SHA',
+        'auth_key': 'authentication',
+        'privacy_protocol': 'AES128',
+        'privacy_key': 'privacy-key'
+    }
+
+    def test_usm(self):
+        """
+        SNMPv3 user with long enough passphrases is accepted.
+        """
+        form = admin.HostForm(data=self.data)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_short_passphrase(self):
+        """
+        Passphrases shorter than 8 characters are rejected.
+        """
+        form = admin.HostForm(data=dict(self.data, privacy_key='short'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('privacy_key', form.errors)
+
+    def test_privacy_without_auth(self):
+        """
+        Privacy without authentication is rejected.
+        """
+        form = admin.HostForm(data=dict(self.data, auth_protocol=''))
+        self.assertFalse(form.is_valid())
+        self.assertIn('privacy_protocol', form.errors)
+
+    def test_missing_security_name(self):
+        """
+        SNMPv3 protocols require a security name.
+        """
+        form = admin.HostForm(data=dict(self.data, security_name=''))
+        self.assertFalse(form.is_valid())
+        self.assertIn('security_name', form.errors)
+
+
 class InstanceFormTests(TestCase):
     """
     Tests InstanceForm customizations.
@@ -0,0 +1,103 @@
+from unittest import TestCase
+
+from pyasn1.type.univ import Integer, Null
+
+from .test_codec import encode_response
+from .utils import SnmpResponder
+from ..aiosnmp import AsyncPoller, decode_builtin, decode_pysnmp
+
+OIDS = ['1.3.6.1.2.1.6.9.0', '1.3.6.1.2.1.6.12.0']
+
+
+class AsyncPollerTests(TestCase):
+    def test_poll(self):
+        """
+        Tests if all requests are answered and responses are matched
+        with requests they belong to.
+        """
+        with SnmpResponder(Integer, 1) as first, \
+                SnmpResponder(Integer, 2) as second:
+            poller = AsyncPoller(timeout=1, retries=0)
+            results = poller.poll(
+                [
+                    ('127.0.0.1', first.port, 'watcheye', OIDS),
+                    ('127.0.0.1', second.port, 'watcheye', OIDS[:1])
+                ]
+            )
+        self.assertEqual(
+            results,
+            [
+                [(OIDS[0], 1), (OIDS[1], 1)],
+                [(OIDS[0], 2)]
+            ]
+        )
+
+    def test_retry(self):
+        """
+        Tests if request is resent when response does not come in time.
+        """
+        with SnmpResponder(Integer, 1, drop=1) as responder:
+            poller = AsyncPoller(timeout=0.1, retries=1)
+            results = poller.poll([('127.0.0.1', responder.port, 'c', OIDS)])
+        self.assertEqual(responder.requests, 2)
+        self.assertEqual(results, [[(OIDS[0], 1), (OIDS[1], 1)]])
+
+    def test_timeout(self):
+        """
+        Tests if silent host results in None instead of samples.
+        """
+        with SnmpResponder(Integer, 1, drop=2) as responder:
+            poller = AsyncPoller(timeout=0.05, retries=1)
+            results = poller.poll([('127.0.0.1', responder.port, 'c', OIDS)])
+        self.assertEqual(results, [None])
+
+    def test_null_values(self):
+        """
+        Tests if values of Null type are discarded.
+        """
+        with SnmpResponder(Null, '') as responder:
+            poller = AsyncPoller(timeout=1, retries=0)
+            results = poller.poll([('127.0.0.1', responder.port, 'c', OIDS)])
+        self.assertEqual(results, [[]])
+
+    def test_concurrency(self):
+        """
+        Tests if number of requests exceeding concurrency limit are
+        all eventually answered.
+        """
+        with SnmpResponder(Integer, 1) as responder:
+            poller = AsyncPoller(concurrency=2, timeout=1, retries=0)
+            results = poller.poll(
+                [('127.0.0.1', responder.port, 'c', OIDS)] * 10
+            )
+        self.assertEqual(responder.requests, 10)
+        self.assertEqual(len([r for r in results if r]), 10)
+
+    def test_too_big(self):
+        """
+        Tests if request answered with tooBig error is split in halves.
+        """
+        with SnmpResponder(Integer, 1, max_var_binds=1) as responder:
+            poller = AsyncPoller(timeout=1, retries=0)
+            results = poller.poll([('127.0.0.1', responder.port, 'c', OIDS)])
+        self.assertEqual(responder.requests, 3)
+        self.assertEqual(results, [[(OIDS[0], 1), (OIDS[1], 1)]])
+
+    def test_builtin_codec(self):
+        """
+        Tests if poller with built-in codec gets the same results.
+        """
+        with SnmpResponder(Integer, 1, max_var_binds=1) as responder:
+            poller = AsyncPoller(timeout=1, retries=0, builtin_codec=True)
+            results = poller.poll([('127.0.0.1', responder.port, 'c', OIDS)])
+        self.assertEqual(results, [[(OIDS[0], 1), (OIDS[1], 1)]])
+
+    def test_builtin_codec_fallback(self):
+        """
+        Tests if message not supported by built-in codec is decoded by
+        pysnmp.
+        """
+        data = encode_response([(OIDS[0], Integer(1))])
+        indefinite = b'\x30\x80' + data[2:] + b'\x00\x00'
+        self.assertEqual(decode_builtin(indefinite), decode_pysnmp(data))
+        self.assertEqual(decode_builtin(indefinite)[3], [(OIDS[0], 1)])
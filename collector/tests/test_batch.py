@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from pyasn1.type.univ import Integer
+
+from .. import batch, tasks
+from .utils import get_cmd_factory
+
+
+class SampleBatchTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_snmp(self):
+        """
+        Tests if SNMP samples come back from serialized batch as they
+        were appended, values of all types included.
+        """
+        samples = [
+            ('1.3.6.1.2.1.2.2.1.10.1', 1),
+            ('1.3.6.1.2.1.2.2.1.10.2', 2 ** 64 - 1),
+            ('1.3.6.1.2.1.2.2.1.10.3', -5),
+            ('1.3.6.1.2.1.2.2.1.2.1', b'eth0'),
+            ('1.3.6.1.2.1.2.2.1.2.2', 'eth1'),
+            ('1.3.6.1.2.1.6.9.0', 0.5),
+            ('1.3.6.1.2.1.6.9.01', True),
+            ('group:parameter:', None)
+        ]
+        samples_batch = batch.SampleBatch().extend(samples)
+        loaded = batch.SampleBatch.loads(samples_batch.dumps())
+        self.assertEqual(list(loaded), samples)
+        self.assertEqual([type(value) for value in loaded.values()],
+                         [type(value) for _oid, value in samples])
+        self.assertEqual(len(loaded.names), 4)
+        self.assertEqual(len(loaded), len(samples))
+
+    def test_columns(self):
+        """
+        Tests if interleaved samples are grouped into columns of theirs
+        OID prefix, also when loaded batch is extended.
+        """
+        samples = [
+            ('1.3.6.1.2.1.2.2.1.10.1', 1), ('1.3.6.1.2.1.2.2.1.16.1', 2),
+            ('1.3.6.1.2.1.2.2.1.10.2', 3), ('.1', 4), ('1', 5)
+        ]
+        loaded = batch.SampleBatch.loads(
+            batch.SampleBatch().extend(samples[:4]).dumps()
+        ).extend(samples[4:])
+        self.assertEqual(
+            loaded.names,
+            ['1.3.6.1.2.1.2.2.1.10.', '1.3.6.1.2.1.2.2.1.16.', '.', '']
+        )
+        self.assertEqual(sorted(loaded), sorted(samples))
+
+    def test_http(self):
+        """
+        Tests if HTTP samples come back from serialized batch as they
+        were appended.
+        """
+        samples = [('CPU', '', 10), ('CPU', '', 10.5), ('disk', 'sda', 'x')]
+        data = batch.SampleBatch(batch.HTTP).extend(samples).dumps()
+        self.assertEqual(list(batch.load_samples(data)), samples)
+        self.assertIs(batch.load_samples(samples), samples)
+        with self.assertRaises(ValueError):
+            batch.SampleBatch.loads(b'\x91\x00')
+
+    @override_settings(SAMPLE_BATCH=True)
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_add_samples(self, write_points):
+        """
+        Tests if samples are queued as batches in messages serialized
+        with msgpack and written as if they were lists.
+        """
+        with patch('collector.tasks.add_samples.apply_async') as apply_async:
+            tasks.queue_samples([[('1.3.6.1.2.1.6.9.0', 1)]], 'host1')
+        (samples,), options = apply_async.call_args[0]
+        self.assertEqual(apply_async.call_args[1],
+                         {'serializer': tasks.SAMPLE_BATCH_SERIALIZER})
+        self.assertEqual(options['host'], 'host1')
+        tasks.add_samples(samples, **options)
+        tasks.add_samples(
+            batch.SampleBatch(batch.HTTP).extend([('tcpCurrEstab', '', 1)])
+            .dumps(),
+            'host1', False
+        )
+        self.assertEqual(write_points.call_count, 2)
+        self.assertEqual(write_points.call_args_list[0][0],
+                         write_points.call_args_list[1][0])
+
+    @override_settings(SAMPLE_BATCH=True, CELERY_TASK_ALWAYS_EAGER=True)
+    @patch('collector.snmp.get_cmd',
+           side_effect=get_cmd_factory(Integer, 1))
+    def test_snmp_harvester(self, get_cmd):
+        """
+        Tests if snmp_harvester returns batch as task result only, not
+        when called directly by snmp_pipeline.
+        """
+        args = ('10.0.0.1', 161, 'watcheye', ['1.3.6.1.2.1.6.9.0'])
+        result = tasks.snmp_harvester.delay(*args).get()
+        self.assertIsInstance(result, bytes)
+        self.assertEqual(list(batch.load_samples(result)),
+                         tasks.snmp_harvester(*args))
+        self.assertEqual(get_cmd.call_count, 2)
+
+    @override_settings(SAMPLE_BATCH=True, CELERY_TASK_ALWAYS_EAGER=True)
+    @patch('collector.snmp.bulk_cmd',
+           return_value=iter([('Request timed out', 0, 0, [])]))
+    def test_snmp_walker_error(self, bulk_cmd):
+        """
+        Tests if snmp_walker returns batch also when walk fails.
+        """
+        result = tasks.snmp_walker.delay(
+            '10.0.0.1', 161, 'watcheye', ['1.3.6.1.2.1.2.2.1.10'], [1]
+        ).get()
+        self.assertTrue(bulk_cmd.called)
+        self.assertEqual(list(batch.load_samples(result)), [])
+        self.assertIsInstance(result, bytes)
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase, override_settings
+
+from .. import checks
+
+
+class ChecksTests(SimpleTestCase):
+    def test_cache(self):
+        """
+        Tests if dummy cache is an error, cache local to a process
+        a warning and shared cache passes.
+        """
+        for backend, ids in (
+                (checks.DUMMY_CACHE, ['collector.E001']),
+                (checks.LOCAL_MEMORY_CACHE, ['collector.W001']),
+                ('django.core.cache.backends.filebased.FileBasedCache', [])
+        ):
+            with override_settings(CACHES={'default': {'BACKEND': backend}}):
+                self.assertEqual(
+                    [message.id for message in checks.check_cache()], ids
+                )
+
+    def test_sample_batch(self):
+        """
+        Tests if SAMPLE_BATCH requires msgpack to be used and accepted
+        by Celery.
+        """
+        for options, ids in (
+                ({'SAMPLE_BATCH': False}, []),
+                ({'SAMPLE_BATCH': True},
+                 ['collector.E002', 'collector.E003']),
+                ({'SAMPLE_BATCH': True,
+                  'CELERY_RESULT_SERIALIZER': 'msgpack',
+                  'CELERY_ACCEPT_CONTENT': ['json', 'msgpack']}, []),
+                ({'SAMPLE_BATCH': True,
+                  'CELERY_RESULT_SERIALIZER': 'msgpack',
+                  'CELERY_ACCEPT_CONTENT': ['json', 'msgpack'],
+                  'CELERY_RESULT_ACCEPT_CONTENT': ['json']},
+                 ['collector.E003'])
+        ):
+            with override_settings(**options):
+                self.assertEqual(
+                    [message.id for message in checks.check_sample_batch()],
+                    ids
+                )
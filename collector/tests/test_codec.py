@@ -0,0 +1,151 @@
+from unittest import TestCase
+
+from pyasn1.codec.ber import encoder
+from pysnmp.proto import api, rfc1902, rfc1905
+
+from .. import codec
+
+p_mod = api.protoModules[api.protoVersion2c]
+v1_mod = api.protoModules[api.protoVersion1]
+
+
+def encode_response(var_binds, request_id=1234, error_status=0,
+                    error_index=0, community='watcheye', module=p_mod):
+    """
+    Encodes GetResponse message with pysnmp.
+
+    :param var_binds: pairs of OID and pysnmp value
+    :param request_id: request-id of PDU
+    :param error_status: error-status of PDU
+    :param error_index: error-index of PDU
+    :param community: community name
+    :param module: pysnmp protocol module
+    :return: encoded message
+    """
+    pdu = module.GetResponsePDU()
+    module.apiPDU.setDefaults(pdu)
+    module.apiPDU.setRequestID(pdu, request_id)
+    module.apiPDU.setErrorStatus(pdu, error_status)
+    module.apiPDU.setErrorIndex(pdu, error_index)
+    module.apiPDU.setVarBinds(pdu, var_binds)
+    message = module.Message()
+    module.apiMessage.setDefaults(message)
+    module.apiMessage.setCommunity(message, community)
+    module.apiMessage.setPDU(message, pdu)
+    return encoder.encode(message)
+
+
+class EncoderTests(TestCase):
+    def test_get_request(self):
+        """
+        Tests if GetRequest is encoded exactly as pysnmp encodes it.
+        """
+        oids = ['1.3.6.1.2.1.1.3.0', '1.3.6.1.2.1.2.2.1.10.1000000',
+                '1.3.6.1.4.1.2636.3.1.13.1.8.9.1.0.0', '2.999.1']
+        for request_id in [0, 1, 127, 128, 255, 256, 0x7fffffff]:
+            pdu = p_mod.GetRequestPDU()
+            p_mod.apiPDU.setDefaults(pdu)
+            p_mod.apiPDU.setRequestID(pdu, request_id)
+            p_mod.apiPDU.setVarBinds(
+                pdu, [(oid, p_mod.Null('')) for oid in oids]
+            )
+            message = p_mod.Message()
+            p_mod.apiMessage.setDefaults(message)
+            p_mod.apiMessage.setCommunity(message, 'watcheye')
+            p_mod.apiMessage.setPDU(message, pdu)
+            self.assertEqual(
+                codec.encode_get(request_id, 'watcheye', oids),
+                encoder.encode(message)
+            )
+
+    def test_long_request(self):
+        """
+        Tests if lengths over 127 octets are encoded in long form.
+        """
+        oids = ['1.3.6.1.2.1.2.2.1.10.{index}'.format(index=index)
+                for index in range(64)]
+        data = codec.encode_get(1, 'watcheye', oids)
+        self.assertEqual(data[1], 0x82)
+        self.assertEqual(int.from_bytes(data[2:4], 'big'), len(data) - 4)
+
+    def test_integer(self):
+        """
+        Tests if integers are encoded in shortest two's complement form.
+        """
+        self.assertEqual(codec.encode_integer(0), b'\x02\x01\x00')
+        self.assertEqual(codec.encode_integer(128), b'\x02\x02\x00\x80')
+        self.assertEqual(codec.encode_integer(-128), b'\x02\x01\x80')
+        self.assertEqual(codec.encode_integer(-129), b'\x02\x02\xff\x7f')
+
+
+class DecoderTests(TestCase):
+    def test_types(self):
+        """
+        Tests if values of all SNMPv2 types are decoded the same way
+        pysnmp objects hold them.
+        """
+        values = [
+            rfc1902.Integer32(-5),
+            rfc1902.Integer32(2 ** 31 - 1),
+            rfc1902.OctetString(b'eth0'),
+            rfc1902.OctetString(b'x' * 300),
+            rfc1902.Counter32(2 ** 32 - 1),
+            rfc1902.Gauge32(1000000000),
+            rfc1902.TimeTicks(123456),
+            rfc1902.Counter64(2 ** 64 - 1),
+            rfc1902.IpAddress('10.0.0.1'),
+            rfc1902.Opaque(b'\x9f\x78\x04'),
+            rfc1902.ObjectName('1.3.6.1.4.1.2636.1.1.1.2.29')
+        ]
+        oids = ['1.3.6.1.2.1.2.2.1.{index}.1'.format(index=index)
+                for index in range(len(values))]
+        data = encode_response(list(zip(oids, values)), request_id=77)
+        request_id, error_status, error_index, samples = \
+            codec.decode_response(data)
+        self.assertEqual((request_id, error_status, error_index),
+                         (77, 0, 0))
+        self.assertEqual(
+            samples,
+            [(oid, value._value) for oid, value in zip(oids, values)]
+        )
+
+    def test_empty_values(self):
+        """
+        Tests if NULL and exception values are left out.
+        """
+        data = encode_response([
+            ('1.3.6.1.2.1.1.1.0', rfc1905.noSuchObject),
+            ('1.3.6.1.2.1.1.2.0', rfc1905.noSuchInstance),
+            ('1.3.6.1.2.1.1.3.0', rfc1905.endOfMibView),
+            ('1.3.6.1.2.1.1.4.0', p_mod.Null('')),
+            ('1.3.6.1.2.1.1.5.0', rfc1902.Integer32(1))
+        ])
+        self.assertEqual(codec.decode_response(data)[3],
+                         [('1.3.6.1.2.1.1.5.0', 1)])
+
+    def test_error_status(self):
+        """
+        Tests if error-status and error-index are decoded.
+        """
+        data = encode_response([], request_id=2 ** 31 - 1, error_status=1,
+                               error_index=3)
+        self.assertEqual(codec.decode_response(data),
+                         (2 ** 31 - 1, 1, 3, []))
+
+    def test_unsupported(self):
+        """
+        Tests if messages the codec does not handle raise DecodeError.
+        """
+        data = encode_response([('1.3.6.1.2.1.1.5.0', rfc1902.Integer32(1))])
+        messages = [
+            b'',
+            b'\x30',
+            data[:-1],
+            data + b'\x00',
+            encode_response([('1.3.6.1.2.1.1.5.0', v1_mod.Integer(1))],
+                            module=v1_mod),
+            b'\x30\x80' + data[2:]
+        ]
+        for message in messages:
+            with self.assertRaises(codec.DecodeError):
+                codec.decode_response(message)
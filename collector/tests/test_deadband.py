@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import deadband
+from ..models import Parameter
+
+
+class DeadbandTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_changed(self):
+        """
+        Tests if changes are compared with deadband of numeric parameters
+        only.
+        """
+        parameter = Parameter(type=Parameter.FLOAT,
+                              write_policy=Parameter.ABSOLUTE_DEADBAND,
+                              deadband=0.5)
+        self.assertFalse(deadband.changed(parameter, 1.0, 1.5))
+        self.assertTrue(deadband.changed(parameter, 1.0, 0.4))
+        parameter.write_policy = Parameter.RELATIVE_DEADBAND
+        parameter.deadband = 10
+        self.assertFalse(deadband.changed(parameter, -200.0, -220.0))
+        self.assertTrue(deadband.changed(parameter, -200.0, -221.0))
+        parameter.type = Parameter.STRING
+        self.assertTrue(deadband.changed(parameter, 'up', 'down'))
+        self.assertFalse(deadband.changed(parameter, 'up', 'up'))
+        parameter.write_policy = Parameter.ALWAYS
+        self.assertTrue(deadband.changed(parameter, 'up', 'up'))
+
+    def test_heartbeat(self):
+        """
+        Tests if written values are remembered for heartbeat seconds.
+        """
+        parameter = Parameter(type=Parameter.BOOLEAN,
+                              write_policy=Parameter.ON_CHANGE, heartbeat=60)
+        last_values = deadband.LastValues('host1', ['1.1.0'])
+        self.assertTrue(last_values.changed(parameter, '1.1.0', True))
+        self.assertFalse(last_values.changed(parameter, '1.1.0', True))
+        with patch('collector.deadband.cache.set_many',
+                   wraps=cache.set_many) as set_many:
+            last_values.save()
+            last_values.save()
+        set_many.assert_called_once_with(
+            {'collector:last-value:host1:1.1.0': True}, 60
+        )
+        last_values = deadband.LastValues('host1', ['1.1.0', '1.2.0'])
+        self.assertFalse(last_values.changed(parameter, '1.1.0', True))
+        self.assertTrue(last_values.changed(parameter, '1.2.0', True))
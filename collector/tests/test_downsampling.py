@@ -0,0 +1,81 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import downsampling
+from ..models import Parameter
+
+
+@override_settings(INFLUXDB_DOWNSAMPLING=[('5m', '400d'), ('1h', 'INF')])
+class DownsamplingTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    def setUp(self):
+        cache.clear()
+
+    def tcp_queries(self):
+        queries = downsampling.continuous_queries('db', 'raw')
+        return [select for name, select in sorted(queries.items())
+                if name.startswith('collector_tcp_')]
+
+    def test_continuous_queries(self):
+        """
+        Tests if numeric fields of every group are rolled up by the first
+        tier and aggregates of the first tier by the next one.
+        """
+        self.assertEqual(len(downsampling.continuous_queries()), 6)
+        hour, minutes = self.tcp_queries()
+        self.assertEqual(
+            minutes,
+            'SELECT mean("tcpCurrEstab") AS "mean_tcpCurrEstab", '
+            'min("tcpCurrEstab") AS "min_tcpCurrEstab", '
+            'max("tcpCurrEstab") AS "max_tcpCurrEstab", '
+            'mean("tcpRetransSegs") AS "mean_tcpRetransSegs", '
+            'min("tcpRetransSegs") AS "min_tcpRetransSegs", '
+            'max("tcpRetransSegs") AS "max_tcpRetransSegs" '
+            'INTO "db"."raw_5m"."tcp" FROM "db"."raw"."tcp" '
+            'GROUP BY time(5m), *'
+        )
+        self.assertIn('max("max_tcpRetransSegs") AS "max_tcpRetransSegs"',
+                      hour)
+        self.assertIn('INTO "db"."raw_1h"."tcp" FROM "db"."raw_5m"."tcp"',
+                      hour)
+
+    def test_sync(self):
+        """
+        Tests if continuous queries of changed groups are replaced and
+        the foreign ones are left alone.
+        """
+        queries = downsampling.continuous_queries('db')
+        Parameter.objects.filter(name='tcpRetransSegs').delete()
+        client = Mock()
+        existing = [{'name': name, 'query': ''}
+                    for name in list(queries) + ['custom']]
+        client.get_list_continuous_queries.return_value = [
+            {'other': [{'name': 'collector_tcp_5m_0', 'query': ''}]},
+            {'db': existing}
+        ]
+        created, dropped = downsampling.sync(client, 'db')
+        self.assertEqual(len(created), 2)
+        self.assertEqual(len(dropped), 2)
+        self.assertTrue(all(name.startswith('collector_tcp_')
+                            for name in created + dropped))
+        self.assertEqual(client.drop_continuous_query.call_count, 2)
+        client.create_continuous_query.assert_any_call(
+            created[0], downsampling.continuous_queries('db')[created[0]],
+            'db'
+        )
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    @patch('collector.tasks.sync_continuous_queries.apply_async')
+    def test_schedule_sync(self, apply_async, _on_commit):
+        """
+        Tests if sync is scheduled once after group and its parameters
+        are saved.
+        """
+        for parameter in Parameter.objects.filter(group='tcp'):
+            parameter.save()
+        apply_async.assert_called_once_with(
+            countdown=downsampling.SYNC_DELAY
+        )
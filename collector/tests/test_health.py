@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from .. import health
+
+
+@override_settings(SNMP_INTERVAL=60, SNMP_BREAKER_THRESHOLD=2,
+                   SNMP_BREAKER_MAX_BACKOFF=300)
+class HealthTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown(self):
+        """
+        Tests if endpoint which was never polled has closed circuit.
+        """
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
+        self.assertEqual(health.circuit(None), health.CLOSED)
+
+    def test_threshold(self):
+        """
+        Tests if circuit opens after threshold of failed cycles, failed
+        queries of the same cycle count once.
+        """
+        states = []
+        for now in (1000, 1010, 1060):
+            with patch('collector.health.time.time', return_value=now):
+                states.append(health.record_failure('10.0.0.1', 161))
+        self.assertEqual(health.circuit(states[0], 1000), health.CLOSED)
+        self.assertEqual(states[1]['failures'], 1)
+        self.assertEqual(states[2]['retry_at'], 1120)
+        self.assertEqual(health.circuit(states[2], 1060), health.OPEN)
+        self.assertEqual(health.circuit(states[2], 1120), health.HALF_OPEN)
+
+    def test_backoff(self):
+        """
+        Tests if backoff doubles with every failed probe up to the limit
+        and failures of open circuit are ignored.
+        """
+        now = 1000
+        retries = []
+        with patch('collector.health.time.time', lambda: now):
+            state = health.record_failure('10.0.0.1', 161)
+            self.assertIsNone(state['retry_at'])
+            for _ in range(5):
+                now = state['retry_at'] or now + 60
+                state = health.record_failure('10.0.0.1', 161)
+                retries.append(state['retry_at'] - now)
+                self.assertEqual(
+                    health.record_failure('10.0.0.1', 161), state
+                )
+        self.assertEqual(retries, [60, 120, 240, 300, 300])
+
+    def test_success(self):
+        """
+        Tests if success closes the circuit and resets failures, while
+        success of healthy endpoint does not write to cache.
+        """
+        health.record_failure('10.0.0.1', 161)
+        health.record_success('10.0.0.1', 161)
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
+        with patch('django.core.cache.cache.set') as cache_set, \
+                patch('django.core.cache.cache.delete') as cache_delete:
+            health.record_success('10.0.0.1', 161)
+        self.assertFalse(cache_set.called)
+        self.assertFalse(cache_delete.called)
+
+    def test_record(self):
+        """
+        Tests if outcomes are recorded only with breaker enabled.
+        """
+        health.record('10.0.0.1', 161, False)
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
+        with override_settings(SNMP_BREAKER=True):
+            health.record('10.0.0.1', 161, False)
+            self.assertEqual(
+                health.states([('10.0.0.1', 161)])['10.0.0.1', 161]
+                ['failures'], 1
+            )
+            health.record('10.0.0.1', 161, True)
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
@@ -0,0 +1,214 @@
+import gzip
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from .. import influx
+from ..lineprotocol import LineBuffer
+
+
+class ClientPoolTests(SimpleTestCase):
+    def test_client_reuse(self):
+        """
+        Tests if the same credentials get the same client.
+        """
+        pool = influx.ClientPool()
+        client = pool.client()
+        self.assertIs(client, pool.client())
+        self.assertIsNot(client, pool.client(username='admin',
+                                             password='secret',
+                                             database=None))
+
+    def test_fork(self):
+        """
+        Tests if pool inherited by forked process starts over.
+        """
+        pool = influx.ClientPool()
+        client = pool.client()
+        with patch('os.getpid', return_value=-1):
+            self.assertIsNot(client, pool.client())
+
+    def test_discard(self):
+        """
+        Tests if discarded client is closed and replaced.
+        """
+        pool = influx.ClientPool()
+        client = pool.client()
+        with patch.object(client, 'close') as close:
+            pool.discard(client)
+        self.assertTrue(close.called)
+        self.assertIsNot(client, pool.client())
+
+    @patch('influxdb.InfluxDBClient.write_points',
+           side_effect=[requests.exceptions.ConnectionError, None])
+    def test_write_points_reconnect(self, write_points):
+        """
+        Tests if write is repeated with a new client after connection
+        error.
+        """
+        client = influx.pool.client()
+        influx.write_points([{'measurement': 'cpu', 'fields': {'value': 1}}])
+        self.assertEqual(write_points.call_count, 2)
+        self.assertIsNot(client, influx.pool.client())
+
+    def test_worker_process_init(self):
+        """
+        Tests if fresh worker process gets a new client upfront.
+        """
+        client = influx.pool.client()
+        influx.worker_process_init()
+        self.assertIn(influx.pool._key(None, None, ''),
+                      influx.pool._clients)
+        self.assertIsNot(client, influx.pool.client())
+
+
+class WriteBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.writes = []
+        self.written = threading.Event()
+        self.points = LineBuffer()
+        self.points.append('cpu,host=host1', 'value=1i', 1)
+        self.points.append('cpu,host=host2', 'value=2i', 1)
+
+    def write(self, data, time_precision):
+        self.writes.append((data, time_precision))
+        self.written.set()
+
+    def test_max_points(self):
+        """
+        Tests if points of many calls are written together once there
+        are max_points of them.
+        """
+        buffer = influx.WriteBuffer(max_points=4, max_latency=60,
+                                    write=self.write)
+        buffer.add(self.points, 'm')
+        self.assertFalse(self.writes)
+        buffer.add(self.points, 'm')
+        self.assertEqual(len(self.writes), 1)
+        data, time_precision = self.writes[0]
+        self.assertEqual(time_precision, 'm')
+        self.assertEqual(data.split('\n'), ['cpu,host=host1 value=1i 1',
+                                            'cpu,host=host2 value=2i 1'] * 2)
+
+    def test_max_bytes(self):
+        """
+        Tests if points are written once they take max_bytes.
+        """
+        buffer = influx.WriteBuffer(max_bytes=10, max_latency=60,
+                                    write=self.write)
+        buffer.add(self.points, 'm')
+        self.assertEqual(len(self.writes), 1)
+
+    def test_max_latency(self):
+        """
+        Tests if points are written after max_latency.
+        """
+        buffer = influx.WriteBuffer(max_latency=0.01, write=self.write)
+        buffer.add(self.points, 'm')
+        buffer.add(self.points, 's')
+        self.assertTrue(self.written.wait(1))
+        time.sleep(0.01)
+        self.assertEqual(sorted(precision for _, precision in self.writes),
+                         ['m', 's'])
+
+    def test_write_error(self):
+        """
+        Tests if failed write is logged and its points are dropped
+        without calling theirs callbacks.
+        """
+        buffer = influx.WriteBuffer(max_latency=60, write=Mock(
+            side_effect=requests.exceptions.ConnectionError
+        ))
+        written = Mock()
+        buffer.add(self.points, 'm', written=written)
+        with patch('collector.influx.logger.exception') as logger_exception:
+            buffer.flush()
+            buffer.flush()
+        self.assertEqual(logger_exception.call_count, 1)
+        self.assertFalse(written.called)
+
+    def test_written(self):
+        """
+        Tests if callbacks are called once theirs points are written.
+        """
+        buffer = influx.WriteBuffer(max_latency=60, write=self.write)
+        written = Mock()
+        buffer.add(self.points, 'm', written=written)
+        self.assertFalse(written.called)
+        buffer.flush()
+        buffer.flush()
+        written.assert_called_once_with()
+
+    def test_concurrent_flush(self):
+        """
+        Tests if flush returns after points taken by another flush are
+        written.
+        """
+        release = threading.Event()
+
+        def write(data, time_precision):
+            self.written.set()
+            release.wait(1)
+            self.writes.append((data, time_precision))
+
+        buffer = influx.WriteBuffer(max_latency=60, write=write)
+        buffer.add(self.points, 'm')
+        thread = threading.Thread(target=buffer.flush)
+        thread.start()
+        self.assertTrue(self.written.wait(1))
+        threading.Timer(0.01, release.set).start()
+        buffer.flush()
+        self.assertEqual(len(self.writes), 1)
+        thread.join()
+
+    def test_fork(self):
+        """
+        Tests if buffer inherited by forked process starts over.
+        """
+        buffer = influx.WriteBuffer(max_latency=60, write=self.write)
+        buffer.add(self.points, 'm')
+        with patch('os.getpid', return_value=-1):
+            buffer.flush()
+        self.assertFalse(self.writes)
+
+
+class WriteLinesTests(SimpleTestCase):
+    data = '\n'.join(['interface,host=host1 ifInOctets=1i 1'] * 100)
+
+    def setUp(self):
+        influx.traffic.reset()
+
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_plain(self, write_points):
+        """
+        Tests if uncompressed writes are counted.
+        """
+        influx.write_lines(self.data, 'm')
+        write_points.assert_called_once_with([self.data], time_precision='m',
+                                             protocol='line')
+        self.assertEqual(influx.traffic.totals(), {
+            'writes': 1,
+            'bytes': len(self.data) + 1,
+            'sent_bytes': len(self.data) + 1
+        })
+
+    @override_settings(INFLUXDB_GZIP=True, INFLUXDB_GZIP_LEVEL=1)
+    @patch('influxdb.InfluxDBClient.request')
+    def test_gzip(self, request):
+        """
+        Tests if compressed writes are sent with Content-Encoding header
+        and counted with theirs compressed size.
+        """
+        influx.write_lines(self.data, 'm')
+        kwargs = request.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(kwargs['params']['precision'], 'm')
+        self.assertEqual(gzip.decompress(kwargs['data']).decode(),
+                         self.data + '\n')
+        totals = influx.traffic.totals()
+        self.assertEqual(totals['bytes'], len(self.data) + 1)
+        self.assertEqual(totals['sent_bytes'], len(kwargs['data']))
+        self.assertLess(totals['sent_bytes'], totals['bytes'] / 10)
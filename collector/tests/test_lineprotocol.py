@@ -0,0 +1,92 @@
+from django.test import SimpleTestCase
+from influxdb.line_protocol import make_line
+
+from .. import lineprotocol
+
+
+class LineProtocolTests(SimpleTestCase):
+    def test_escaping(self):
+        """
+        Tests if names, tags and values are escaped as by InfluxDB client.
+        """
+        name = 'a b,c=d\\e\nf"'
+        fields = [
+            ('boolean', False, lineprotocol.format_boolean),
+            ('float', 0.1, lineprotocol.format_float),
+            ('integer', -3, lineprotocol.format_integer),
+            ('string', name, lineprotocol.format_string)
+        ]
+        line = ' '.join([
+            lineprotocol.series(name, {
+                name: lineprotocol.tag(name, name),
+                'z': lineprotocol.tag('z', 1)
+            }),
+            ','.join(lineprotocol.escape_key(key) + '=' + formatter(value)
+                     for key, value, formatter in fields),
+            '7'
+        ])
+        self.assertEqual(line, make_line(
+            name, tags={name: name, 'z': 1}, time=7,
+            fields={key: value for key, value, _formatter in fields}
+        ))
+
+    def test_encode_time(self):
+        """
+        Tests if timestamps are floored to precision of a point and
+        expressed in precision of the write.
+        """
+        self.assertEqual(lineprotocol.encode_time(90.5, 'm', 'm'), 1)
+        self.assertEqual(lineprotocol.encode_time(90.5, 'm', 'ms'), 60000)
+        self.assertEqual(lineprotocol.encode_time(90.5, 's', 's'), 90)
+        self.assertEqual(
+            lineprotocol.encode_time(1700000000.123, 'ms', 'ms'),
+            1700000000123
+        )
+        self.assertEqual(lineprotocol.finest(['m', 'ms', 's']), 'ms')
+
+    def test_empty_tag(self):
+        """
+        Tests if tags of empty value are left out.
+        """
+        self.assertIsNone(lineprotocol.tag('instance', ''))
+
+
+class LineBufferTests(SimpleTestCase):
+    def test_extend(self):
+        """
+        Tests if points of many buffers are separated by newlines.
+        """
+        buffer = lineprotocol.LineBuffer()
+        other = lineprotocol.LineBuffer()
+        buffer.extend(other)
+        other.append('cpu', 'value=1i', 1)
+        other.append('cpu', 'value=2i', 2)
+        buffer.extend(other)
+        buffer.extend(other)
+        self.assertEqual(buffer.points, 4)
+        self.assertEqual(buffer.getvalue().split('\n'),
+                         ['cpu value=1i 1', 'cpu value=2i 2'] * 2)
+        self.assertEqual(len(buffer), len(buffer.getvalue()))
+
+    def test_batches(self):
+        """
+        Tests if points are sliced into batches of limited size.
+        """
+        buffer = lineprotocol.LineBuffer()
+        for time in range(5):
+            buffer.append('cpu', 'value=1i', time)
+        self.assertEqual(list(buffer.batches(5)), [buffer.getvalue()])
+        self.assertEqual(
+            [batch.count('\n') + 1 for batch in buffer.batches(2)],
+            [2, 2, 1]
+        )
+
+    def test_local_buffer(self):
+        """
+        Tests if thread's buffer is reused and cleared.
+        """
+        buffer = lineprotocol.local_buffer()
+        buffer.append('cpu', 'value=1i', 1)
+        self.assertIs(lineprotocol.local_buffer(), buffer)
+        self.assertEqual(buffer.points, 0)
+        self.assertEqual(buffer.getvalue(), '')
@@ -0,0 +1,104 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import models, signals, tasks
+from ..plan import HostPlan, PlanCache, PollPlan
+
+
+class PollPlanTests(TestCase):
+    def test_chunks(self):
+        """
+        Tests if host's OIDs are sliced and slices are memoized.
+        """
+        host = HostPlan('host1', '10.0.0.1', 161, 'watcheye',
+                        ['1.1', '1.2', '1.3'], [])
+        poll_plan = PollPlan([host], 'version')
+        chunks = poll_plan.chunks(host, 2)
+        self.assertEqual(chunks, [['1.1', '1.2'], ['1.3']])
+        self.assertIs(chunks, poll_plan.chunks(host, 2))
+        self.assertEqual(poll_plan.chunks(host, 3), [['1.1', '1.2', '1.3']])
+
+
+class PlanCacheTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reuse(self):
+        """
+        Tests if plan is compiled once as long as configuration does not
+        change.
+        """
+        compiler = Mock(return_value=[])
+        plan_cache = PlanCache(compiler)
+        first = plan_cache.get()
+        self.assertIs(first, plan_cache.get())
+        self.assertEqual(compiler.call_count, 1)
+
+    def test_invalidation(self):
+        """
+        Tests if plan is compiled again after configuration changed.
+        """
+        compiler = Mock(return_value=[])
+        plan_cache = PlanCache(compiler)
+        first = plan_cache.get()
+        signals.bump_config_version()
+        self.assertIsNot(first, plan_cache.get())
+        self.assertEqual(compiler.call_count, 2)
+
+    @patch('django.db.transaction.on_commit')
+    def test_signals(self, on_commit):
+        """
+        Tests if saving or deleting collector models changes
+        configuration version once the transaction commits.
+        """
+        version = signals.config_version()
+        host = models.Host.objects.get(name='host1')
+        host.save()
+        self.assertEqual(version, signals.config_version())
+        on_commit.call_args[0][0]()
+        self.assertNotEqual(version, signals.config_version())
+
+        on_commit.side_effect = lambda func: func()
+
+        version = signals.config_version()
+        models.Instance.objects.filter(host=host).first().delete()
+        self.assertNotEqual(version, signals.config_version())
+
+    @override_settings(CONFIG_MAX_AGE=60)
+    def test_max_age(self):
+        """
+        Tests if configuration version changes every CONFIG_MAX_AGE
+        seconds also when nothing bumps it.
+        """
+        with patch('time.time', return_value=120.0):
+            version = signals.config_version()
+        with patch('time.time', return_value=179.0):
+            self.assertEqual(version, signals.config_version())
+        with patch('time.time', return_value=180.0):
+            self.assertNotEqual(version, signals.config_version())
+
+    @patch('collector.tasks.celery.group')
+    def test_scheduler_steady_state(self, group):
+        """
+        Tests if scheduler makes no database queries when configuration
+        does not change.
+        """
+        tasks.snmp_scheduler()
+        with self.assertNumQueries(0):
+            tasks.snmp_scheduler()
+        self.assertEqual(len(list(group.call_args[0][0])), 2)
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    @patch('collector.tasks.celery.group')
+    def test_scheduler_configuration_change(self, group, _on_commit):
+        """
+        Tests if scheduler picks up changed configuration.
+        """
+        tasks.snmp_scheduler()
+        models.Host.objects.filter(name='host1').first().delete()
+        tasks.snmp_scheduler()
+        self.assertEqual(len(list(group.call_args[0][0])), 1)
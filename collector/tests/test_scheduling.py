@@ -0,0 +1,103 @@
+import io
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import scheduling
+from ..models import Group
+
+
+class SchedulingTests(SimpleTestCase):
+    def test_offset(self):
+        """
+        Tests if offset is stable and falls within interval.
+        """
+        offset = scheduling.offset('host1', 60)
+        self.assertEqual(offset, scheduling.offset('host1', 60))
+        self.assertNotEqual(offset, scheduling.offset('host2', 60))
+        self.assertGreaterEqual(offset, 0)
+        self.assertLess(offset, 60)
+
+    def test_offset_spread(self):
+        """
+        Tests if many hosts are spread roughly evenly across interval.
+        """
+        profile = scheduling.load_profile(
+            (
+                (scheduling.offset('host{index}'.format(index=index), 60), 1)
+                for index in range(6000)
+            ),
+            60, 6
+        )
+        self.assertEqual(sum(profile), 6000)
+        for hosts in profile:
+            self.assertAlmostEqual(hosts, 1000, delta=100)
+
+    @override_settings(SNMP_INTERVAL=60, SNMP_STAGGER_JITTER=5)
+    def test_countdown(self):
+        """
+        Tests if jitter shifts offset by at most configured seconds and
+        countdown stays within interval.
+        """
+        offset = scheduling.offset('host1', 60)
+        for _ in range(100):
+            delay = scheduling.countdown('host1')
+            self.assertLess(delay, 60)
+            self.assertLessEqual((delay - offset) % 60, 5)
+
+    def test_load_profile(self):
+        """
+        Tests if weights are summed within right parts of interval.
+        """
+        profile = scheduling.load_profile(
+            [(0, 1), (9.9, 2), (10, 3), (59.9, 4)], 60, 6
+        )
+        self.assertEqual(profile, [3, 3, 0, 0, 0, 4])
+
+    def test_describe_profile(self):
+        """
+        Tests if profile description labels each part of interval.
+        """
+        self.assertEqual(
+            scheduling.describe_profile([1, 2], 60),
+            '0-30s: 1, 30-60s: 2'
+        )
+
+
+class ShowScheduleTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    def test_without_stagger(self):
+        """
+        Tests if all hosts are shown at the beginning of interval when
+        staggering is disabled.
+        """
+        stdout = io.StringIO()
+        call_command('showschedule', buckets=2, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0].split()[1], '2')
+        self.assertEqual(lines[1].split()[1], '0')
+
+    @override_settings(SNMP_STAGGER=True)
+    def test_with_stagger(self):
+        """
+        Tests if all hosts are shown within interval when staggering is
+        enabled.
+        """
+        stdout = io.StringIO()
+        call_command('showschedule', buckets=4, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(sum(int(line.split()[1]) for line in lines), 2)
+
+    def test_interval(self):
+        """
+        Tests if hosts of groups polled more often are shown in each of
+        theirs rounds, once when other groups are polled at the same time.
+        """
+        Group.objects.filter(name='tcp').update(interval=30)
+        stdout = io.StringIO()
+        call_command('showschedule', buckets=2, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0].split()[1], '2')
+        self.assertEqual(lines[1].split()[1], '2')
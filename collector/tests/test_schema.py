@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import schema, tasks
+from ..models import Host, Tag
+
+
+class SchemaTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    def test_cache(self, _on_commit):
+        """
+        Tests if schema is compiled again only after configuration
+        changes.
+        """
+        cached = schema.schemas.get('host1')
+        with self.assertNumQueries(0):
+            self.assertIs(schema.schemas.get('host1'), cached)
+        cached.host.save()
+        self.assertIsNot(schema.schemas.get('host1'), cached)
+        with self.assertRaises(Host.DoesNotExist):
+            schema.schemas.get('host0')
+
+    def test_warm(self):
+        """
+        Tests if schemas of all hosts are compiled at once and samples
+        are written without database queries then.
+        """
+        with self.assertNumQueries(5):
+            hosts = schema.schemas.warm()
+        self.assertEqual(hosts, Host.objects.count())
+        with self.assertNumQueries(0), \
+                patch('influxdb.InfluxDBClient.write_points') as write_points:
+            tasks.add_samples([[('1.3.6.1.2.1.6.9.0', 1)]], 'host1')
+            tasks.add_samples([['tcpCurrEstab', '', 1]], 'host1', False)
+        self.assertEqual(write_points.call_count, 2)
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    def test_pack(self, _on_commit):
+        """
+        Tests if unknown samples are left in mapping and empty scalar
+        indexing sample removes host's tag of the same name.
+        """
+        host_schema = schema.schemas.get('host1')
+        indexing = next(oid for oid, sample in host_schema.samples.items()
+                        if sample.indexing and not sample.tabular)
+        field = next(oid for oid, sample in host_schema.samples.items()
+                     if not sample.indexing and not sample.tabular)
+        name = host_schema.samples[indexing].name
+        host_schema.host.tag_values.create(tag=Tag.objects.create(name=name),
+                                           value='x')
+        host = schema.schemas.get('host1').host
+        self.assertIn(name, schema.schemas.get('host1').tags)
+        packer = tasks.ResultPacker(host, {indexing: '', field: 1,
+                                           '1.2.3': 4})
+        host_tags, tags, fields = packer.pack()
+        self.assertNotIn(name, host_tags)
+        self.assertEqual(tags, {})
+        self.assertEqual(len(fields), 1)
+        self.assertEqual(packer.mapping, {'1.2.3': 4})
+
+    @patch('collector.tasks.logger.warning')
+    def test_warm_schemas(self, logger_warning):
+        """
+        Tests if worker warms schemas up and warns about cache local to
+        a process.
+        """
+        tasks.warm_schemas()
+        self.assertTrue(logger_warning.called)
+        with self.assertNumQueries(0):
+            schema.schemas.get('host1')
@@ -0,0 +1,90 @@
+import io
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import models, sharding
+
+HOSTS = ['host{index}'.format(index=index) for index in range(4000)]
+
+
+class HashRingTests(SimpleTestCase):
+    def test_stable(self):
+        """
+        Tests if key is owned by the same node regardless of order in
+        which nodes are given.
+        """
+        first = sharding.HashRing(['a', 'b', 'c'])
+        second = sharding.HashRing(['c', 'a', 'b'])
+        for host in HOSTS[:100]:
+            self.assertEqual(first.node(host), second.node(host))
+
+    def test_spread(self):
+        """
+        Tests if keys are spread roughly evenly across nodes.
+        """
+        ring = sharding.HashRing(['a', 'b', 'c', 'd'])
+        load = {}
+        for host in HOSTS:
+            node = ring.node(host)
+            load[node] = load.get(node, 0) + 1
+        self.assertEqual(sorted(load), ['a', 'b', 'c', 'd'])
+        for hosts in load.values():
+            self.assertAlmostEqual(hosts, 1000, delta=200)
+
+    def test_add_node(self):
+        """
+        Tests if adding fifth node moves about fifth of keys and only to
+        the new node.
+        """
+        before = sharding.HashRing(['a', 'b', 'c', 'd'])
+        after = sharding.HashRing(['a', 'b', 'c', 'd', 'e'])
+        moved = [
+            host for host in HOSTS if before.node(host) != after.node(host)
+        ]
+        self.assertAlmostEqual(len(moved), len(HOSTS) / 5,
+                               delta=len(HOSTS) / 20)
+        self.assertEqual({after.node(host) for host in moved}, {'e'})
+
+    def test_empty(self):
+        """
+        Tests if ring without nodes refuses lookups.
+        """
+        with self.assertRaises(LookupError):
+            sharding.HashRing([]).node('host1')
+
+    def test_route(self):
+        """
+        Tests if override wins and no shards means default queue.
+        """
+        self.assertIsNone(sharding.route('host1'))
+        self.assertEqual(sharding.route('host1', 'pinned'), 'pinned')
+        with override_settings(SNMP_SHARDS=['a', 'b']):
+            self.assertIn(sharding.route('host1'), ['a', 'b'])
+            self.assertEqual(sharding.route('host1', 'pinned'), 'pinned')
+
+
+class ShowShardsTests(TestCase):
+    fixtures = ['collector/tests/fixtures.json']
+
+    @override_settings(SNMP_SHARDS=['a', 'b'])
+    def test_assignment(self):
+        """
+        Tests if every host is listed with its shard and totals match,
+        hosts of groups polled more often are counted once.
+        """
+        models.Host.objects.filter(name='host1').update(shard='pinned')
+        models.Group.objects.filter(name='tcp').update(interval=30)
+        stdout = io.StringIO()
+        call_command('showshards', hosts=True, add='c', stdout=stdout)
+        output = stdout.getvalue()
+        lines = output.splitlines()
+        self.assertIn('host1                    pinned', lines)
+        shards = {
+            line.split()[0]: int(line.split()[1])
+            for line in lines[1:lines.index('')]
+        }
+        self.assertEqual(shards['pinned'], 1)
+        self.assertEqual(sum(shards.values()), 2)
+        self.assertIn('Adding c moves', output)
+        self.assertIn('of 2 hosts.', output)
@@ -0,0 +1,298 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from pyasn1.type.univ import Integer
+from pysnmp.hlapi import (CommunityData, Udp6TransportTarget,
+                          UdpTransportTarget, UsmUserData)
+from pysnmp.proto.rfc1902 import ObjectName
+
+from ..snmp import (EnginePool, bulk_cmd, chunk_sizes, get_cmd,
+                    learn_chunk_size, object_name, response_size,
+                    usm_user_data)
+from .utils import SnmpResponder, UsmResponder
+
+
+class EnginePoolTests(TestCase):
+    def test_target_reuse(self):
+        """
+        Tests if the same endpoint gets the same auth data and target.
+        """
+        pool = EnginePool()
+        first = pool.target('10.0.0.1', 161, 'watcheye')
+        second = pool.target('10.0.0.1', 161, 'watcheye')
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[1], second[1])
+        self.assertIsNot(first, pool.target('10.0.0.1', 161, 'other'))
+
+    def test_target_transport(self):
+        """
+        Tests if transport target matches IP address version.
+        """
+        pool = EnginePool()
+        _, target = pool.target('10.0.0.1', 161, 'watcheye')
+        self.assertIsInstance(target, UdpTransportTarget)
+        _, target = pool.target('::ffff:10.0.0.2', 161, 'watcheye')
+        self.assertIsInstance(target, Udp6TransportTarget)
+
+    def test_target_eviction(self):
+        """
+        Tests if least recently used target is evicted.
+        """
+        pool = EnginePool(size=2)
+        first = pool.target('10.0.0.1', 161, 'watcheye')
+        pool.target('10.0.0.2', 161, 'watcheye')
+        pool.target('10.0.0.1', 161, 'watcheye')
+        pool.target('10.0.0.3', 161, 'watcheye')
+        self.assertIs(first, pool.target('10.0.0.1', 161, 'watcheye'))
+        self.assertNotIn(('10.0.0.2', 161, 'watcheye', None, None, None),
+                         pool._targets)
+
+    def test_target_usm(self):
+        """
+        Tests if SNMPv3 user replaces community and its keys are derived
+        once.
+        """
+        pool = EnginePool()
+        usm = ['watcheye', 'SHA', 'authentication', 'AES128', 'privacy-key']
+        auth_data, _ = pool.target('10.0.0.1', 161, '', usm=usm)
+        self.assertIsInstance(auth_data, UsmUserData)
+        self.assertIs(auth_data, usm_user_data(tuple(usm)))
+        self.assertIs(auth_data, EnginePool().target('10.0.0.1', 161, '',
+                                                     usm=usm)[0])
+        auth_data, _ = pool.target('10.0.0.1', 161, 'watcheye')
+        self.assertIsInstance(auth_data, CommunityData)
+
+    def test_engine_reuse(self):
+        """
+        Tests if engine is reused by consecutive sessions.
+        """
+        pool = EnginePool()
+        with pool.session('10.0.0.1', 161, 'watcheye') as (engine, *_):
+            pass
+        with pool.session('10.0.0.2', 161, 'watcheye') as (other, *_):
+            pass
+        self.assertIs(engine, other)
+
+    def test_engine_limit(self):
+        """
+        Tests if sessions wait for an engine when all are in use.
+        """
+        pool = EnginePool(max_engines=1)
+        engine = pool.acquire()
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(pool.acquire())
+        )
+        thread.start()
+        thread.join(0.1)
+        self.assertFalse(acquired)
+        pool.release(engine, ('10.0.0.1', 161, 'watcheye'))
+        thread.join(1)
+        self.assertEqual(acquired, [engine])
+
+    def test_engine_recycling(self):
+        """
+        Tests if engine is closed after serving more targets than pool
+        size.
+        """
+        pool = EnginePool(size=1)
+        with pool.session('10.0.0.1', 161, 'watcheye') as (engine, *_):
+            pass
+        with pool.session('10.0.0.2', 161, 'watcheye') as (same, *_):
+            pass
+        with pool.session('10.0.0.3', 161, 'watcheye') as (other, *_):
+            pass
+        self.assertIs(engine, same)
+        self.assertIsNot(engine, other)
+
+    def test_fork(self):
+        """
+        Tests if pool inherited by forked process starts over.
+        """
+        pool = EnginePool()
+        with pool.session('10.0.0.1', 161, 'watcheye') as (engine, *_):
+            pass
+        with patch('os.getpid', return_value=-1):
+            with pool.session('10.0.0.1', 161, 'watcheye') as (other, *_):
+                pass
+        self.assertIsNot(engine, other)
+
+
+class GetCmdTests(TestCase):
+    def test_object_name(self):
+        """
+        Tests if object names are built from arcs and memoized.
+        """
+        name = object_name('1.3.6.1.2.1.1.3.0')
+        self.assertEqual(name, ObjectName('1.3.6.1.2.1.1.3.0'))
+        self.assertIs(name, object_name('1.3.6.1.2.1.1.3.0'))
+
+    def test_get_cmd(self):
+        """
+        Tests if response of real agent is mapped onto requested OIDs.
+        """
+        oids = ['1.3.6.1.2.1.2.2.1.10.1', '1.3.6.1.2.1.2.2.1.16.1']
+        pool = EnginePool()
+        with SnmpResponder(Integer, 7) as responder, \
+                pool.session('127.0.0.1', responder.port,
+                             'watcheye') as session:
+            error_indication, error_status, _error_index, var_binds = \
+                get_cmd(*session, oids)
+        self.assertIsNone(error_indication)
+        self.assertEqual(error_status, 0)
+        self.assertEqual([(oid, int(value)) for oid, value in var_binds],
+                         [(oid, 7) for oid in oids])
+
+    def test_get_cmd_duplicates(self):
+        """
+        Tests if error index of query with duplicate OIDs points at
+        requested OID agent failed on.
+        """
+        bad = '1.3.6.1.2.1.2.2.1.16.1'
+        oids = ['1.3.6.1.2.1.2.2.1.10.1', '1.3.6.1.2.1.2.2.1.10.1', bad]
+        pool = EnginePool()
+        with SnmpResponder(Integer, 7, error_oid=bad) as responder, \
+                pool.session('127.0.0.1', responder.port,
+                             'watcheye') as session:
+            _error_indication, error_status, error_index, _var_binds = \
+                get_cmd(*session, oids)
+        self.assertTrue(error_status)
+        self.assertEqual(oids[int(error_index) - 1], bad)
+
+    def test_get_cmd_usm(self):
+        """
+        Tests if pooled engine performs SNMPv3 discovery only once.
+        """
+        oids = ['1.3.6.1.2.1.1.1.0']
+        pool = EnginePool(max_engines=1)
+        responses = []
+        requests = []
+        with UsmResponder() as responder:
+            for _ in range(2):
+                with pool.session('127.0.0.1', responder.port, '', 1, 0,
+                                  responder.usm) as session:
+                    responses.append(get_cmd(*session, oids))
+                requests.append(responder.requests)
+        for error_indication, error_status, _error_index, var_binds in \
+                responses:
+            self.assertIsNone(error_indication)
+            self.assertEqual(error_status, 0)
+            self.assertEqual([oid for oid, _value in var_binds], oids)
+        self.assertEqual(requests[1] - requests[0], 1)
+
+    def test_get_cmd_usm_users(self):
+        """
+        Tests if agents having users of the same name with different
+        passphrases are both queried with their own keys.
+        """
+        oids = ['1.3.6.1.2.1.1.1.0']
+        pool = EnginePool(max_engines=1)
+        responses = []
+        with UsmResponder() as first, \
+                UsmResponder('other-authentication', 'other-privacy') \
+                as second:
+            for responder in (first, second, first):
+                with pool.session('127.0.0.1', responder.port, '', 1, 0,
+                                  responder.usm) as session:
+                    responses.append(get_cmd(*session, oids))
+        for error_indication, error_status, _error_index, var_binds in \
+                responses:
+            self.assertIsNone(error_indication)
+            self.assertEqual(error_status, 0)
+            self.assertEqual([oid for oid, _value in var_binds], oids)
+
+    def test_bulk_cmd(self):
+        """
+        Tests if table columns are walked with numeric OIDs until all of
+        them are left.
+        """
+        # usmUserSecurityName and usmUserAuthProtocol columns
+        columns = ['1.3.6.1.6.3.15.1.2.2.1.3', '1.3.6.1.6.3.15.1.2.2.1.4']
+        pool = EnginePool()
+        with UsmResponder() as responder:
+            with pool.session('127.0.0.1', responder.port, '', 1, 0,
+                              responder.usm) as session:
+                rows = list(bulk_cmd(*session, columns, 3))
+        self.assertEqual(len(rows), 1)
+        error_indication, error_status, _error_index, row = rows[0]
+        self.assertIsNone(error_indication)
+        self.assertEqual(error_status, 0)
+        for column, (oid, _value) in zip(columns, row):
+            self.assertTrue(oid.startswith(column + '.'))
+        self.assertEqual(str(row[0][1]), responder.user)
+
+
+@override_settings(SNMP_DEFAULT_CHUNK_SIZE=32, SNMP_MIN_CHUNK_SIZE=1,
+                   SNMP_MAX_CHUNK_SIZE=128, SNMP_MTU=1472)
+class ChunkSizeTests(SimpleTestCase):
+    endpoint = '10.0.0.1', 161
+
+    def setUp(self):
+        cache.clear()
+
+    def learned(self):
+        return chunk_sizes([self.endpoint])[self.endpoint]
+
+    def test_default(self):
+        """
+        Tests if unknown host gets default chunk size.
+        """
+        self.assertEqual(self.learned(), 32)
+
+    def test_grow(self):
+        """
+        Tests if chunk grows when full chunk is answered.
+        """
+        self.assertEqual(learn_chunk_size(*self.endpoint, 32, 400), 40)
+        self.assertEqual(self.learned(), 40)
+
+    def test_partial_chunk(self):
+        """
+        Tests if answered chunk smaller than learned one does not change
+        chunk size.
+        """
+        self.assertEqual(learn_chunk_size(*self.endpoint, 3, 100), 32)
+
+    def test_mtu(self):
+        """
+        Tests if chunk is limited to fit response in MTU.
+        """
+        self.assertEqual(learn_chunk_size(*self.endpoint, 32, 2000), 23)
+
+    def test_shrink(self):
+        """
+        Tests if chunk is halved on tooBig error and on timeout down to
+        the default size only.
+        """
+        self.assertEqual(learn_chunk_size(*self.endpoint, 32, 500), 40)
+        self.assertEqual(learn_chunk_size(*self.endpoint, 40), 32)
+        self.assertEqual(learn_chunk_size(*self.endpoint, 32), 32)
+        self.assertEqual(
+            learn_chunk_size(*self.endpoint, 32, too_big=True), 16
+        )
+        self.assertEqual(learn_chunk_size(*self.endpoint, 16), 16)
+        self.assertEqual(self.learned(), 16)
+
+    def test_limits(self):
+        """
+        Tests if chunk size stays within configured limits.
+        """
+        self.assertEqual(
+            learn_chunk_size(*self.endpoint, 1, too_big=True), 1
+        )
+        self.assertEqual(learn_chunk_size(*self.endpoint, 128, 500), 128)
+
+    def test_response_size(self):
+        """
+        Tests if response size estimation accounts for OIDs and values.
+        """
+        small = response_size('public', [('1.3.6.1.2.1.1.3.0', 1)])
+        large = response_size('public', [('1.3.6.1.2.1.1.1.0', 'a' * 100)])
+        self.assertLess(small, large)
+        self.assertGreater(small, len('public'))
+        self.assertGreater(
+            response_size('', [('1.3.6.1.2.1.1.3.0', 1)], usm=True), small
+        )
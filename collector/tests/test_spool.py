@@ -0,0 +1,163 @@
+import os
+import subprocess
+import tempfile
+import time
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import SimpleTestCase
+from influxdb.exceptions import InfluxDBClientError
+
+from .. import spool
+
+POINTS = 'cpu,host=host1 value=1i 1\ncpu,host=host2 value=2i 1'
+
+
+class SpoolTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.write = Mock()
+        self.spool = spool.Spool(self.directory.name, backoff=60,
+                                 write=self.write, background=False)
+        self.addCleanup(self.spool.close)
+
+    def segments(self):
+        return sorted(os.listdir(self.directory.name))
+
+    def test_write(self):
+        """
+        Tests if points are written directly while InfluxDB is healthy.
+        """
+        self.spool.write(POINTS, 'm')
+        self.write.assert_called_once_with(POINTS, 'm')
+        self.assertEqual(self.segments(), [])
+
+    def test_failed_write(self):
+        """
+        Tests if points of failed write and the following ones are
+        spooled and replayed oldest first once backoff expires.
+        """
+        self.write.side_effect = requests.exceptions.ConnectionError
+        self.spool.write(POINTS, 'm')
+        self.spool.write('cpu value=3i 2', 's')
+        self.assertEqual(self.write.call_count, 1)
+        self.assertTrue(self.spool.drain())
+        self.assertEqual(self.write.call_count, 1)
+
+        self.write.reset_mock(side_effect=True)
+        self.spool._divert_until = 0
+        self.spool.close()
+        self.assertTrue(self.spool.drain())
+        self.assertEqual(self.write.call_args_list, [
+            ((POINTS, 'm'),),
+            (('cpu value=3i 2', 's'),)
+        ])
+        self.assertEqual(self.segments(), [spool.LOCK_NAME])
+        stats = self.spool.stats()
+        self.assertEqual(stats['spooled'], 3)
+        self.assertEqual(stats['replayed'], 3)
+        self.assertEqual(stats['segments'], 0)
+
+    def test_slow_write(self):
+        """
+        Tests if points following a slow write are spooled.
+        """
+        self.spool.latency = 0
+        self.spool.write(POINTS, 'm')
+        self.spool.write(POINTS, 'm')
+        self.assertEqual(self.write.call_count, 1)
+        self.assertEqual(self.spool.stats()['spooled'], 2)
+
+    def test_refused_write(self):
+        """
+        Tests if points refused by InfluxDB are not spooled.
+        """
+        self.write.side_effect = InfluxDBClientError('field type conflict',
+                                                     400)
+        with self.assertRaises(InfluxDBClientError):
+            self.spool.write(POINTS, 'm')
+        self.assertEqual(self.segments(), [])
+
+    def test_failed_replay(self):
+        """
+        Tests if segment is kept when its replay fails and dropped when
+        InfluxDB refuses its points.
+        """
+        self.spool.append(POINTS, 'm')
+        self.spool.close()
+        self.write.side_effect = requests.exceptions.ConnectionError
+        self.assertFalse(self.spool.drain())
+        self.assertEqual(len(self.segments()), 2)
+
+        self.spool._divert_until = 0
+        self.write.side_effect = InfluxDBClientError('bad timestamp', 400)
+        with patch('collector.spool.logger.exception'):
+            self.assertTrue(self.spool.drain())
+        self.assertEqual(self.segments(), [spool.LOCK_NAME])
+        self.assertEqual(self.spool.stats()['dropped'], 2)
+
+    def test_retention(self):
+        """
+        Tests if the oldest segments are deleted when spool grows over
+        max_bytes.
+        """
+        # every point is a segment of 141 bytes, two of them fit
+        self.spool.segment_bytes = 1
+        self.spool.max_bytes = 300
+        with patch('collector.spool.logger.warning') as logger_warning:
+            for time_ in range(3):
+                self.spool.append(
+                    'cpu value={time}i {time}'.format(time=time_) * 10, 's'
+                )
+        self.assertEqual(logger_warning.call_count, 1)
+        self.assertEqual(self.spool.stats()['segments'], 2)
+        self.spool.drain()
+        self.assertEqual(
+            [args[0][-1] for args, _kwargs in self.write.call_args_list],
+            ['1', '2']
+        )
+
+    def test_truncated_segment(self):
+        """
+        Tests if partially written point is dropped on replay.
+        """
+        name = '{created:020d}-1-1.m'.format(created=1)
+        with open(os.path.join(self.directory.name, name), 'w') as segment:
+            segment.write(POINTS + '\ncpu,host=ho')
+        self.spool.drain()
+        self.write.assert_called_once_with(POINTS, 'm')
+
+    def test_orphan(self):
+        """
+        Tests if segment left open by a dead process is sealed and
+        replayed.
+        """
+        process = subprocess.Popen(['true'])
+        process.wait()
+        name = '{created:020d}-{pid}-1.m{suffix}'.format(
+            created=int(time.time() * 1000000), pid=process.pid,
+            suffix=spool.OPEN_SUFFIX
+        )
+        with open(os.path.join(self.directory.name, name), 'w') as segment:
+            segment.write(POINTS + '\n')
+        self.spool.drain()
+        self.write.assert_called_once_with(POINTS, 'm')
+
+    @patch('collector.spool.DRAIN_INTERVAL', 0.01)
+    def test_start(self):
+        """
+        Tests if fresh spool drains sealed segment it did not write.
+        """
+        name = '{created:020d}-1-1.m'.format(created=1)
+        with open(os.path.join(self.directory.name, name), 'w') as segment:
+            segment.write(POINTS + '\n')
+        drainer = spool.Spool(self.directory.name, write=self.write)
+        self.addCleanup(drainer.close)
+        drainer.start()
+        for _ in range(500):
+            if name not in self.segments():
+                break
+            time.sleep(0.01)
+        self.write.assert_called_once_with(POINTS, 'm')
+        self.assertEqual(self.segments(), [spool.LOCK_NAME])
@@ -1,18 +1,40 @@
+import time
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from pyasn1.type.char import UTF8String
-from pyasn1.type.univ import Integer
+from influxdb.exceptions import InfluxDBServerError
+from influxdb.line_protocol import make_lines
+from pyasn1.type.univ import Integer, Null
 
-from .utils import get_cmd_factory
-from .. import tasks
+from .utils import bulk_cmd_factory, get_cmd_factory, reference_points
+from .. import (
+    health, lineprotocol, models, plan, scheduling, sharding, snmp, tasks
+)
+
+
+def poll_factory(value):
+    """
+    A function factory producing replacements for AsyncPoller.poll
+    answering every request with single sample of value.
+
+    :param value: expected value of SNMP object
+    :return: a callable with same API as AsyncPoller.poll
+    """
+    def wrapper(requests):
+        return [[(request[3][0], value)] for request in requests]
+    return wrapper
 
 
 class TasksTests(TestCase):
     fixtures = ['collector/tests/fixtures.json']
 
+    def setUp(self):
+        cache.clear()
+
     @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
-    @patch('collector.tasks.getCmd',
+    @patch('collector.snmp.get_cmd',
            side_effect=get_cmd_factory(Integer, 1))
     @patch('influxdb.InfluxDBClient.write_points')
     def test_snmp_scheduler_positive_scenario(self, write_points, get_cmd):
@@ -24,6 +46,298 @@ class TasksTests(TestCase):
         self.assertEqual(get_cmd.call_count, 2)
         self.assertEqual(write_points.call_count, 2)
 
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, SNMP_PIPELINE='direct')
+    @patch('collector.snmp.get_cmd',
+           side_effect=get_cmd_factory(Integer, 1))
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_snmp_scheduler_pipeline(self, write_points, get_cmd):
+        """
+        Tests if snmp_scheduler in direct pipeline mode polls and stores
+        each host with single task.
+        """
+        with patch('collector.tasks.celery.chord') as chord:
+            tasks.snmp_scheduler()
+        self.assertFalse(chord.called)
+        self.assertEqual(get_cmd.call_count, 2)
+        self.assertEqual(write_points.call_count, 2)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, SNMP_ENGINE='asyncio')
+    @patch('collector.aiosnmp.AsyncPoller.poll', side_effect=poll_factory(1))
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_snmp_scheduler_asyncio(self, write_points, poll):
+        """
+        Tests if snmp_scheduler in asyncio mode polls all hosts at once
+        and stores samples of each of them.
+        """
+        tasks.snmp_scheduler()
+        self.assertEqual(poll.call_count, 1)
+        self.assertEqual(len(poll.call_args[0][0]), 2)
+        self.assertEqual(write_points.call_count, 2)
+
+    @override_settings(SNMP_BREAKER=True)
+    @patch('collector.tasks.add_samples.delay')
+    @patch('collector.aiosnmp.AsyncPoller.poll', return_value=[None])
+    def test_snmp_multiplexer_no_response(self, poll, add_samples):
+        """
+        Tests if hosts which did not respond are not queued for storage.
+        """
+        tasks.snmp_multiplexer(
+            [plan.HostPlan('host1', '10.0.0.1', 161, 'watcheye',
+                           ['1.3.6.1.2.1.6.9.0'], [])]
+        )
+        self.assertTrue(poll.called)
+        self.assertFalse(add_samples.called)
+        self.assertEqual(
+            health.states([('10.0.0.1', 161)])['10.0.0.1', 161]['failures'],
+            1
+        )
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    @patch('collector.snmp.bulk_cmd',
+           side_effect=bulk_cmd_factory(Integer, 1, [1]))
+    @patch('collector.snmp.get_cmd',
+           side_effect=get_cmd_factory(Integer, 1))
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_snmp_scheduler_bulk(self, write_points, get_cmd, bulk_cmd):
+        """
+        Tests if tabular group with bulk option is walked instead of
+        being queried instance by instance.
+        """
+        models.Group.objects.filter(name='interface').update(bulk=True)
+        tasks.snmp_scheduler()
+        self.assertEqual(get_cmd.call_count, 2)
+        self.assertEqual(bulk_cmd.call_count, 1)
+        self.assertEqual(write_points.call_count, 2)
+
+    def test_aggregator_bulk(self):
+        """
+        Tests if instances of tabular group with bulk option are
+        described as table instead of single OIDs.
+        """
+        models.Group.objects.filter(name='interface').update(bulk=True)
+        targets = {target[0]: target for target in tasks.aggregator()}
+        parameters, tables = targets['host2'][4:6]
+        self.assertFalse(
+            [oid for oid in parameters if oid.startswith('1.3.6.1.2.1.2.2.1')]
+        )
+        self.assertEqual(len(tables), 1)
+        columns, instances = tables[0]
+        self.assertIn('1.3.6.1.2.1.2.2.1.10', columns)
+        self.assertEqual(instances, [1])
+        self.assertEqual(
+            len(tasks.expand_tables(tables)), len(columns)
+        )
+
+    def test_snmp_walker(self):
+        """
+        Tests if rows are matched with instances by index and walk is
+        over as soon as all instances are found.
+        """
+        columns = ['1.3.6.1.2.1.2.2.1.10', '1.3.6.1.2.1.2.2.1.16']
+        bulk_cmd = bulk_cmd_factory(Integer, 1, [1, 2, 3, 4, 5])
+        with patch('collector.snmp.bulk_cmd', side_effect=bulk_cmd):
+            samples = tasks.snmp_walker('10.0.0.1', 161, 'watcheye',
+                                        columns, [1, 3])
+        self.assertEqual(
+            samples,
+            [
+                ('1.3.6.1.2.1.2.2.1.10.1', 1),
+                ('1.3.6.1.2.1.2.2.1.16.1', 1),
+                ('1.3.6.1.2.1.2.2.1.10.3', 1),
+                ('1.3.6.1.2.1.2.2.1.16.3', 1)
+            ]
+        )
+        self.assertEqual(bulk_cmd.rows, 3)
+
+    def test_snmp_harvester_too_big(self):
+        """
+        Tests if chunk answered with tooBig error is split in halves and
+        learned chunk size is reduced.
+        """
+        get_cmd = get_cmd_factory(Integer, 1)
+
+        def too_big(engine, auth_data, transport_target, oids):
+            if len(oids) > 2:
+                return None, 1, 1, []
+            return get_cmd(engine, auth_data, transport_target, oids)
+
+        parameters = ['1.3.6.1.2.1.6.9.0', '1.3.6.1.2.1.6.12.0',
+                      '1.3.6.1.2.1.6.13.0', '1.3.6.1.2.1.6.14.0']
+        with patch('collector.snmp.get_cmd', side_effect=too_big) as mock:
+            samples = tasks.snmp_harvester('10.0.0.1', 161, 'watcheye',
+                                           parameters)
+        self.assertEqual(mock.call_count, 3)
+        self.assertEqual(samples, [(oid, 1) for oid in parameters])
+        self.assertLess(
+            snmp.chunk_sizes([('10.0.0.1', 161)])['10.0.0.1', 161],
+            len(parameters)
+        )
+
+    def test_snmp_harvester_bad_oid(self):
+        """
+        Tests if OID pointed by error-index is remembered as bad and the
+        rest of chunk is queried again.
+        """
+        get_cmd = get_cmd_factory(Integer, 1)
+        parameters = ['1.3.6.1.2.1.6.9.0', '1.3.6.1.2.1.6.12.0',
+                      '1.3.6.1.2.1.6.13.0']
+
+        def gen_err(engine, auth_data, transport_target, oids):
+            if parameters[1] in oids:
+                index = oids.index(parameters[1]) + 1
+                return (None, Integer(5), Integer(index),
+                        [(oid, Null('')) for oid in oids])
+            return get_cmd(engine, auth_data, transport_target, oids)
+
+        with patch('collector.snmp.get_cmd', side_effect=gen_err) as mock:
+            samples = tasks.snmp_harvester('10.0.0.1', 161, 'watcheye',
+                                           parameters)
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(samples, [(parameters[0], 1), (parameters[2], 1)])
+        self.assertEqual(snmp.bad_oids([('10.0.0.1', 161)]),
+                         {('10.0.0.1', 161): {parameters[1]}})
+
+    def test_exclude_bad_oids(self):
+        """
+        Tests if bad OIDs are left out of hosts' parameters.
+        """
+        targets = list(tasks.aggregator())
+        target = targets[0]
+        snmp.remember_bad_oid(target.ip, target.port, target.parameters[0])
+        pruned = tasks.exclude_bad_oids(targets)
+        self.assertEqual(pruned[0].parameters, target.parameters[1:])
+        self.assertIs(pruned[0].tables, target.tables)
+
+    @override_settings(SNMP_STAGGER=True)
+    @patch('collector.tasks.logger.info')
+    @patch('collector.tasks.celery.group')
+    def test_snmp_scheduler_stagger(self, group, logger_info):
+        """
+        Tests if tasks of each host are delayed by host's offset and
+        planned load is reported.
+        """
+        tasks.snmp_scheduler()
+        chords = list(group.call_args[0][0])
+        self.assertEqual(len(chords), 2)
+        for chord in chords:
+            delays = {task.options['countdown'] for task in chord.tasks}
+            self.assertEqual(len(delays), 1)
+            self.assertEqual(
+                delays.pop(),
+                scheduling.offset(chord.body.kwargs['host'], 60)
+            )
+        self.assertTrue(logger_info.called)
+
+    @override_settings(SNMP_BREAKER=True, SNMP_BREAKER_THRESHOLD=1)
+    @patch('collector.tasks.celery.group')
+    def test_snmp_scheduler_breaker(self, group):
+        """
+        Tests if host with open circuit is skipped and host whose
+        backoff has expired is probed with single chunk.
+        """
+        health.record_failure('10.0.0.1', 161)
+        tasks.snmp_scheduler()
+        chords = list(group.call_args[0][0])
+        self.assertEqual(len(chords), 1)
+        self.assertEqual(chords[0].body.kwargs['host'], 'host2')
+
+        cache.set('collector:chunk-size:10.0.0.1:161', 2, None)
+        with patch('collector.health.time.time',
+                   return_value=time.time() + 3600):
+            tasks.snmp_scheduler()
+        chords = {
+            chord.body.kwargs['host']: chord
+            for chord in group.call_args[0][0]
+        }
+        self.assertEqual(len(chords), 2)
+        self.assertEqual(len(chords['host1'].tasks), 1)
+        self.assertEqual(len(chords['host1'].tasks[0].args[3]), 2)
+
+    @override_settings(SNMP_SHARDS=['a', 'b'])
+    @patch('collector.tasks.celery.group')
+    def test_snmp_scheduler_shards(self, group):
+        """
+        Tests if all tasks of a host are routed to its shard queue.
+        """
+        models.Host.objects.filter(name='host1').update(shard='pinned')
+        tasks.snmp_scheduler()
+        for chord in group.call_args[0][0]:
+            host = chord.body.kwargs['host']
+            queue = 'pinned' if host == 'host1' else sharding.route(host)
+            self.assertEqual(chord.body.options['queue'], queue)
+            for task in chord.tasks:
+                self.assertEqual(task.options['queue'], queue)
+
+    def test_snmp_scheduler_budget(self):
+        """
+        Tests if timeout and retries of host are passed to its tasks.
+        """
+        models.Host.objects.filter(name='host1').update(timeout=0.5,
+                                                        retries=1)
+        with patch('collector.tasks.celery.group') as group:
+            tasks.snmp_scheduler()
+        for chord in group.call_args[0][0]:
+            for task in chord.tasks:
+                if chord.body.kwargs['host'] == 'host1':
+                    self.assertEqual(task.kwargs,
+                                     {'timeout': 0.5, 'retries': 1})
+                else:
+                    self.assertEqual(task.kwargs,
+                                     {'timeout': None, 'retries': None})
+
+    @override_settings(SNMP_ENGINE='asyncio')
+    def test_snmp_scheduler_usm(self):
+        """
+        Tests if SNMPv3 hosts are polled by synchronous engine tasks
+        carrying theirs user even in asyncio mode.
+        """
+        models.Host.objects.filter(name='host1').update(
+            community='', security_name='watcheye', auth_protocol='SHA',
+            auth_key='authentication'
+        )
+        targets = {target.name: target for target in tasks.aggregator()}
+        self.assertEqual(targets['host1'].usm,
+                         ('watcheye', 'SHA', 'authentication', '', ''))
+        self.assertIsNone(targets['host2'].usm)
+
+        with patch('collector.tasks.celery.group') as group:
+            tasks.snmp_scheduler()
+        multiplexer, chord = group.call_args[0][0]
+        self.assertEqual([target[0] for target in multiplexer.args[0]],
+                         ['host2'])
+        self.assertEqual(chord.body.kwargs['host'], 'host1')
+        for task in chord.tasks:
+            self.assertEqual(task.kwargs['usm'], targets['host1'].usm)
+
+    @override_settings(SNMP_BREAKER=True)
+    @patch('collector.tasks.logger.warning')
+    def test_snmp_harvester_failure(self, logger_warning):
+        """
+        Tests if failed query is logged and counted in host's health and
+        answered one resets it.
+        """
+        with patch('collector.snmp.get_cmd',
+                   return_value=('No SNMP response', 0, 0, [])):
+            samples = tasks.snmp_harvester('10.0.0.1', 161, 'watcheye',
+                                           ['1.3.6.1.2.1.6.9.0'])
+        self.assertEqual(samples, [])
+        self.assertTrue(logger_warning.called)
+        state = health.states([('10.0.0.1', 161)])['10.0.0.1', 161]
+        self.assertEqual(state['failures'], 1)
+
+        with patch('collector.snmp.get_cmd',
+                   side_effect=get_cmd_factory(Integer, 1)):
+            tasks.snmp_harvester('10.0.0.1', 161, 'watcheye',
+                                 ['1.3.6.1.2.1.6.9.0'])
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
+
+        with patch('collector.snmp.get_cmd',
+                   return_value=('No SNMP response', 0, 0, [])), \
+                override_settings(SNMP_BREAKER=False):
+            tasks.snmp_harvester('10.0.0.1', 161, 'watcheye',
+                                 ['1.3.6.1.2.1.6.9.0'])
+        self.assertEqual(health.states([('10.0.0.1', 161)]), {})
+
     def test_chunks(self):
         """
         Tests if chunks iterator splits all data into right amount of
@@ -31,9 +345,10 @@ class TasksTests(TestCase):
         """
         vector = ['spam'] * (tasks.SNMP_MAX_PARAMETERS_IN_QUERY + 1)
         self.assertEqual(len(list(tasks.chunks(vector))), 2)
+        self.assertEqual(len(list(tasks.chunks(vector, 11))), 3)
 
     @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
-    @patch('collector.tasks.getCmd',
+    @patch('collector.snmp.get_cmd',
            side_effect=get_cmd_factory(UTF8String, 'a'))
     @patch('influxdb.InfluxDBClient.write_points')
     def test_invalid_value_in_response(self, write_points, get_cmd):
@@ -66,6 +381,163 @@ class TasksTests(TestCase):
         )
         self.assertTrue(write_points.called)
 
+    @override_settings(INFLUXDB_BUFFER=True)
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_write_buffer(self, write_points):
+        """
+        Tests if points are buffered and written on worker shutdown.
+        """
+        for _ in range(2):
+            tasks.add_samples(
+                [[('1.3.6.1.2.1.6.9.0', 0), ('1.3.6.1.2.1.6.12.0', 0)]],
+                'host1'
+            )
+        self.assertFalse(write_points.called)
+        tasks.flush_write_buffer()
+        self.assertEqual(write_points.call_count, 1)
+        self.assertEqual(
+            len(write_points.call_args[0][0][0].split('\n')), 2
+        )
+        self.assertEqual(write_points.call_args[1]['protocol'], 'line')
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_add_samples_precision(self, write_points, _on_commit):
+        """
+        Tests if timestamps are floored to precision of samples' group,
+        seconds if the group is polled more often than once a minute.
+        """
+        samples = [[('1.3.6.1.2.1.6.9.0', 0), ('1.3.6.1.2.1.6.12.0', 0)]]
+        group = models.Group.objects.get(name='tcp')
+        tasks.add_samples(samples, 'host1', timestamp=90.5)
+        group.interval = 10
+        group.save()
+        tasks.add_samples(samples, 'host1', timestamp=90.5)
+        group.precision = 'ms'
+        group.save()
+        tasks.add_samples(samples, 'host1', timestamp=90.5)
+        self.assertEqual(
+            [
+                (args[0][0].rsplit(' ', 1)[1], kwargs['time_precision'])
+                for args, kwargs in write_points.call_args_list
+            ],
+            [('1', 'm'), ('90', 's'), ('90500', 'ms')]
+        )
+
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_add_samples_write_policy(self, write_points):
+        """
+        Tests if unchanged samples are left out of points and points
+        left with no fields are not written at all.
+        """
+        models.Parameter.objects.filter(name='tcpCurrEstab').update(
+            write_policy=models.Parameter.ON_CHANGE
+        )
+        models.Parameter.objects.filter(name='tcpRetransSegs').update(
+            write_policy=models.Parameter.ABSOLUTE_DEADBAND, deadband=5
+        )
+        for current, retransmitted in [(1, 0), (1, 5), (2, 6), (2, 9)]:
+            tasks.add_samples([[('1.3.6.1.2.1.6.9.0', current),
+                                ('1.3.6.1.2.1.6.12.0', retransmitted)]],
+                              'host1', timestamp=60)
+        self.assertEqual(
+            [args[0][0].split(' ')[-2] for args, _kwargs
+             in write_points.call_args_list],
+            ['tcpCurrEstab=1i,tcpRetransSegs=0i', 'tcpCurrEstab=2i,'
+             'tcpRetransSegs=6i']
+        )
+
+    @patch('influxdb.InfluxDBClient.write_points')
+    def test_add_samples_write_policy_failure(self, write_points):
+        """
+        Tests if unchanged sample is written again after its last write
+        failed.
+        """
+        models.Parameter.objects.filter(name='tcpCurrEstab').update(
+            write_policy=models.Parameter.ON_CHANGE
+        )
+        write_points.side_effect = InfluxDBServerError('unavailable')
+        with self.assertRaises(InfluxDBServerError):
+            tasks.add_samples([[('1.3.6.1.2.1.6.9.0', 1)]], 'host1')
+        write_points.side_effect = None
+        tasks.add_samples([[('1.3.6.1.2.1.6.9.0', 1)]], 'host1')
+        tasks.add_samples([[('1.3.6.1.2.1.6.9.0', 1)]], 'host1')
+        self.assertEqual(write_points.call_count, 2)
+
+    def test_aggregator_interval(self):
+        """
+        Tests if groups polled more often are planned separately.
+        """
+        models.Group.objects.filter(name='tcp').update(interval=10)
+        targets = [target for target in tasks.aggregator()
+                   if target.name == 'host1']
+        self.assertEqual([target.interval for target in targets], [None, 10])
+        self.assertFalse([oid for oid in targets[0].parameters
+                          if oid.startswith('1.3.6.1.2.1.6.')])
+        self.assertTrue(all(oid.startswith('1.3.6.1.2.1.6.')
+                            for oid in targets[1].parameters))
+
+    def test_rounds(self):
+        """
+        Tests if hosts planned with shorter interval are polled in
+        several rounds keeping theirs staggered slots.
+        """
+        default = plan.HostPlan('host1', '10.0.0.1', 161, 'watcheye', [], [])
+        fast = default._replace(interval=20)
+        self.assertEqual(
+            [
+                ([target.interval for target in targets], delays['host1'],
+                 timestamp)
+                for targets, delays, timestamp in tasks.rounds(
+                    [default, fast], {'host1': 25}, 600
+                )
+            ],
+            [([None], 25, 600), ([20], 5, 600), ([20], 25, 620),
+             ([20], 45, 640)]
+        )
+
+    @override_settings(SNMP_STAGGER=True)
+    @patch('collector.tasks.celery.group')
+    def test_cycle_timestamp(self, group):
+        """
+        Tests if samples of staggered hosts are stamped with time the
+        run starts at instead of time they are stored at.
+        """
+        before = time.time()
+        tasks.snmp_scheduler()
+        after = time.time()
+        signatures = list(group.call_args[0][0])
+        self.assertTrue(all(signature.options.get('countdown')
+                            for signature in signatures[0].tasks))
+        timestamps = {signature.body['kwargs']['timestamp']
+                      for signature in signatures}
+        self.assertEqual(len(timestamps), 1)
+        self.assertTrue(before <= timestamps.pop() <= after)
+
+    def test_serialize(self):
+        """
+        Tests if points serialized by ResultPacker are the same as
+        serialized by InfluxDB client from dicts.
+        """
+        values = {
+            models.Parameter.FLOAT: 1.5,
+            models.Parameter.INTEGER: 2,
+            models.Parameter.STRING: 'a "b",c=d',
+            models.Parameter.BOOLEAN: True
+        }
+        for host in models.Host.objects.all():
+            mapping = {
+                tasks.compose_oid(instance.group, parameter, instance):
+                    values[parameter.type]
+                for instance in host.instances.all()
+                for parameter in instance.group.parameters.all()
+            }
+            points = reference_points(host, dict(mapping))
+            buffer = lineprotocol.LineBuffer()
+            tasks.ResultPacker(host, dict(mapping)).serialize(buffer, 60, 'm')
+            self.assertEqual(buffer.getvalue() + '\n',
+                             make_lines({'points': points}))
+
     @patch('collector.tasks.logger.error')
     @patch('influxdb.InfluxDBClient.write_points')
     def test_invalid_value(self, write_points, logger_error):
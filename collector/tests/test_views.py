@@ -133,10 +133,11 @@ class IndexViewTests(DataTestCase):
         self.assertTrue(write_points.called)
         self.assertTrue(logger_warning.called)
 
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
     @patch('collector.tasks.logger.error')
     @patch('influxdb.InfluxDBClient.write_points')
     @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
-    def test_uncastable_tag(self, write_points, logger_error):
+    def test_uncastable_tag(self, write_points, logger_error, _on_commit):
         """
         Received indexing parameter of a wrong type should log an alarm.
         """
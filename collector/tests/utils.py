@@ -1,9 +1,15 @@
 import datetime
+import socket
+import threading
 
 from django.test import TestCase
-from pysnmp.hlapi import ObjectIdentity, ObjectType
+from pyasn1.codec.ber import decoder, encoder
+from pysnmp.carrier.asyncore.dgram import udp
+from pysnmp.entity import config, engine
+from pysnmp.entity.rfc3413 import cmdrsp, context
+from pysnmp.proto import api
 
-from .. import constants, models
+from .. import constants, models, schema
 
 
 def make_timestamp() -> float:
@@ -85,50 +91,246 @@ class DataTestCase(TestCase):
 
 def get_cmd_factory(cls, value):
     """
-    A function factory producing replacements for pysnmp.hlapi.getCmd.
+    A function factory producing replacements for collector.snmp.get_cmd.
     Its products are used in tests to decouple testing from external
     entities by mimicking SNMP GET results normally fetched over the
     network. All SNMP objects are of cls type and have value of value.
 
     :param cls: expected type of SNMP object
     :param value: expected value of SNMP object
-    :return: a callable with same API as pysnmp.hlapi.getCmd
+    :return: a callable with same API as collector.snmp.get_cmd
     """
-    def wrapper(_snmp_engine, _auth_data, _transport_target, _context_data,
-                *var_binds, **_options):
+    def wrapper(_snmp_engine, _auth_data, _transport_target, oids):
         """
-        Ignores all parameters but var_binds and returns it updated with
+        Ignores all parameters but oids and returns them paired with
         value. Accepts same arguments and returns similar result as
-        pysnmp.hlapi.getCmd.
+        collector.snmp.get_cmd.
 
         :param _snmp_engine: ignored parameter
         :param _auth_data: ignored parameter
         :param _transport_target: ignored parameter
-        :param _context_data: ignored parameter
-        :param var_binds: tuple of parameters
-        :param _options: ignored parameter
-        :return: same as pysnmp.hlapi.getCmd
+        :param oids: list of OIDs
+        :return: same as collector.snmp.get_cmd
         """
-        def make_value(parameter):
-            """
-            Takes given parameter and returns it recreated and filled in
-            with value.
-
-            :param parameter: SNMP parameter
-            :return: SNMP parameter with value
-            """
-            parameter._ObjectType__state = ObjectType.stClean
-            parameter._ObjectType__args[0].__stage = ObjectIdentity.stClean
-            identity, _value = parameter
-            oid = str(identity._ObjectIdentity__args[0])
-            identity = ObjectIdentity(oid)
-            identity._ObjectIdentity__oid = oid
-            identity._ObjectIdentity__state = ObjectIdentity.stClean
-            val = ObjectType(identity, cls(value))
-            val._ObjectType__state = ObjectType.stClean
-            return val
-
-        return iter(
-            [[None, 0, 0, [make_value(bind) for bind in var_binds]]]
-        )
+        return None, 0, 0, [(oid, cls(value)) for oid in oids]
     return wrapper
+
+
+def bulk_cmd_factory(cls, value, indexes):
+    """
+    A function factory producing replacements for collector.snmp.bulk_cmd.
+    Its products mimic walking tables having rows of given indexes with
+    all SNMP objects of cls type and value of value.
+
+    :param cls: expected type of SNMP object
+    :param value: expected value of SNMP object
+    :param indexes: indexes of table rows
+    :return: a callable with same API as collector.snmp.bulk_cmd
+    """
+    def wrapper(_snmp_engine, _auth_data, _transport_target, columns,
+                _max_repetitions):
+        """
+        Ignores all parameters but columns and yields theirs table rows.
+        Accepts same arguments and yields similar results as
+        collector.snmp.bulk_cmd.
+        """
+        for index in indexes:
+            wrapper.rows += 1
+            yield None, 0, 0, [
+                ('{column}.{index}'.format(column=column, index=index),
+                 cls(value))
+                for column in columns
+            ]
+    wrapper.rows = 0
+    return wrapper
+
+
+class SnmpResponder(threading.Thread):
+    """
+    Minimal SNMPv2c agent listening on localhost. It answers GET
+    requests with objects of cls type having value of value, which
+    allows to test networking code without external entities.
+    """
+    p_mod = api.protoModules[api.protoVersion2c]
+
+    def __init__(self, cls, value, drop: int = 0,
+                 max_var_binds: int = None, error_oid: str = None) -> None:
+        """
+        Constructor of new SnmpResponder objects.
+
+        :param cls: expected type of SNMP object
+        :param value: expected value of SNMP object
+        :param drop: number of first requests to be left unanswered
+        :param max_var_binds: requests of more OIDs are answered with
+            tooBig error
+        :param error_oid: requests of the OID are answered with genErr
+            error pointing at it
+        """
+        super().__init__(daemon=True)
+        self.cls = cls
+        self.value = value
+        self.drop = drop
+        self.max_var_binds = max_var_binds
+        self.error_oid = error_oid
+        self.requests = 0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.05)
+        self.port = self.socket.getsockname()[1]
+        self._stopped = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self._stopped.set()
+        self.join()
+        self.socket.close()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                data, addr = self.socket.recvfrom(65535)
+            except socket.timeout:
+                continue
+            self.requests += 1
+            if self.requests <= self.drop:
+                continue
+            self.socket.sendto(self.respond(data), addr)
+
+    def respond(self, data: bytes) -> bytes:
+        """
+        Builds response to given GET request message.
+
+        :param data: encoded request message
+        :return: encoded response message
+        """
+        p_mod = self.p_mod
+        request, _ = decoder.decode(data, asn1Spec=p_mod.Message())
+        request_pdu = p_mod.apiMessage.getPDU(request)
+        response_pdu = p_mod.apiPDU.getResponse(request_pdu)
+        var_binds = p_mod.apiPDU.getVarBinds(request_pdu)
+        names = [str(name) for name, _value in var_binds]
+        if self.max_var_binds and len(var_binds) > self.max_var_binds:
+            p_mod.apiPDU.setErrorStatus(response_pdu, 'tooBig')
+            p_mod.apiPDU.setVarBinds(response_pdu, var_binds)
+        elif self.error_oid in names:
+            p_mod.apiPDU.setErrorStatus(response_pdu, 'genErr')
+            p_mod.apiPDU.setErrorIndex(response_pdu,
+                                       names.index(self.error_oid) + 1)
+            p_mod.apiPDU.setVarBinds(response_pdu, var_binds)
+        else:
+            p_mod.apiPDU.setVarBinds(
+                response_pdu,
+                [(name, self.cls(self.value)) for name, _value in var_binds]
+            )
+        response = p_mod.apiMessage.getResponse(request)
+        p_mod.apiMessage.setPDU(response, response_pdu)
+        return encoder.encode(response)
+
+
+class UsmResponder(threading.Thread):
+    """
+    SNMPv3 agent listening on localhost and serving its own MIB objects
+    (to GET and GETBULK queries) to a single user with SHA
+    authentication and AES privacy.
+    Received datagrams are counted, so discovery exchanges can be told
+    apart from GET queries.
+    """
+    user = 'watcheye'
+    auth_key = 'authentication'
+    privacy_key = 'privacy-key'
+
+    def __init__(self, auth_key: str = auth_key,
+                 privacy_key: str = privacy_key) -> None:
+        """
+        Constructor of new UsmResponder objects.
+
+        :param auth_key: authentication passphrase of the user
+        :param privacy_key: privacy passphrase of the user
+        """
+        super().__init__(daemon=True)
+        self.auth_key = auth_key
+        self.privacy_key = privacy_key
+        self.requests = 0
+        responder = self
+
+        class CountingTransport(udp.UdpTransport):
+            def handle_read(self):
+                responder.requests += 1
+                super().handle_read()
+
+        self.engine = engine.SnmpEngine()
+        transport = CountingTransport().openServerMode(('127.0.0.1', 0))
+        config.addTransport(self.engine, udp.domainName, transport)
+        self.port = transport.socket.getsockname()[1]
+        config.addV3User(self.engine, self.user,
+                         config.usmHMACSHAAuthProtocol, self.auth_key,
+                         config.usmAesCfb128Protocol, self.privacy_key)
+        config.addVacmUser(self.engine, 3, self.user, 'authPriv',
+                           (1, 3, 6), (1, 3, 6))
+        snmp_context = context.SnmpContext(self.engine)
+        cmdrsp.GetCommandResponder(self.engine, snmp_context)
+        cmdrsp.BulkCommandResponder(self.engine, snmp_context)
+        self.engine.transportDispatcher.setTimerResolution(0.05)
+
+    @property
+    def usm(self) -> tuple:
+        """
+        :return: the user as expected by collector.snmp.usm_user_data
+        """
+        return self.user, 'SHA', self.auth_key, 'AES128', self.privacy_key
+
+    def __enter__(self):
+        self.engine.transportDispatcher.jobStarted(1)
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.engine.transportDispatcher.jobFinished(1)
+        self.join()
+        self.engine.transportDispatcher.closeDispatcher()
+
+    def run(self) -> None:
+        self.engine.transportDispatcher.runDispatcher()
+
+
+def reference_points(host: models.Host, mapping: dict) -> list:
+    """
+    Builds points of host's samples as dicts accepted by InfluxDB client
+    scanning parameters of every instance, the way samples were packed
+    before host schemas were compiled. Serves as a reference of what
+    ResultPacker writes.
+
+    :param host: Host object
+    :param mapping: maps sample identifiers to valid values, samples
+        packed are removed from it
+    :return: points timestamped with 1
+    """
+    def values(instance, indexing):
+        result = {}
+        for parameter in instance.group.parameters.all():
+            oid = schema.compose_oid(instance.group, parameter, instance)
+            if oid in mapping and parameter.indexing == indexing:
+                caster = schema.casters[parameter.type]
+                result[parameter.name] = caster(mapping.pop(oid))
+        return result
+
+    host_tags = {tag_value.tag_id: tag_value.value
+                 for tag_value in host.tag_values.all()}
+    host_tags['host'] = host.name
+    for instance in host.instances.all():
+        if instance.group.type == models.Group.SCALAR:
+            host_tags.update(values(instance, True))
+    points = []
+    for instance in host.instances.all():
+        fields = values(instance, False)
+        tags = dict(host_tags)
+        if instance.group.type == models.Group.TABULAR:
+            tags.update(values(instance, True))
+            tags['instance'] = instance.name
+        if fields:
+            points.append({'measurement': instance.group.name, 'time': 1,
+                           'fields': fields, 'tags': tags})
+    return points
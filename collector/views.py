@@ -22,7 +22,7 @@ def index(request):
     form = forms.SeriesForm(data=payload)
     if form.is_valid():
         data = form.cleaned_data
-        task = tasks.add_samples.delay(
+        task = tasks.queue_samples(
             samples=[
                 [
                     sample['parameter'],
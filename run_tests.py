@@ -31,7 +31,9 @@ def main():
             INFLUXDB_USERNAME='user',
             INFLUXDB_PASSWORD='secret',
             CELERY_BROKER_URL='memory://localhost/',
-            CELERY_RESULT_BACKEND='rpc://localhost:5672//'
+            CELERY_RESULT_BACKEND='rpc://localhost:5672//',
+            # tests run in a single process
+            SILENCED_SYSTEM_CHECKS=['collector.W001']
         )
 
     django.setup()
@@ -13,7 +13,7 @@ os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 setup(
     name='watcheye-collector',
     version=__version__,
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     include_package_data=True,
     description='A Django application to collect monitoring data samples '
                 'through HTTP or SNMP GET interface.',
@@ -40,6 +40,7 @@ setup(
         'celery[redis]>=4.2.0',
         'django>=2.0.0',
         'influxdb>=5.2.0',
+        'msgpack',
         'pyasn1',
         'pysnmp'
     ]